@@ -0,0 +1,89 @@
+# Django modules
+from django.contrib import admin
+
+# Project modules
+from .models import (
+    DAILY_SALES_WATERMARK,
+    DailyOrders,
+    DailySales,
+    RollupWatermark,
+)
+
+
+class ReadOnlyAdminMixin:
+    """Rollups are only written by their refresh."""
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(DailySales)
+class DailySalesAdmin(ReadOnlyAdminMixin, admin.ModelAdmin):
+    """
+    Daily sales dashboard.
+
+    Above the rows, the changelist shows the totals of the filtered
+    rollup and its best days, sellers, categories and cities, all
+    computed from the rollup tables. The breakdowns count order lines:
+    an order once per seller, category and city it touches.
+    """
+
+    change_list_template = "analytics/admin/dailysales_change_list.html"
+    list_display = (
+        "date",
+        "seller",
+        "category",
+        "city",
+        "revenue",
+        "units",
+        "order_count",
+    )
+    list_select_related = ("seller", "category")
+    list_filter = ("date", "category")
+    date_hierarchy = "date"
+    search_fields = ("=city", "seller__email")
+
+    # Rows shown in each breakdown of the dashboard
+    top = 10
+
+    def changelist_view(self, request, extra_context=None):
+        response = super().changelist_view(request, extra_context)
+        if not hasattr(response, "context_data"):
+            return response
+        sales = response.context_data["cl"].queryset
+        response.context_data.update(
+            totals=sales.totals(),
+            top_days=sales.by("date")[:self.top],
+            top_sellers=sales.by("seller__email")[:self.top],
+            top_categories=sales.by("category__name")[:self.top],
+            top_cities=sales.by("city")[:self.top],
+            watermark=RollupWatermark.objects.filter(
+                name=DAILY_SALES_WATERMARK
+            ).first(),
+        )
+        return response
+
+
+@admin.register(DailyOrders)
+class DailyOrdersAdmin(ReadOnlyAdminMixin, admin.ModelAdmin):
+    """
+    Daily orders admin configuration class.
+    """
+
+    list_display = ("date", "order_count")
+    date_hierarchy = "date"
+
+
+@admin.register(RollupWatermark)
+class RollupWatermarkAdmin(ReadOnlyAdminMixin, admin.ModelAdmin):
+    """
+    Rollup watermarks admin configuration class.
+    """
+
+    list_display = ("name", "value")
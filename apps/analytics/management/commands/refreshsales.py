@@ -0,0 +1,55 @@
+# Python modules
+from typing import Any
+from datetime import datetime, timedelta
+
+# Django modules
+from django.core.management.base import BaseCommand, CommandParser
+
+# Project modules
+from apps.analytics.models import DailySales
+
+
+class Command(BaseCommand):
+    help = "Add the order items created since the last refresh to the daily sales rollup"
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "--lag",
+            type=int,
+            default=60,
+            help="Seconds to leave order items alone after their creation.",
+        )
+        parser.add_argument(
+            "--step",
+            type=int,
+            default=1,
+            help="Days of order items aggregated per transaction.",
+        )
+        parser.add_argument(
+            "--rebuild",
+            action="store_true",
+            help="Drop the rollup and aggregate every order item again.",
+        )
+
+    def handle(self, *args: tuple[Any, ...], **kwargs: Any) -> None:
+        """Command entry point."""
+
+        start_time: datetime = datetime.now()
+        options: dict[str, timedelta] = {
+            "lag": timedelta(seconds=kwargs["lag"]),
+            "step": timedelta(days=kwargs["step"]),
+        }
+        refresh = (
+            DailySales.objects.rebuild
+            if kwargs["rebuild"]
+            else DailySales.objects.refresh
+        )
+        written, watermark = refresh(**options)
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Wrote {written} daily sales rows in "
+                f"{(datetime.now() - start_time).total_seconds()} seconds, "
+                f"order items are aggregated up to {watermark}."
+            )
+        )
@@ -0,0 +1,62 @@
+# Generated by Django 5.0 on 2026-10-18 17:06
+
+from django.db import migrations, models
+from django.db.models import Count, Exists, OuterRef
+from django.db.models.functions import TruncDate
+
+
+def fill_daily_orders(apps, schema_editor):
+    # Orders with items already aggregated into the daily sales
+    alias = schema_editor.connection.alias
+    watermark = (
+        apps.get_model("analytics", "RollupWatermark")
+        .objects.using(alias)
+        .filter(name="daily_sales", value__isnull=False)
+        .first()
+    )
+    if watermark is None:
+        return
+    OrderItem = apps.get_model("orders", "OrderItem")
+    orders = (
+        apps.get_model("orders", "Order")
+        .objects.using(alias)
+        .filter(
+            Exists(
+                OrderItem.objects.filter(
+                    order=OuterRef("pk"), created_at__lte=watermark.value
+                )
+            )
+        )
+        .order_by()
+        .values(day=TruncDate("created_at"))
+        .annotate(orders=Count("pk"))
+    )
+    DailyOrders = apps.get_model("analytics", "DailyOrders")
+    DailyOrders.objects.using(alias).bulk_create(
+        DailyOrders(date=row["day"], order_count=row["orders"])
+        for row in orders
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0001_initial'),
+        ('orders', '0010_archivedorder'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyOrders',
+            fields=[
+                ('date', models.DateField(primary_key=True, serialize=False)),
+                ('order_count', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'daily orders',
+                'verbose_name_plural': 'daily orders',
+                'ordering': ('-date',),
+            },
+        ),
+        migrations.RunPython(fill_daily_orders, migrations.RunPython.noop),
+    ]
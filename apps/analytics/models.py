@@ -0,0 +1,313 @@
+# Python modules
+from datetime import datetime, timedelta
+from typing import Optional
+
+# Django modules
+from django.conf import settings
+from django.db import connections, models, transaction
+from django.db.models import (
+    Count,
+    Exists,
+    F,
+    Max,
+    Min,
+    OuterRef,
+    QuerySet,
+    Sum,
+)
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+# Project modules
+from apps.orders.models import Order, OrderItem
+from apps.products.models import Category
+
+
+REVENUE_FIELD = models.DecimalField(max_digits=14, decimal_places=2)
+
+# Rollup columns, in the order of the INSERT ... SELECT of a refresh
+DAILY_SALES_KEY = ("date", "seller_id", "category_id", "city")
+DAILY_SALES_MEASURES = ("revenue", "units", "order_count")
+DAILY_SALES_WATERMARK = "daily_sales"
+# Day-level rollup of the same refresh, counting every order once
+DAILY_ORDERS_KEY = ("date",)
+DAILY_ORDERS_MEASURES = ("order_count",)
+
+
+class RollupWatermark(models.Model):
+    """
+    High-water mark of a rollup: the source rows created up to value
+    are already aggregated.
+    """
+
+    name = models.CharField(max_length=64, primary_key=True)
+    value = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self) -> str:
+        """Returns the string representation of the object."""
+        return f"{self.name}: {self.value}"
+
+
+class DailySalesQuerySet(models.QuerySet):
+    """Daily sales QuerySet."""
+
+    def source(self, start: Optional[datetime], end: datetime) -> QuerySet:
+        """
+        Rollup rows of the order items created in (start, end], with
+        the columns in DAILY_SALES_KEY + DAILY_SALES_MEASURES order.
+        """
+        items: QuerySet = OrderItem.objects.using(self.db).filter(
+            created_at__lte=end
+        )
+        if start is not None:
+            items = items.filter(created_at__gt=start)
+        return (
+            items.order_by()
+            .values(
+                rollup_date=TruncDate("order__created_at"),
+                rollup_seller=F("product__seller_id"),
+                rollup_category=F("product__category_id"),
+                rollup_city=F("order__delivery_city_normalized"),
+            )
+            .annotate(
+                rollup_revenue=Sum(
+                    F("price") * F("quantity"), output_field=REVENUE_FIELD
+                ),
+                rollup_units=Sum("quantity"),
+                rollup_orders=Count("order_id", distinct=True),
+            )
+        )
+
+    def order_source(
+        self, start: Optional[datetime], end: datetime
+    ) -> QuerySet:
+        """
+        Daily order counts of the orders whose first item was created in
+        (start, end], so an order is counted by exactly one step.
+        """
+        items: QuerySet = OrderItem.objects.using(self.db).filter(
+            order=OuterRef("pk")
+        )
+        orders: QuerySet = Order.objects.using(self.db).filter(
+            Exists(
+                items.filter(created_at__lte=end).filter(
+                    **({"created_at__gt": start} if start else {})
+                )
+            )
+        )
+        if start is not None:
+            orders = orders.exclude(
+                Exists(items.filter(created_at__lte=start))
+            )
+        return (
+            orders.order_by()
+            .values(rollup_date=TruncDate("created_at"))
+            .annotate(rollup_orders=Count("pk"))
+        )
+
+    def refresh(
+        self,
+        lag: timedelta = timedelta(minutes=1),
+        step: timedelta = timedelta(days=1),
+    ) -> tuple[int, Optional[datetime]]:
+        """
+        Adds the order items created since the watermark to the rollup.
+
+        Items younger than lag are left for the next refresh, so rows of
+        checkouts still being committed are not skipped. The new items
+        are aggregated and added to the existing rows by one
+        INSERT ... SELECT ... ON CONFLICT statement per step of
+        created_at. Each step moves the watermark in the same
+        transaction with a compare-and-set update, so an interrupted or
+        concurrent refresh never counts an item twice.
+
+        Returns the number of rollup rows written and the new watermark.
+        """
+        connection = connections[self.db]
+        quote = connection.ops.quote_name
+        upsert: str = (
+            "INSERT INTO {table} ({columns}) {select} "
+            "ON CONFLICT ({key}) DO UPDATE SET {updates}"
+        )
+        rollups: list[tuple] = [
+            (self.model, DAILY_SALES_KEY, DAILY_SALES_MEASURES, self.source),
+            (
+                DailyOrders,
+                DAILY_ORDERS_KEY,
+                DAILY_ORDERS_MEASURES,
+                self.order_source,
+            ),
+        ]
+
+        watermarks = RollupWatermark.objects.using(self.db)
+        watermark, _ = watermarks.get_or_create(name=DAILY_SALES_WATERMARK)
+        start: Optional[datetime] = watermark.value
+        bounds: dict = OrderItem.objects.using(self.db).filter(
+            **({"created_at__gt": start} if start else {})
+        ).aggregate(first=Min("created_at"), last=Max("created_at"))
+        if bounds["last"] is None:
+            return 0, start
+        until: datetime = min(bounds["last"], timezone.now() - lag)
+
+        written: int = 0
+        while start is None or start < until:
+            end: datetime = min(
+                (start or bounds["first"]) + step, until
+            )
+            with transaction.atomic(using=self.db):
+                if not watermarks.filter(
+                    name=DAILY_SALES_WATERMARK,
+                    **({"value": start} if start else {"value__isnull": True}),
+                ).update(value=end):
+                    # Another refresh got there first
+                    break
+                for model, key, measures, source in rollups:
+                    table: str = quote(model._meta.db_table)
+                    sql, params = source(start, end).query.sql_with_params()
+                    with connection.cursor() as cursor:
+                        cursor.execute(
+                            upsert.format(
+                                table=table,
+                                columns=", ".join(key + measures),
+                                select=sql,
+                                key=", ".join(key),
+                                updates=", ".join(
+                                    f"{column} = {table}.{column} "
+                                    f"+ excluded.{column}"
+                                    for column in measures
+                                ),
+                            ),
+                            params,
+                        )
+                        if model is self.model:
+                            written += cursor.rowcount
+            start = end
+        return written, start
+
+    def rebuild(self, **kwargs) -> tuple[int, Optional[datetime]]:
+        """Recomputes the rollup from every order item."""
+        with transaction.atomic(using=self.db):
+            self.all().delete()
+            DailyOrders.objects.using(self.db).all().delete()
+            RollupWatermark.objects.using(self.db).filter(
+                name=DAILY_SALES_WATERMARK
+            ).delete()
+        return self.refresh(**kwargs)
+
+    def totals(self) -> dict:
+        """
+        Revenue, units and order lines of the rows, and total_orders,
+        the distinct orders placed on their days.
+
+        An order is one order line per seller, category and city it
+        touches, so only the day-level DailyOrders count every order
+        once.
+        """
+        totals: dict = self.aggregate(
+            total_revenue=Sum("revenue"),
+            total_units=Sum("units"),
+            total_order_lines=Sum("order_count"),
+        )
+        totals.update(
+            DailyOrders.objects.using(self.db)
+            .filter(date__in=self.order_by().values("date"))
+            .aggregate(total_orders=Sum("order_count"))
+        )
+        return totals
+
+    def by(self, *fields: str) -> QuerySet:
+        """
+        Revenue, units and order lines grouped by fields, best sellers
+        first.
+        """
+        return (
+            self.order_by()
+            .values(*fields)
+            .annotate(
+                total_revenue=Sum("revenue"),
+                total_units=Sum("units"),
+                total_order_lines=Sum("order_count"),
+            )
+            .order_by("-total_revenue")
+        )
+
+
+class DailyOrders(models.Model):
+    """
+    Orders placed on a day.
+
+    Rows are maintained by DailySales.objects.refresh() along with the
+    daily sales, which count an order once per row it has items in.
+    """
+
+    date = models.DateField(primary_key=True)
+    order_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        """Meta class."""
+
+        verbose_name = "daily orders"
+        verbose_name_plural = "daily orders"
+        ordering = ("-date",)
+
+    def __str__(self) -> str:
+        """Returns the string representation of the object."""
+        return f"Orders of {self.date}"
+
+
+class DailySales(models.Model):
+    """
+    Sales of a day, seller, category and delivery city.
+
+    Rows are maintained by DailySales.objects.refresh() from the order
+    items; order_count is the number of orders with items in the row,
+    so an order is counted once per row it touches (see DailyOrders).
+    """
+
+    date = models.DateField()
+    # Kept, with no seller or category, when those are deleted
+    seller = models.ForeignKey(
+        to=settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="daily_sales",
+    )
+    category = models.ForeignKey(
+        to=Category,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="daily_sales",
+    )
+    # Normalized delivery city of the orders
+    city = models.CharField(max_length=64)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    units = models.PositiveBigIntegerField(default=0)
+    order_count = models.PositiveIntegerField(default=0)
+
+    objects = DailySalesQuerySet().as_manager()
+
+    class Meta:
+        """Meta class."""
+
+        verbose_name = "daily sales"
+        verbose_name_plural = "daily sales"
+        ordering = ("-date",)
+        constraints = [
+            models.UniqueConstraint(
+                fields=["date", "seller", "category", "city"],
+                name="dailysales_key",
+            ),
+        ]
+        indexes = [
+            models.Index(fields=["seller", "date"], name="dailysales_seller_idx"),
+            models.Index(
+                fields=["category", "date"], name="dailysales_category_idx"
+            ),
+            models.Index(fields=["city", "date"], name="dailysales_city_idx"),
+        ]
+
+    def __str__(self) -> str:
+        """Returns the string representation of the object."""
+        return f"Sales of {self.date} ({self.city})"
@@ -0,0 +1,11 @@
+# Django modules
+from django import template
+
+
+register = template.Library()
+
+
+@register.filter
+def get_item(row: dict, key: str):
+    """Value of a breakdown row, whose keys have double underscores."""
+    return row.get(key)
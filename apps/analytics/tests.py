@@ -0,0 +1,239 @@
+# Python modules
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+
+# Django modules
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+# Project modules
+from apps.analytics.models import (
+    DAILY_SALES_WATERMARK,
+    DailyOrders,
+    DailySales,
+    RollupWatermark,
+)
+from apps.orders.models import Order, OrderItem
+from apps.products.models import Category, Product
+from apps.users.models import CustomUser
+
+
+NO_LAG = {"lag": timedelta(0)}
+
+
+class DailySalesTestCase(TestCase):
+    """Daily sales rollup tests."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.seller = CustomUser.objects.create_user(
+            email="seller@example.com", username="seller", password="12345"
+        )
+        cls.buyer = CustomUser.objects.create_user(
+            email="buyer@example.com", username="buyer", password="12345"
+        )
+        cls.books = Category.objects.create(name="Books")
+        cls.pens = Category.objects.create(name="Pens")
+        cls.book = Product.objects.create(
+            category=cls.books, seller=cls.seller, name="Book", price="10.50"
+        )
+        cls.pen = Product.objects.create(
+            category=cls.pens, seller=cls.seller, name="Pen", price="1.25"
+        )
+
+    def order(self, city, *lines, days_ago=0):
+        order = Order.objects.create(
+            user=self.buyer,
+            phone_number="+77011234567",
+            delivery_city=city,
+            delivery_pickup_point="Pickup 1",
+        )
+        if days_ago:
+            Order.objects.filter(pk=order.pk).update(
+                created_at=order.created_at - timedelta(days=days_ago)
+            )
+        OrderItem.objects.bulk_create(
+            OrderItem(
+                order=order,
+                product=product,
+                name=product.name,
+                price=product.price,
+                quantity=quantity,
+            )
+            for product, quantity in lines
+        )
+        return order
+
+    def rollup(self):
+        return {
+            (row.date, row.category_id, row.city): (
+                row.revenue, row.units, row.order_count
+            )
+            for row in DailySales.objects.all()
+        }
+
+    def test_refresh(self):
+        self.order("Almaty", (self.book, 2), (self.pen, 4))
+        self.order("almaty ", (self.book, 1))
+        self.order("Astana", (self.book, 1), days_ago=1)
+
+        written, watermark = DailySales.objects.refresh(**NO_LAG)
+
+        today = timezone.now().date()
+        self.assertEqual(written, 3)
+        self.assertEqual(watermark, OrderItem.objects.latest("created_at").created_at)
+        self.assertEqual(
+            self.rollup(),
+            {
+                (today, self.books.pk, "almaty"): (Decimal("31.50"), 3, 2),
+                (today, self.pens.pk, "almaty"): (Decimal("5.00"), 4, 1),
+                (today - timedelta(days=1), self.books.pk, "astana"): (
+                    Decimal("10.50"), 1, 1
+                ),
+            },
+        )
+
+    def test_incremental_refresh(self):
+        self.order("Almaty", (self.book, 2))
+        DailySales.objects.refresh(**NO_LAG)
+
+        self.order("Almaty", (self.book, 1), (self.pen, 1))
+        written, _ = DailySales.objects.refresh(**NO_LAG)
+
+        today = timezone.now().date()
+        self.assertEqual(written, 2)
+        self.assertEqual(
+            self.rollup(),
+            {
+                (today, self.books.pk, "almaty"): (Decimal("31.50"), 3, 2),
+                (today, self.pens.pk, "almaty"): (Decimal("1.25"), 1, 1),
+            },
+        )
+        self.assertEqual(DailySales.objects.refresh(**NO_LAG)[0], 0)
+
+    def test_recent_items_wait_for_the_lag(self):
+        self.order("Almaty", (self.book, 2))
+
+        written, watermark = DailySales.objects.refresh(lag=timedelta(hours=1))
+
+        self.assertEqual(written, 0)
+        self.assertFalse(DailySales.objects.exists())
+        self.assertEqual(DailySales.objects.refresh(**NO_LAG)[0], 1)
+
+    def test_rebuild(self):
+        self.order("Almaty", (self.book, 2))
+        self.order("Astana", (self.pen, 1), days_ago=3)
+        DailySales.objects.refresh(**NO_LAG)
+        rollup = self.rollup()
+        DailySales.objects.update(units=0)
+
+        call_command("refreshsales", "--rebuild", "--lag=0", stdout=StringIO())
+
+        self.assertEqual(self.rollup(), rollup)
+        self.assertEqual(
+            RollupWatermark.objects.get(name=DAILY_SALES_WATERMARK).value,
+            OrderItem.objects.latest("created_at").created_at,
+        )
+
+    def test_breakdowns(self):
+        self.order("Almaty", (self.book, 2), (self.pen, 4))
+        self.order("Astana", (self.book, 1))
+        DailySales.objects.refresh(**NO_LAG)
+
+        self.assertEqual(
+            DailySales.objects.totals(),
+            {
+                "total_revenue": Decimal("36.50"),
+                "total_units": 7,
+                "total_order_lines": 3,
+                "total_orders": 2,
+            },
+        )
+        self.assertEqual(
+            [
+                (row["city"], row["total_revenue"])
+                for row in DailySales.objects.by("city")
+            ],
+            [("almaty", Decimal("26.00")), ("astana", Decimal("10.50"))],
+        )
+
+    def test_orders_of_several_sellers_are_counted_once(self):
+        other = CustomUser.objects.create_user(
+            email="other@example.com", username="other", password="12345"
+        )
+        mug = Product.objects.create(
+            category=self.books, seller=other, name="Mug", price="3.00"
+        )
+        self.order("Almaty", (self.book, 1), (mug, 1))
+        self.order("Astana", (mug, 2), days_ago=1)
+        DailySales.objects.refresh(**NO_LAG)
+
+        today = timezone.now().date()
+        self.assertEqual(
+            DailySales.objects.totals()["total_order_lines"], 3
+        )
+        self.assertEqual(DailySales.objects.totals()["total_orders"], 2)
+        self.assertEqual(
+            DailySales.objects.filter(date=today).totals()["total_orders"], 1
+        )
+        self.assertEqual(
+            dict(DailyOrders.objects.values_list("date", "order_count")),
+            {today: 1, today - timedelta(days=1): 1},
+        )
+
+    def test_orders_spanning_refreshes_are_counted_once(self):
+        order = self.order("Almaty", (self.book, 1))
+        DailySales.objects.refresh(**NO_LAG)
+        OrderItem.objects.create(
+            order=order,
+            product=self.pen,
+            name=self.pen.name,
+            price=self.pen.price,
+            quantity=1,
+        )
+        DailySales.objects.refresh(**NO_LAG)
+
+        self.assertEqual(DailySales.objects.totals()["total_orders"], 1)
+
+        call_command("refreshsales", "--rebuild", "--lag=0", stdout=StringIO())
+
+        self.assertEqual(DailySales.objects.totals()["total_orders"], 1)
+
+    def test_sales_survive_their_category(self):
+        self.order("Almaty", (self.book, 2), (self.pen, 4))
+        DailySales.objects.refresh(**NO_LAG)
+        totals = DailySales.objects.totals()
+
+        self.pens.delete()
+
+        self.assertEqual(DailySales.objects.totals(), totals)
+        self.assertEqual(
+            set(DailySales.objects.values_list("category", flat=True)),
+            {self.books.pk, None},
+        )
+
+    def test_admin_dashboard(self):
+        self.order("Almaty", (self.book, 2))
+        DailySales.objects.refresh(**NO_LAG)
+        admin = CustomUser.objects.create_superuser(
+            email="admin@example.com", username="admin", password="12345"
+        )
+        self.client.force_login(admin)
+
+        response = self.client.get(
+            reverse("admin:analytics_dailysales_changelist")
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context["totals"]["total_units"], 2)
+        self.assertContains(response, "Best sellers")
+        self.assertContains(response, "seller@example.com")
+        self.assertEqual(
+            self.client.get(
+                reverse("admin:analytics_dailysales_add")
+            ).status_code,
+            403,
+        )
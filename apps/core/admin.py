@@ -0,0 +1,58 @@
+# Python modules
+from typing import Optional
+
+# Django modules
+from django.core.paginator import Paginator
+from django.db.models import QuerySet
+from django.http import HttpRequest, HttpResponse
+
+# Project modules
+from .pagination import CURSOR_VAR, EstimatedCountPaginator
+
+
+class LargeTableAdminMixin:
+    """
+    Changelist settings for tables too big to count or OFFSET through.
+
+    Counts come from the planner's estimate, the unfiltered total is
+    never counted, and while the list is in its default order pages are
+    navigated with a cursor on keyset_ordering, which must be backed by
+    an index.
+    """
+
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    keyset_ordering: tuple[str, ...] = ("-created_at", "-id")
+
+    def changelist_view(
+        self, request: HttpRequest, extra_context: Optional[dict] = None
+    ) -> HttpResponse:
+        # The cursor is not a field lookup: keep it out of the filters
+        request.keyset_cursor = request.GET.get(CURSOR_VAR) or None
+        if CURSOR_VAR in request.GET:
+            request.GET = request.GET.copy()
+            del request.GET[CURSOR_VAR]
+        return super().changelist_view(request, extra_context)
+
+    def get_paginator(
+        self,
+        request: HttpRequest,
+        queryset: QuerySet,
+        per_page: int,
+        orphans: int = 0,
+        allow_empty_first_page: bool = True,
+    ) -> Paginator:
+        # The changelist may repeat fields of the ordering
+        ordering: list[str] = list(dict.fromkeys(
+            "-id" if name == "-pk" else "id" if name == "pk" else name
+            for name in queryset.query.order_by
+        ))
+        keyset: bool = ordering == list(self.keyset_ordering)
+        return self.paginator(
+            queryset,
+            per_page,
+            orphans,
+            allow_empty_first_page,
+            cursor=getattr(request, "keyset_cursor", None) if keyset else None,
+            keyset_ordering=self.keyset_ordering if keyset else None,
+        )
@@ -0,0 +1,11 @@
+# Django modules
+from django.apps import AppConfig
+
+
+class CoreConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'apps.core'
+
+    def ready(self):
+        """Connect the core signal receivers and register the checks."""
+        from . import checks, signals  # noqa: F401
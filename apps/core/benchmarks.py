@@ -0,0 +1,245 @@
+# Python modules
+from random import Random
+from statistics import median, quantiles
+from time import perf_counter
+from typing import Any, Callable, Optional
+
+# Django modules
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+from django.db.models import Avg, Count
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+# Project modules
+from apps.orders.models import CartItem, Order, Review
+from apps.products.cache import get_cache
+from apps.products.models import Product, ProductRatingStats
+from apps.users.management.commands.generatedata import STEPS, PkSampler
+
+
+# Rows of each model per dataset size, as generatedata options
+DATASETS = {
+    size: {
+        "users": max(rows // 10, 10),
+        "categories": max(rows // 1000, 10),
+        "products": rows,
+        "cart_items": rows,
+        "orders": rows,
+        "order_items": rows * 2,
+        "reviews": rows,
+    }
+    for size, rows in (("1k", 1_000), ("100k", 100_000), ("1m", 1_000_000))
+}
+
+CART_SIZE = 10
+ORDER_FIELDS = {
+    "phone_number": "+77011234567",
+    "delivery_city": "Almaty",
+    "delivery_pickup_point": "Pickup 1",
+}
+
+
+class BenchmarkContext:
+    """Shared state of a suite run: random rows and a staff client."""
+
+    def __init__(self, rng: Random) -> None:
+        self.rng = rng
+        self.products = PkSampler(Product.objects.all(), rng)
+        self.users = PkSampler(get_user_model().objects.all(), rng)
+        self.admin = get_user_model().objects.create_superuser(
+            email="benchmark-admin@example.com",
+            username="benchmark-admin",
+            password=None,
+        )
+        self.client = Client(HTTP_HOST="localhost")
+        self.client.force_login(self.admin)
+
+    def product_id(self) -> int:
+        return self.products.sample(1)[0]
+
+    def user_id(self) -> int:
+        return self.users.sample(1)[0]
+
+
+# name -> (setup returning the timed operation, query budget)
+BENCHMARKS: dict[str, tuple[Callable, int]] = {}
+
+
+def benchmark(name: str, budget: int) -> Callable:
+    """
+    Registers a benchmark: a function doing the untimed setup of one
+    run and returning the operation to time. budget is the number of
+    queries the operation may run.
+    """
+    def register(setup: Callable) -> Callable:
+        BENCHMARKS[name] = (setup, budget)
+        return setup
+
+    return register
+
+
+def get(context: BenchmarkContext, url: str) -> Callable[[], Any]:
+    def request() -> None:
+        response = context.client.get(url)
+        if response.status_code != 200:
+            raise AssertionError(f"GET {url}: {response.status_code}")
+
+    return request
+
+
+@benchmark("cart_totals", budget=1)
+def cart_totals(context: BenchmarkContext) -> Callable[[], Any]:
+    cart = CartItem.objects.filter(user_id=context.user_id())
+    return cart.cart_summary
+
+
+@benchmark("checkout", budget=8)
+def checkout(context: BenchmarkContext) -> Callable[[], Any]:
+    user = get_user_model().objects.get(pk=context.user_id())
+    CartItem.objects.filter(user=user).delete()
+    CartItem.objects.set_quantities(
+        user, dict.fromkeys(context.products.sample(CART_SIZE), 1)
+    )
+    return lambda: Order.objects.create_from_cart(user, **ORDER_FIELDS)
+
+
+@benchmark("cart_add_many", budget=4)
+def cart_add_many(context: BenchmarkContext) -> Callable[[], Any]:
+    user = get_user_model().objects.get(pk=context.user_id())
+    quantities = dict.fromkeys(context.products.sample(CART_SIZE), 1)
+    return lambda: CartItem.objects.add_many(user, quantities)
+
+
+@benchmark("product_list", budget=1)
+def product_list(context: BenchmarkContext) -> Callable[[], Any]:
+    get_cache().clear()
+    return get(context, reverse("product-list") + "?page_size=50")
+
+
+@benchmark("product_detail", budget=1)
+def product_detail(context: BenchmarkContext) -> Callable[[], Any]:
+    get_cache().clear()
+    return get(
+        context, reverse("product-detail", args=[context.product_id()])
+    )
+
+
+@benchmark("review_aggregation", budget=2)
+def review_aggregation(context: BenchmarkContext) -> Callable[[], Any]:
+    product_id: int = context.product_id()
+
+    def aggregate() -> None:
+        Review.objects.filter(product_id=product_id).aggregate(
+            average=Avg("rate"), count=Count("id")
+        )
+        list(ProductRatingStats.objects.order_by("-rating_avg")[:20])
+
+    return aggregate
+
+
+def admin_changelist(name: str, model: str, budget: int) -> None:
+    @benchmark(f"admin_{model}_changelist", budget=budget)
+    def changelist(context: BenchmarkContext) -> Callable[[], Any]:
+        return get(context, reverse(f"admin:{name}_{model}_changelist"))
+
+
+admin_changelist("products", "product", budget=8)
+admin_changelist("orders", "order", budget=6)
+admin_changelist("orders", "orderitem", budget=7)
+admin_changelist("orders", "review", budget=6)
+
+
+def measure(
+    setup: Callable, context: BenchmarkContext, repeat: int, warmup: int
+) -> dict[str, Any]:
+    """
+    Runs a benchmark repeat times (after warmup untimed runs), each in
+    a savepoint rolled back afterwards.
+    """
+    timings: list[float] = []
+    queries: int = 0
+    for run in range(warmup + repeat):
+        with transaction.atomic():
+            operation: Callable = setup(context)
+            with CaptureQueriesContext(connection) as captured:
+                start: float = perf_counter()
+                operation()
+                elapsed: float = perf_counter() - start
+            transaction.set_rollback(True)
+        if run >= warmup:
+            timings.append(elapsed * 1000)
+            queries = max(queries, len(captured))
+    return {
+        "median_ms": round(median(timings), 3),
+        "p95_ms": round(
+            quantiles(timings, n=20)[-1] if len(timings) > 1 else timings[0],
+            3,
+        ),
+        "queries": queries,
+    }
+
+
+def dataset_counts() -> dict[str, int]:
+    return {option: model.objects.count() for option, model, _, _ in STEPS}
+
+
+def run_suite(
+    names: Optional[list[str]] = None,
+    repeat: int = 20,
+    warmup: int = 2,
+    seed: Optional[int] = None,
+) -> dict[str, Any]:
+    """
+    Runs the benchmarks against the current database. Everything they
+    write, the staff user included, is rolled back.
+    """
+    results: dict[str, Any] = {}
+    with transaction.atomic():
+        context = BenchmarkContext(Random(seed))
+        for name in names or BENCHMARKS:
+            setup, budget = BENCHMARKS[name]
+            results[name] = {
+                **measure(setup, context, repeat, warmup),
+                "budget": budget,
+            }
+        transaction.set_rollback(True)
+    return {
+        "vendor": connection.vendor,
+        "dataset": dataset_counts(),
+        "benchmarks": results,
+    }
+
+
+def compare(
+    run: dict[str, Any], baseline: dict[str, Any], tolerance: float
+) -> list[str]:
+    """
+    Regressions of a run against a baseline: a median time more than
+    tolerance (a fraction) above the baseline's, or more queries than
+    the baseline or the budget allows.
+    """
+    regressions: list[str] = []
+    for name, result in run["benchmarks"].items():
+        if result["queries"] > result["budget"]:
+            regressions.append(
+                f"{name}: {result['queries']} queries, "
+                f"over its budget of {result['budget']}"
+            )
+        before: Optional[dict] = baseline["benchmarks"].get(name)
+        if before is None:
+            continue
+        if result["queries"] > before["queries"]:
+            regressions.append(
+                f"{name}: {result['queries']} queries, "
+                f"{before['queries']} in the baseline"
+            )
+        limit: float = before["median_ms"] * (1 + tolerance)
+        if result["median_ms"] > limit:
+            regressions.append(
+                f"{name}: median {result['median_ms']:.3f} ms, "
+                f"baseline {before['median_ms']:.3f} ms "
+                f"(+{result['median_ms'] / before['median_ms'] - 1:.0%})"
+            )
+    return regressions
@@ -0,0 +1,26 @@
+# Django modules
+from django.conf import settings
+from django.core.checks import Tags, Warning, register
+from django.utils.module_loading import import_string
+
+
+@register(Tags.compatibility)
+def check_async_middleware(app_configs, **kwargs) -> list[Warning]:
+    """
+    Under ASGI a single sync-only middleware makes Django run the whole
+    stack below it, views included, in a thread for every request.
+    """
+    errors: list[Warning] = []
+    for path in settings.MIDDLEWARE:
+        middleware = import_string(path)
+        if not getattr(middleware, "async_capable", False):
+            errors.append(
+                Warning(
+                    f"{path} is sync only, so async views are served "
+                    "through a thread under ASGI.",
+                    hint="Make it async capable or remove it.",
+                    obj=path,
+                    id="core.W001",
+                )
+            )
+    return errors
@@ -0,0 +1,151 @@
+# Python modules
+import json
+from typing import Any, Optional
+
+# Django modules
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+
+# Project modules
+from apps.core.benchmarks import (
+    BENCHMARKS,
+    DATASETS,
+    compare,
+    dataset_counts,
+    run_suite,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Time the hot operations and count their queries, save the results "
+        "as a baseline or fail on regressions against one"
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "--dataset",
+            choices=list(DATASETS),
+            help=(
+                "Top the database up with generatedata to this size first "
+                "(only the missing rows are generated)."
+            ),
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=1,
+            help="Processes generating the rows of the dataset.",
+        )
+        parser.add_argument(
+            "--only",
+            action="append",
+            choices=list(BENCHMARKS),
+            default=[],
+            help="Benchmark to run (repeatable, all by default).",
+        )
+        parser.add_argument(
+            "--repeat",
+            type=int,
+            default=20,
+            help="Timed runs of each benchmark.",
+        )
+        parser.add_argument(
+            "--warmup",
+            type=int,
+            default=2,
+            help="Untimed runs of each benchmark before the timed ones.",
+        )
+        parser.add_argument(
+            "--save",
+            metavar="PATH",
+            help="Write the results to this JSON baseline file.",
+        )
+        parser.add_argument(
+            "--baseline",
+            metavar="PATH",
+            help="Fail if the results regress against this baseline file.",
+        )
+        parser.add_argument(
+            "--tolerance",
+            type=float,
+            default=0.2,
+            help=(
+                "Slowdown of a median time over the baseline's allowed "
+                "before failing, as a fraction (0.2 is 20%%)."
+            ),
+        )
+        parser.add_argument("--seed", type=int, default=None)
+
+    def seed_dataset(
+        self, size: str, seed: Optional[int], workers: int
+    ) -> None:
+        existing: dict[str, int] = dataset_counts()
+        missing: dict[str, int] = {
+            option: max(count - existing[option], 0)
+            for option, count in DATASETS[size].items()
+        }
+        if any(missing.values()):
+            call_command(
+                "generatedata",
+                seed=seed,
+                workers=workers,
+                stdout=self.stdout,
+                **missing,
+            )
+
+    def handle(self, *args: tuple[Any, ...], **kwargs: Any) -> None:
+        """Command entry point."""
+
+        if kwargs["repeat"] < 1:
+            raise CommandError("Repeat each benchmark at least once.")
+        baseline: Optional[dict] = None
+        if kwargs["baseline"]:
+            try:
+                with open(kwargs["baseline"]) as file:
+                    baseline = json.load(file)
+            except (OSError, ValueError) as error:
+                raise CommandError(f"Cannot read the baseline: {error}")
+        if kwargs["dataset"]:
+            self.seed_dataset(
+                kwargs["dataset"], kwargs["seed"], kwargs["workers"]
+            )
+
+        results: dict[str, Any] = run_suite(
+            kwargs["only"] or None,
+            kwargs["repeat"],
+            kwargs["warmup"],
+            kwargs["seed"],
+        )
+        if baseline and baseline.get("dataset") != results["dataset"]:
+            self.stderr.write(
+                self.style.WARNING(
+                    "The baseline was recorded on another dataset, "
+                    "its timings may not compare."
+                )
+            )
+        for name, result in results["benchmarks"].items():
+            before: dict = (baseline or {}).get("benchmarks", {}).get(name, {})
+            self.stdout.write(
+                f"{name:>28}: median {result['median_ms']:8.2f} ms, "
+                f"p95 {result['p95_ms']:8.2f} ms, "
+                f"{result['queries']:>2} queries (budget {result['budget']})"
+                + (
+                    f", baseline {before['median_ms']:.2f} ms"
+                    if before else ""
+                )
+            )
+
+        if kwargs["save"]:
+            with open(kwargs["save"], "w") as file:
+                json.dump(results, file, indent=2)
+            self.stdout.write(f"Saved the baseline to {kwargs['save']}.")
+
+        regressions: list[str] = compare(
+            results, baseline or {"benchmarks": {}}, kwargs["tolerance"]
+        )
+        if regressions:
+            raise CommandError(
+                "Regressions:\n" + "\n".join(regressions)
+            )
+        self.stdout.write(self.style.SUCCESS("No regressions."))
@@ -0,0 +1,244 @@
+# Python modules
+import asyncio
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from io import BytesIO
+from random import Random
+from statistics import mean, quantiles
+from time import perf_counter
+from typing import Any, Callable, Optional
+from urllib.error import HTTPError
+from urllib.request import urlopen
+
+# Django modules
+from django.core.cache import caches
+from django.core.handlers.asgi import ASGIHandler
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+
+# Project modules
+from apps.products.models import Product
+from apps.users.management.commands.generatedata import PkSampler
+
+
+HOST = "localhost"
+
+
+async def asgi_get(application: ASGIHandler, url: str) -> int:
+    """Status of a GET request sent straight to the ASGI application."""
+    path, _, query = url.partition("?")
+    scope: dict[str, Any] = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": query.encode(),
+        "root_path": "",
+        "headers": [(b"host", HOST.encode())],
+        "client": ("127.0.0.1", 0),
+        "server": (HOST, 80),
+    }
+    status: Optional[int] = None
+    requested: bool = False
+    finished = asyncio.Event()
+
+    async def receive() -> dict[str, Any]:
+        nonlocal requested
+        if not requested:
+            requested = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await finished.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message: dict[str, Any]) -> None:
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+
+    try:
+        await application(scope, receive, send)
+    finally:
+        finished.set()
+    return status
+
+
+def wsgi_get(application: WSGIHandler, url: str) -> int:
+    """Status of a GET request sent straight to the WSGI application."""
+    path, _, query = url.partition("?")
+    environ: dict[str, Any] = {
+        "REQUEST_METHOD": "GET",
+        "SCRIPT_NAME": "",
+        "PATH_INFO": path,
+        "QUERY_STRING": query,
+        "SERVER_NAME": HOST,
+        "SERVER_PORT": "80",
+        "SERVER_PROTOCOL": "HTTP/1.1",
+        "REMOTE_ADDR": "127.0.0.1",
+        "HTTP_HOST": HOST,
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": "http",
+        "wsgi.input": BytesIO(),
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": False,
+        "wsgi.run_once": False,
+    }
+    statuses: list[str] = []
+    response = application(
+        environ, lambda status, headers: statuses.append(status)
+    )
+    try:
+        for _ in response:
+            pass
+    finally:
+        response.close()
+    return int(statuses[0].split()[0])
+
+
+def http_get(base_url: str, url: str) -> int:
+    """Status of a GET request sent to a running server."""
+    try:
+        with urlopen(base_url.rstrip("/") + url) as response:
+            response.read()
+            return response.status
+    except HTTPError as error:
+        return error.code
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare requests/s and latency of the ASGI and WSGI applications "
+        "serving the same requests with the same concurrency"
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "paths",
+            nargs="*",
+            default=["/api/products/", "/api/products/{id}/"],
+            help="Paths requested in turn; {id} is a random product id.",
+        )
+        parser.add_argument(
+            "--requests",
+            type=int,
+            default=2000,
+            help="Number of requests sent to each application.",
+        )
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=8,
+            help=(
+                "Requests in flight: WSGI worker threads, or requests "
+                "awaited together by the ASGI event loop."
+            ),
+        )
+        parser.add_argument(
+            "--interface",
+            action="append",
+            choices=["asgi", "wsgi"],
+            default=[],
+            help="Application to load test (repeatable, both by default).",
+        )
+        parser.add_argument(
+            "--url",
+            action="append",
+            default=[],
+            help=(
+                "Base URL of a running server to load test instead, e.g. "
+                "uvicorn and gunicorn started with the same --workers "
+                "(repeatable)."
+            ),
+        )
+        parser.add_argument("--seed", type=int, default=None)
+
+    @staticmethod
+    async def run_asgi(urls: list[str], concurrency: int) -> list[tuple]:
+        application = ASGIHandler()
+        queue: list[str] = list(reversed(urls))
+        results: list[tuple[float, int]] = []
+
+        async def worker() -> None:
+            while queue:
+                url: str = queue.pop()
+                start: float = perf_counter()
+                status: int = await asgi_get(application, url)
+                results.append((perf_counter() - start, status))
+
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        return results
+
+    @staticmethod
+    def run_threads(
+        get: Callable[[str], int], urls: list[str], concurrency: int
+    ) -> list[tuple]:
+        def timed(url: str) -> tuple[float, int]:
+            start: float = perf_counter()
+            status: int = get(url)
+            return perf_counter() - start, status
+
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            return list(executor.map(timed, urls))
+
+    def report(
+        self, name: str, results: list[tuple[float, int]], seconds: float
+    ) -> None:
+        latencies: list[float] = [latency * 1000 for latency, _ in results]
+        percentiles: list[float] = quantiles(latencies, n=100)
+        errors: int = sum(1 for _, status in results if status >= 400)
+        self.stdout.write(
+            f"{name:>24}: {len(results) / seconds:8.1f} requests/s, "
+            f"mean {mean(latencies):.2f} ms, p50 {percentiles[49]:.2f} ms, "
+            f"p99 {percentiles[98]:.2f} ms, {errors} errors"
+        )
+
+    def handle(self, *args: tuple[Any, ...], **kwargs: Any) -> None:
+        """Command entry point."""
+
+        rng = Random(kwargs["seed"])
+        products = PkSampler(Product.objects.all(), rng)
+        if not products:
+            raise CommandError("There are no products to request.")
+        if kwargs["requests"] < 2:
+            raise CommandError("Send at least 2 requests.")
+        paths: list[str] = kwargs["paths"]
+        ids: list[int] = products.sample(kwargs["requests"])
+        urls: list[str] = [
+            paths[i % len(paths)].format(id=ids[i])
+            for i in range(kwargs["requests"])
+        ]
+        concurrency: int = kwargs["concurrency"]
+        self.stdout.write(
+            f"{len(urls)} requests over {', '.join(paths)} "
+            f"with {concurrency} in flight."
+        )
+
+        runs: dict[str, Callable[[], list[tuple]]] = {}
+        for base_url in kwargs["url"]:
+            runs[base_url] = partial(
+                self.run_threads, partial(http_get, base_url), urls, concurrency
+            )
+        if not runs:
+            interfaces: list[str] = kwargs["interface"] or ["asgi", "wsgi"]
+            if "asgi" in interfaces:
+                runs["ASGI"] = lambda: asyncio.run(
+                    self.run_asgi(urls, concurrency)
+                )
+            if "wsgi" in interfaces:
+                runs["WSGI"] = partial(
+                    self.run_threads,
+                    partial(wsgi_get, WSGIHandler()),
+                    urls,
+                    concurrency,
+                )
+
+        for name, run in runs.items():
+            # Every run starts from a cold catalog cache
+            caches["default"].clear()
+            start: float = perf_counter()
+            results: list[tuple] = run()
+            self.report(name, results, perf_counter() - start)
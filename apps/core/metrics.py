@@ -0,0 +1,168 @@
+# Python modules
+import threading
+from bisect import bisect_left
+from collections import Counter
+from contextvars import ContextVar
+from time import perf_counter
+from typing import Any, Callable, Optional
+
+
+# Upper bounds of the histogram buckets
+DURATION_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+
+class RequestMetrics:
+    """Database work and wall time of one request."""
+
+    def __init__(self) -> None:
+        self.start: float = perf_counter()
+        self.duration: float = 0.0
+        self.queries: int = 0
+        self.db_time: float = 0.0
+        self.statements: Counter = Counter()
+
+    def finish(self) -> None:
+        self.duration = perf_counter() - self.start
+
+    @property
+    def duplicate_queries(self) -> int:
+        """Queries that repeat an earlier SQL, whatever their params."""
+        return sum(count - 1 for count in self.statements.values())
+
+    def most_repeated(self) -> tuple[Optional[str], int]:
+        if not self.statements:
+            return None, 0
+        return self.statements.most_common(1)[0]
+
+
+# Metrics of the request being served, followed across sync_to_async
+current_metrics: ContextVar[Optional[RequestMetrics]] = ContextVar(
+    "current_metrics", default=None
+)
+
+
+def record_query(
+    execute: Callable, sql: str, params: Any, many: bool, context: dict
+) -> Any:
+    """
+    Database execute wrapper adding every query to the metrics of the
+    current request, if any.
+    """
+    metrics: Optional[RequestMetrics] = current_metrics.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    start: float = perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.db_time += perf_counter() - start
+        metrics.queries += 1
+        metrics.statements[sql] += 1
+
+
+class Histogram:
+    """Cumulative Prometheus histogram, one series per label value."""
+
+    def __init__(self, name: str, help_text: str, buckets: tuple) -> None:
+        self.name = name
+        self.help_text = help_text
+        self.buckets = buckets
+        # label -> [count per bucket (+Inf last), sum]
+        self.series: dict[str, list] = {}
+
+    def observe(self, label: str, value: float) -> None:
+        series: list = self.series.setdefault(
+            label, [[0] * (len(self.buckets) + 1), 0.0]
+        )
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+
+    def render(self, label_name: str) -> list[str]:
+        lines: list[str] = [
+            f"# HELP {self.name} {self.help_text}",
+            f"# TYPE {self.name} histogram",
+        ]
+        for label, (counts, total) in sorted(self.series.items()):
+            cumulative: int = 0
+            for bound, count in zip(
+                [*map(str, self.buckets), "+Inf"], counts
+            ):
+                cumulative += count
+                lines.append(
+                    f'{self.name}_bucket{{{label_name}="{label}",'
+                    f'le="{bound}"}} {cumulative}'
+                )
+            lines.append(
+                f'{self.name}_sum{{{label_name}="{label}"}} {total}'
+            )
+            lines.append(
+                f'{self.name}_count{{{label_name}="{label}"}} {cumulative}'
+            )
+        return lines
+
+
+class Registry:
+    """Request metrics of this process, by view."""
+
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        self.durations = Histogram(
+            "http_request_duration_seconds",
+            "Wall time of the requests.",
+            DURATION_BUCKETS,
+        )
+        self.db_durations = Histogram(
+            "http_request_db_duration_seconds",
+            "Database time of the requests.",
+            DURATION_BUCKETS,
+        )
+        self.query_counts = Histogram(
+            "http_request_queries",
+            "Database queries run by the requests.",
+            QUERY_COUNT_BUCKETS,
+        )
+        self.duplicates: Counter = Counter()
+        self.responses: Counter = Counter()
+
+    def observe(self, view: str, status: int, metrics: RequestMetrics) -> None:
+        with self.lock:
+            self.durations.observe(view, metrics.duration)
+            self.db_durations.observe(view, metrics.db_time)
+            self.query_counts.observe(view, metrics.queries)
+            self.duplicates[view] += metrics.duplicate_queries
+            self.responses[(view, status)] += 1
+
+    def render(self) -> str:
+        """Prometheus text exposition format (0.0.4)."""
+        with self.lock:
+            lines: list[str] = [
+                "# HELP http_responses_total Responses sent.",
+                "# TYPE http_responses_total counter",
+                *(
+                    f'http_responses_total{{view="{view}",'
+                    f'status="{status}"}} {count}'
+                    for (view, status), count in sorted(self.responses.items())
+                ),
+                "# HELP http_request_duplicate_queries_total Queries "
+                "repeating the SQL of an earlier query of their request.",
+                "# TYPE http_request_duplicate_queries_total counter",
+                *(
+                    f'http_request_duplicate_queries_total{{view="{view}"}} '
+                    f"{count}"
+                    for view, count in sorted(self.duplicates.items())
+                ),
+            ]
+            for histogram in (
+                self.durations, self.db_durations, self.query_counts
+            ):
+                lines += histogram.render("view")
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
@@ -0,0 +1,108 @@
+# Python modules
+import json
+import logging
+from typing import Any
+
+# Third party modules
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+
+# Django modules
+from django.conf import settings
+from django.http import HttpRequest, HttpResponse
+
+# Project modules
+from .metrics import RequestMetrics, current_metrics, registry
+
+
+logger = logging.getLogger("apps.core.requests")
+
+
+class RequestMetricsMiddleware:
+    """
+    Measures the wall time, query count, database time and repeated
+    queries of every request.
+
+    The queries are counted by an execute wrapper installed on every
+    database connection (see signals.install_query_recorder), which
+    finds the metrics of its request through a context variable, so
+    the queries that async views run in other threads are counted too.
+    The figures are sent back in a Server-Timing header, logged as one
+    JSON line and added to the process histograms served by /metrics.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response) -> None:
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request: HttpRequest) -> HttpResponse:
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        metrics = RequestMetrics()
+        token = current_metrics.set(metrics)
+        try:
+            response: HttpResponse = self.get_response(request)
+        finally:
+            current_metrics.reset(token)
+        return self.finish(request, response, metrics)
+
+    async def __acall__(self, request: HttpRequest) -> HttpResponse:
+        metrics = RequestMetrics()
+        token = current_metrics.set(metrics)
+        try:
+            response: HttpResponse = await self.get_response(request)
+        finally:
+            current_metrics.reset(token)
+        return self.finish(request, response, metrics)
+
+    @staticmethod
+    def view_name(request: HttpRequest) -> str:
+        match = getattr(request, "resolver_match", None)
+        return (match.view_name or match._func_path) if match else "unmatched"
+
+    def finish(
+        self,
+        request: HttpRequest,
+        response: HttpResponse,
+        metrics: RequestMetrics,
+    ) -> HttpResponse:
+        # Streamed bodies are produced after this point and not counted
+        metrics.finish()
+        view: str = self.view_name(request)
+        registry.observe(view, response.status_code, metrics)
+
+        duplicates: int = metrics.duplicate_queries
+        response["Server-Timing"] = ", ".join(
+            [
+                f'db;dur={metrics.db_time * 1000:.2f};'
+                f'desc="{metrics.queries} queries"',
+                f'dup;desc="{duplicates} duplicate queries"',
+                f"total;dur={metrics.duration * 1000:.2f}",
+            ]
+        )
+
+        sql, repeats = metrics.most_repeated()
+        # Likely an N+1: the same statement run once per row
+        repeated: bool = (
+            repeats >= settings.REQUEST_METRICS_REPEATED_QUERY_LIMIT
+        )
+        level: int = logging.WARNING if repeated else logging.INFO
+        if logger.isEnabledFor(level):
+            record: dict[str, Any] = {
+                "method": request.method,
+                "path": request.path,
+                "view": view,
+                "status": response.status_code,
+                "duration_ms": round(metrics.duration * 1000, 2),
+                "queries": metrics.queries,
+                "db_ms": round(metrics.db_time * 1000, 2),
+                "duplicate_queries": duplicates,
+            }
+            if repeated:
+                record["repeated_sql"] = sql
+                record["repeats"] = repeats
+            logger.log(level, json.dumps(record))
+        return response
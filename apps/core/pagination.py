@@ -0,0 +1,208 @@
+# Python modules
+import base64
+import binascii
+import json
+from typing import Any, Optional
+
+# Django modules
+from django.core.exceptions import ValidationError
+from django.core.paginator import InvalidPage, Page, Paginator
+from django.db import connections
+from django.db.models import Model, Q, QuerySet
+from django.utils.functional import cached_property
+
+
+CURSOR_VAR = "cursor"
+
+
+def estimate_count(queryset: QuerySet) -> Optional[int]:
+    """
+    Row count of the table of an unfiltered queryset as estimated by
+    the query planner, or None when there is no estimate.
+
+    Postgres keeps it in pg_class.reltuples (refreshed by VACUUM and
+    ANALYZE), SQLite in sqlite_stat1 once ANALYZE has run.
+    """
+    query = queryset.query
+    if query.where or query.distinct or query.is_sliced:
+        return None
+
+    connection = connections[queryset.db]
+    table: str = queryset.model._meta.db_table
+    with connection.cursor() as cursor:
+        if connection.vendor == "postgresql":
+            cursor.execute(
+                "SELECT reltuples::bigint FROM pg_class "
+                "WHERE oid = to_regclass(%s)",
+                [connection.ops.quote_name(table)],
+            )
+            row = cursor.fetchone()
+            # -1 until the table is first vacuumed or analyzed
+            return row[0] if row and row[0] >= 0 else None
+
+        if connection.vendor == "sqlite":
+            cursor.execute(
+                "SELECT 1 FROM sqlite_master "
+                "WHERE type = 'table' AND name = 'sqlite_stat1'"
+            )
+            if cursor.fetchone() is None:
+                return None
+            # The first number of a stat is the row count of its index,
+            # which is the table's unless the index is partial
+            cursor.execute(
+                "SELECT MAX(CAST(stat AS INTEGER)) FROM sqlite_stat1 "
+                "WHERE tbl = %s",
+                [table],
+            )
+            row = cursor.fetchone()
+            return row[0] if row else None
+
+    return None
+
+
+class KeysetPaginator:
+    """
+    Cursor (keyset) pagination over a unique ordering of the queryset.
+
+    A page is read with an indexed range condition on the last row of
+    the previous page instead of an OFFSET, so every page costs the
+    same no matter how deep it is. The ordering fields must all go in
+    the same direction and end with a unique field, e.g.
+    ("-created_at", "-id").
+    """
+
+    def __init__(
+        self,
+        queryset: QuerySet,
+        page_size: int,
+        ordering: tuple[str, ...] = ("-created_at", "-id"),
+    ) -> None:
+        self.queryset = queryset.order_by(*ordering)
+        self.page_size = page_size
+        self.fields = [name.lstrip("-") for name in ordering]
+        self.lookup = "lt" if ordering[0].startswith("-") else "gt"
+
+    def encode_cursor(self, obj: Model) -> str:
+        # value_to_string keeps the full precision of datetimes
+        values: list[str] = [
+            obj._meta.get_field(name).value_to_string(obj)
+            for name in self.fields
+        ]
+        return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+    def decode_cursor(self, cursor: str) -> list[Any]:
+        model = self.queryset.model
+        try:
+            values: list[Any] = json.loads(
+                base64.urlsafe_b64decode(cursor.encode())
+            )
+            if len(values) != len(self.fields):
+                raise ValueError
+            return [
+                model._meta.get_field(name).to_python(value)
+                for name, value in zip(self.fields, values)
+            ]
+        except (binascii.Error, TypeError, ValueError, ValidationError):
+            raise ValidationError("Invalid cursor.")
+
+    def after(self, values: list[Any]) -> Q:
+        """
+        Rows that come after the given ordering values.
+
+        The inclusive range term on the first field is redundant but
+        lets the database seek the index to the cursor instead of
+        scanning it from the start.
+        """
+        condition = Q()
+        for i, name in enumerate(self.fields):
+            condition |= Q(
+                **{
+                    **dict(zip(self.fields[:i], values[:i])),
+                    f"{name}__{self.lookup}": values[i],
+                }
+            )
+        seek = Q(**{f"{self.fields[0]}__{self.lookup}e": values[0]})
+        return seek & condition
+
+    def page_queryset(self, cursor: Optional[str] = None) -> QuerySet:
+        """The rows of the page, plus one telling if there is a next one."""
+        queryset: QuerySet = self.queryset
+        if cursor:
+            queryset = queryset.filter(self.after(self.decode_cursor(cursor)))
+        return queryset[:self.page_size + 1]
+
+    def split(
+        self, objects: list[Model]
+    ) -> tuple[list[Model], Optional[str]]:
+        next_cursor: Optional[str] = None
+        if len(objects) > self.page_size:
+            objects = objects[:self.page_size]
+            next_cursor = self.encode_cursor(objects[-1])
+        return objects, next_cursor
+
+    def page(
+        self, cursor: Optional[str] = None
+    ) -> tuple[list[Model], Optional[str]]:
+        """Returns the objects of the page and the cursor of the next one."""
+        return self.split(list(self.page_queryset(cursor)))
+
+    async def apage(
+        self, cursor: Optional[str] = None
+    ) -> tuple[list[Model], Optional[str]]:
+        """Async page()."""
+        return self.split(
+            [obj async for obj in self.page_queryset(cursor).aiterator()]
+        )
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator for huge tables.
+
+    Unfiltered lists take their count from the planner's estimate once
+    it is above ESTIMATE_THRESHOLD instead of running COUNT(*) over the
+    whole table. Given a keyset ordering, pages are read with
+    KeysetPaginator and navigated with a "next" cursor, so deep pages
+    cost no more than the first one; page numbers are then ignored.
+    """
+
+    ESTIMATE_THRESHOLD = 100_000
+
+    template_name: Optional[str] = "core/admin/keyset_pagination.html"
+
+    def __init__(
+        self,
+        object_list: QuerySet,
+        per_page: int,
+        orphans: int = 0,
+        allow_empty_first_page: bool = True,
+        cursor: Optional[str] = None,
+        keyset_ordering: Optional[tuple[str, ...]] = None,
+    ) -> None:
+        super().__init__(object_list, per_page, orphans, allow_empty_first_page)
+        self.cursor = cursor
+        self.keyset_ordering = keyset_ordering
+        self.next_cursor: Optional[str] = None
+        self.estimated = False
+        if keyset_ordering is None:
+            # Regular numbered pages
+            self.template_name = None
+
+    @cached_property
+    def count(self) -> int:
+        estimate: Optional[int] = estimate_count(self.object_list)
+        if estimate is not None and estimate > self.ESTIMATE_THRESHOLD:
+            self.estimated = True
+            return estimate
+        return super().count
+
+    def page(self, number: Any) -> Page:
+        if self.keyset_ordering is None:
+            return super().page(number)
+        try:
+            objects, self.next_cursor = KeysetPaginator(
+                self.object_list, self.per_page, self.keyset_ordering
+            ).page(self.cursor)
+        except ValidationError as error:
+            raise InvalidPage(error.message)
+        return self._get_page(objects, 1, self)
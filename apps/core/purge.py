@@ -0,0 +1,48 @@
+# Python modules
+from time import sleep
+from typing import Iterator
+
+# Django modules
+from django.db import transaction
+from django.db.models import Max, Min, QuerySet
+
+
+def delete_in_chunks(
+    queryset: QuerySet,
+    chunk_size: int = 10000,
+    pause: float = 0.0,
+    dry_run: bool = False,
+) -> Iterator[tuple[int, int, int]]:
+    """
+    Deletes the rows of the queryset chunk_size primary keys at a time
+    and yields (first pk, last pk + 1, rows deleted) per chunk.
+
+    Every chunk is a single DELETE ... WHERE pk >= %s AND pk < %s run
+    by _raw_delete in its own transaction: no row is loaded, no signal
+    sent and no cascade followed, so models other rows refer to are
+    refused. Sleeping pause seconds after each chunk lets the other
+    writers take the locks in between. With dry_run the rows of every
+    chunk are counted instead.
+    """
+    model = queryset.model
+    if model._meta.related_objects:
+        raise ValueError(
+            f"{model.__name__} rows are referred to by other rows: "
+            "delete them with QuerySet.delete()."
+        )
+    queryset = queryset.order_by()
+    bounds: dict = queryset.aggregate(low=Min("pk"), high=Max("pk"))
+    if bounds["low"] is None:
+        return
+    for start in range(bounds["low"], bounds["high"] + 1, chunk_size):
+        chunk: QuerySet = queryset.filter(
+            pk__gte=start, pk__lt=start + chunk_size
+        )
+        if dry_run:
+            yield start, start + chunk_size, chunk.count()
+            continue
+        with transaction.atomic(using=queryset.db):
+            rows: int = chunk._raw_delete(queryset.db)
+        yield start, start + chunk_size, rows
+        if rows and pause:
+            sleep(pause)
@@ -0,0 +1,33 @@
+# Django modules
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+# Project modules
+from .metrics import record_query
+
+
+@receiver(connection_created)
+def configure_sqlite(sender, connection, **kwargs):
+    """
+    Applies SQLITE_PRAGMAS to every new SQLite connection.
+
+    WAL lets readers run alongside the single writer, and busy_timeout
+    makes concurrent writers wait for the lock instead of failing with
+    "database is locked".
+    """
+    if connection.vendor != "sqlite":
+        return
+    with connection.cursor() as cursor:
+        for name, value in getattr(settings, "SQLITE_PRAGMAS", {}).items():
+            cursor.execute(f"PRAGMA {name} = {value}")
+
+
+@receiver(connection_created)
+def install_query_recorder(sender, connection, **kwargs):
+    """
+    Wraps the queries of every connection with the request metrics
+    recorder. The wrapper stays installed across reconnections.
+    """
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
@@ -0,0 +1,18 @@
+# Python modules
+from typing import Optional
+
+# Django modules
+from django import template
+from django.contrib.admin.views.main import ChangeList
+
+# Project modules
+from apps.core.pagination import CURSOR_VAR
+
+
+register = template.Library()
+
+
+@register.simple_tag
+def cursor_query_string(cl: ChangeList, cursor: Optional[str] = None) -> str:
+    """Changelist query string for the page at the cursor (first if None)."""
+    return cl.get_query_string({CURSOR_VAR: cursor or None})
@@ -0,0 +1,9 @@
+# Django modules
+from django.urls import path
+
+# Project modules
+from . import views
+
+urlpatterns = [
+    path("metrics", views.metrics, name="metrics"),
+]
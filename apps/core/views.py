@@ -0,0 +1,49 @@
+# Python modules
+import hmac
+from ipaddress import ip_address, ip_network
+
+# Django modules
+from django.conf import settings
+from django.http import Http404, HttpRequest, HttpResponse
+from django.views.decorators.http import require_GET
+
+# Project modules
+from .metrics import registry
+
+
+def allowed_ip(request: HttpRequest) -> bool:
+    """Whether the client address is in METRICS_ALLOWED_IPS."""
+    try:
+        address = ip_address(request.META.get("REMOTE_ADDR", ""))
+    except ValueError:
+        return False
+    return any(
+        address in ip_network(network, strict=False)
+        for network in settings.METRICS_ALLOWED_IPS
+    )
+
+
+@require_GET
+def metrics(request: HttpRequest) -> HttpResponse:
+    """
+    Request metrics of this process in the Prometheus text format.
+
+    Clients in METRICS_ALLOWED_IPS (addresses or networks, matched
+    against REMOTE_ADDR) and scrapers sending METRICS_TOKEN as a bearer
+    token are served. When neither is set, the metrics are public only
+    if METRICS_PUBLIC is, and the endpoint doesn't exist otherwise.
+    """
+    token: str = settings.METRICS_TOKEN
+    if not token and not settings.METRICS_ALLOWED_IPS:
+        if not settings.METRICS_PUBLIC:
+            raise Http404
+    elif not allowed_ip(request) and not (
+        token
+        and hmac.compare_digest(
+            request.headers.get("Authorization", ""), f"Bearer {token}"
+        )
+    ):
+        return HttpResponse(status=401 if token else 403)
+    return HttpResponse(
+        registry.render(), content_type="text/plain; version=0.0.4"
+    )
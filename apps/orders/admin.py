@@ -1,8 +1,19 @@
 # Django modules
-from django.contrib import admin
+from django.contrib import admin, messages
+from django.utils.html import format_html, format_html_join
 
 # Project modules
-from .models import Order, OrderItem, CartItem, Review
+from apps.core.admin import LargeTableAdminMixin
+from .models import (
+    STATUS_CHOICES,
+    ArchivedOrder,
+    CartItem,
+    Order,
+    OrderItem,
+    OrderStatusHistory,
+    Review,
+    StockReservation,
+)
 
 
 @admin.register(CartItem)
@@ -18,6 +29,7 @@ class CartItemAdmin(admin.ModelAdmin):
         "quantity",
         "created_at",
     )
+    list_select_related = ("user", "product")
     search_fields = ("user__email", "product__name")
     list_filter = ("quantity",)
     fieldsets = [
@@ -37,8 +49,27 @@ class CartItemAdmin(admin.ModelAdmin):
     readonly_fields = ("created_at",)
 
 
+@admin.register(StockReservation)
+class StockReservationAdmin(admin.ModelAdmin):
+    """
+    Stock reservation admin configuration class, read-only: the
+    reservations follow the carts and the sweep.
+    """
+
+    list_display = ("id", "user", "product", "quantity", "expires_at")
+    list_select_related = ("user", "product")
+    search_fields = ("user__email", "product__name")
+    ordering = ("expires_at",)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
 @admin.register(OrderItem)
-class OrderItemAdmin(admin.ModelAdmin):
+class OrderItemAdmin(LargeTableAdminMixin, admin.ModelAdmin):
     """
     Order item admin configuration class.
     """
@@ -52,7 +83,10 @@ class OrderItemAdmin(admin.ModelAdmin):
         "quantity",
         "created_at",
     )
-    search_fields = ("order", "product", "name")
+    # Order.__str__ reads the user of the order
+    list_select_related = ("order__user", "product")
+    search_fields = ("name",)
+    search_help_text = "Order or product id, or part of the item name."
     list_filter = ("quantity", "price")
     fieldsets = [
         (
@@ -76,9 +110,30 @@ class OrderItemAdmin(admin.ModelAdmin):
     ]
     readonly_fields = ("created_at",)
 
+    def get_search_results(self, request, queryset, search_term):
+        """Exact id lookups for numbers, name lookups for text."""
+        if not search_term:
+            return queryset, False
+        return queryset.search(search_term), False
+
+
+class OrderStatusHistoryInline(admin.TabularInline):
+    """
+    Order status history inline, read-only.
+    """
+
+    model = OrderStatusHistory
+    fields = ("from_status", "to_status", "changed_by", "changed_at")
+    readonly_fields = fields
+    extra = 0
+    can_delete = False
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
 
 @admin.register(Order)
-class Order(admin.ModelAdmin):
+class Order(LargeTableAdminMixin, admin.ModelAdmin):
     """
     Order admin configuration class.
     """
@@ -94,16 +149,20 @@ class Order(admin.ModelAdmin):
         "status",
         "created_at"
     )
+    list_select_related = ("user",)
     search_fields = (
-        "user__email",
-        "product__name",
-        "user__phone",
+        "phone_number",
         "delivery_city",
-        "delivery_personal_address",
         "delivery_pickup_point",
-        "status",
+        "orderitem__name",
+    )
+    search_help_text = (
+        "Order id or phone number, or the start of a city or pickup "
+        "point, or part of an item name."
     )
     list_filter = ("status", "created_at")
+    actions = ("mark_shipped", "mark_delivered")
+    inlines = (OrderStatusHistoryInline,)
     fieldsets = [
         (
             "User Information",
@@ -136,11 +195,39 @@ class Order(admin.ModelAdmin):
             },
         ),
     ]
-    readonly_fields = ("created_at",)
+    # Statuses only change through the actions (Order.objects.transition)
+    readonly_fields = ("status", "created_at")
+
+    def get_search_results(self, request, queryset, search_term):
+        """Targeted lookups instead of icontains scans over joins."""
+        if not search_term:
+            return queryset, False
+        return queryset.search(search_term), False
+
+    def transition(self, request, queryset, status):
+        moved = queryset.transition(status, changed_by=request.user)
+        skipped = queryset.count() - len(moved)
+        label = dict(STATUS_CHOICES)[status].lower()
+        self.message_user(request, f"{len(moved)} orders marked as {label}.")
+        if skipped:
+            self.message_user(
+                request,
+                f"{skipped} orders were skipped: their status doesn't "
+                f"allow it.",
+                messages.WARNING,
+            )
+
+    @admin.action(description="Mark selected orders as shipped")
+    def mark_shipped(self, request, queryset):
+        self.transition(request, queryset, "S")
+
+    @admin.action(description="Mark selected orders as delivered")
+    def mark_delivered(self, request, queryset):
+        self.transition(request, queryset, "D")
 
 
 @admin.register(Review)
-class ReviewItemAdmin(admin.ModelAdmin):
+class ReviewItemAdmin(LargeTableAdminMixin, admin.ModelAdmin):
     """
     Review admin configuration class.
     """
@@ -152,6 +239,7 @@ class ReviewItemAdmin(admin.ModelAdmin):
         "rate",
         "created_at",
     )
+    list_select_related = ("author", "product")
     search_fields = ("author__username", "product__name")
     list_filter = ("rate",)
     fieldsets = [
@@ -169,3 +257,137 @@ class ReviewItemAdmin(admin.ModelAdmin):
         ),
     ]
     readonly_fields = ("created_at",)
+
+
+class ArchivePeriodListFilter(admin.SimpleListFilter):
+    """Months of the archive, read from the period index."""
+
+    title = "period"
+    parameter_name = "period"
+
+    def lookups(self, request, model_admin):
+        periods = (
+            model_admin.get_queryset(request)
+            .order_by("-period")
+            .values_list("period", flat=True)
+            .distinct()
+        )
+        return [
+            (period.isoformat(), period.strftime("%B %Y"))
+            for period in periods
+        ]
+
+    def queryset(self, request, queryset):
+        if self.value():
+            return queryset.filter(period=self.value())
+        return queryset
+
+
+@admin.register(ArchivedOrder)
+class ArchivedOrderAdmin(LargeTableAdminMixin, admin.ModelAdmin):
+    """
+    Archived order admin configuration class, read-only: the archive
+    is only written by archiveorders and never reads the hot tables.
+    """
+
+    list_display = (
+        "id",
+        "user",
+        "phone_number",
+        "delivery_city",
+        "total_price",
+        "status",
+        "created_at",
+        "archived_at",
+    )
+    list_select_related = ("user",)
+    search_fields = ("phone_number",)
+    search_help_text = "Order id or phone number."
+    list_filter = (ArchivePeriodListFilter,)
+    fieldsets = [
+        (
+            "User Information",
+            {
+                "fields": ["user", "phone_number"],
+            },
+        ),
+        (
+            "Destination Information",
+            {
+                "fields": [
+                    "delivery_city",
+                    "delivery_pickup_point",
+                    "delivery_personal_address",
+                    "requires_couriers_delivery",
+                ],
+            },
+        ),
+        (
+            "Order Information",
+            {
+                "fields": [
+                    "status",
+                    "total_price",
+                    "items_table",
+                    "status_history_table",
+                ],
+            },
+        ),
+        (
+            "Date-Time Information",
+            {
+                "fields": ["created_at", "period", "archived_at"],
+            },
+        ),
+    ]
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+    def get_search_results(self, request, queryset, search_term):
+        """Exact order id or phone number lookups."""
+        if not search_term:
+            return queryset, False
+        return queryset.search(search_term), False
+
+    @admin.display(description="Items")
+    def items_table(self, obj):
+        return format_html(
+            "<table><tr><th>Product</th><th>Name</th><th>Price</th>"
+            "<th>Quantity</th></tr>{}</table>",
+            format_html_join(
+                "",
+                "<tr><td>{}</td><td>{}</td><td>{}</td><td>{}</td></tr>",
+                (
+                    (
+                        item["product_id"],
+                        item["name"],
+                        item["price"],
+                        item["quantity"],
+                    )
+                    for item in obj.items
+                ),
+            ),
+        )
+
+    @admin.display(description="Status history")
+    def status_history_table(self, obj):
+        statuses = dict(STATUS_CHOICES)
+        return format_html_join(
+            "",
+            "<p>{}: {} &rarr; {}</p>",
+            (
+                (
+                    change["changed_at"],
+                    statuses.get(change["from_status"]),
+                    statuses.get(change["to_status"]),
+                )
+                for change in obj.status_history
+            ),
+        )
@@ -5,3 +5,7 @@ from django.apps import AppConfig
 class OrdersConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.orders'
+
+    def ready(self):
+        """Connect the orders signal receivers."""
+        from . import signals  # noqa: F401
@@ -0,0 +1,116 @@
+# Python modules
+from datetime import datetime, timedelta
+from time import perf_counter, sleep
+from typing import Any
+
+# Django modules
+from django.apps import apps
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+from django.utils import timezone
+
+# Project modules
+from apps.orders.models import ArchivedOrder, Order
+
+
+class Command(BaseCommand):
+    help = (
+        "Move the delivered orders older than the retention, with their "
+        "items and status history, to the archive in batches"
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=settings.ORDER_ARCHIVE_DAYS,
+            help="Age in days of the delivered orders archived.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Number of orders archived per transaction.",
+        )
+        parser.add_argument(
+            "--sleep",
+            type=float,
+            default=0.1,
+            help="Seconds to wait after each batch, releasing the locks.",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Count the orders that would be archived, move nothing.",
+        )
+
+    def cutoff(self, days: int) -> datetime:
+        """
+        Orders created before the cutoff are archived. The sales rollup
+        reads the hot order items, so orders it hasn't aggregated yet
+        are kept; a day of margin covers the items created just after
+        their order.
+        """
+        cutoff: datetime = timezone.now() - timedelta(days=days)
+        if apps.is_installed("apps.analytics"):
+            from apps.analytics.models import (
+                DAILY_SALES_WATERMARK,
+                RollupWatermark,
+            )
+
+            watermark = RollupWatermark.objects.filter(
+                name=DAILY_SALES_WATERMARK
+            ).values_list("value", flat=True).first()
+            if watermark is None:
+                raise CommandError(
+                    "The sales rollup was never refreshed: run refreshsales "
+                    "before archiving the orders."
+                )
+            cutoff = min(cutoff, watermark - timedelta(days=1))
+        return cutoff
+
+    def handle(self, *args: tuple[Any, ...], **kwargs: Any) -> None:
+        """Command entry point."""
+
+        if kwargs["batch_size"] < 1:
+            raise CommandError("The batch size must be positive.")
+        if kwargs["days"] < 0:
+            raise CommandError("Retention days can't be negative.")
+        cutoff: datetime = self.cutoff(kwargs["days"])
+        if kwargs["dry_run"]:
+            count: int = Order.objects.filter(
+                status='D', created_at__lt=cutoff
+            ).count()
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"Would archive {count} orders created before "
+                    f"{cutoff:%Y-%m-%d %H:%M}."
+                )
+            )
+            return
+
+        start_time: float = perf_counter()
+        total: int = 0
+        while True:
+            order_ids: list[int] = ArchivedOrder.objects.archive(
+                cutoff, kwargs["batch_size"]
+            )
+            if not order_ids:
+                break
+            total += len(order_ids)
+            if kwargs["verbosity"] > 1:
+                self.stdout.write(
+                    f"Archived orders {order_ids[0]}-{order_ids[-1]} "
+                    f"({total} so far)"
+                )
+            if len(order_ids) < kwargs["batch_size"]:
+                break
+            if kwargs["sleep"]:
+                sleep(kwargs["sleep"])
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Archived {total} orders created before "
+                f"{cutoff:%Y-%m-%d %H:%M} in "
+                f"{perf_counter() - start_time:.2f} seconds."
+            )
+        )
@@ -0,0 +1,121 @@
+# Python modules
+from typing import Any, Callable
+from random import Random
+from statistics import mean, quantiles
+from time import perf_counter
+
+# Django modules
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+from django.db.models import Q, QuerySet
+
+# Project modules
+from apps.orders.models import Order, OrderItem
+from apps.users.management.commands.generatedata import PkSampler
+
+
+class Command(BaseCommand):
+    help = "Compare the order admin search against its old icontains lookups"
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "--queries",
+            type=int,
+            default=20,
+            help="Number of search terms of each kind to run.",
+        )
+        parser.add_argument(
+            "--limit",
+            type=int,
+            default=100,
+            help="Number of results fetched per search (one admin page).",
+        )
+        parser.add_argument(
+            "--count",
+            action="store_true",
+            help="Also count the matches, as the changelist does.",
+        )
+        parser.add_argument("--seed", type=int, default=None)
+
+    @staticmethod
+    def icontains(term: str) -> QuerySet:
+        """The lookups the order admin search used to run."""
+        return Order.objects.filter(
+            Q(user__email__icontains=term)
+            | Q(user__phone__icontains=term)
+            | Q(delivery_city__icontains=term)
+            | Q(delivery_personal_address__icontains=term)
+            | Q(delivery_pickup_point__icontains=term)
+            | Q(status__icontains=term)
+        )
+
+    def run(
+        self,
+        search: Callable[[str], QuerySet],
+        terms: list[str],
+        limit: int,
+        count: bool,
+    ) -> list[float]:
+        timings: list[float] = []
+        for term in terms:
+            start: float = perf_counter()
+            queryset: QuerySet = search(term).order_by("-created_at", "-pk")
+            list(queryset[:limit])
+            if count:
+                queryset.count()
+            timings.append((perf_counter() - start) * 1000)
+        return timings
+
+    def report(self, name: str, timings: list[float]) -> None:
+        p95: float = (
+            quantiles(timings, n=20)[-1] if len(timings) > 1 else timings[0]
+        )
+        self.stdout.write(
+            f"  {name:>9}: mean {mean(timings):.2f} ms, p95 {p95:.2f} ms"
+        )
+
+    def compare(
+        self, kind: str, terms: list[str], limit: int, count: bool
+    ) -> None:
+        self.stdout.write(f"{kind}, e.g. {terms[0]!r}:")
+        search: list[float] = self.run(
+            Order.objects.search, terms, limit, count
+        )
+        icontains: list[float] = self.run(self.icontains, terms, limit, count)
+        self.report("search", search)
+        self.report("icontains", icontains)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"  search / icontains mean time: "
+                f"{mean(search) / mean(icontains):.2f}"
+            )
+        )
+
+    def handle(self, *args: tuple[Any, ...], **kwargs: Any) -> None:
+        """Command entry point."""
+
+        rng = Random(kwargs["seed"])
+        orders = PkSampler(
+            Order.objects.all(),
+            rng,
+            fields=("pk", "phone_number", "delivery_city"),
+        )
+        items = PkSampler(OrderItem.objects.all(), rng, fields=("name",))
+        if not orders or not items:
+            raise CommandError("There are no orders to search.")
+        samples: list[tuple[int, str, str]] = orders.sample(kwargs["queries"])
+        names: list[str] = items.sample(kwargs["queries"])
+        self.stdout.write(
+            f"Running {len(samples)} searches of each kind over "
+            f"{Order.objects.count()} orders."
+        )
+
+        options: tuple[int, bool] = (kwargs["limit"], kwargs["count"])
+        self.compare("Order ids", [str(pk) for pk, _, _ in samples], *options)
+        self.compare(
+            "Phone numbers", [phone for _, phone, _ in samples], *options
+        )
+        self.compare("Cities", [city for _, _, city in samples], *options)
+        # The old search could not find orders by item name at all
+        self.compare(
+            "Item names", [name.split()[-1] for name in names], *options
+        )
@@ -0,0 +1,93 @@
+# Python modules
+from typing import Any
+from datetime import datetime
+
+# Django modules
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+
+# Project modules
+from apps.orders.exports import WRITERS, export_orders, parse_moment
+from apps.orders.models import STATUS_CHOICES
+
+
+class Command(BaseCommand):
+    help = "Export orders with their items as CSV or NDJSON"
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "--format",
+            choices=sorted(WRITERS),
+            default="csv",
+        )
+        parser.add_argument(
+            "--gzip",
+            action="store_true",
+            help="Compress the output with gzip (needs --output).",
+        )
+        parser.add_argument(
+            "--output",
+            default="-",
+            help="File to write, - for stdout.",
+        )
+        parser.add_argument(
+            "--from",
+            dest="created_from",
+            help="Export orders created from this date or datetime on.",
+        )
+        parser.add_argument(
+            "--to",
+            dest="created_to",
+            help="Export orders created before this date or datetime.",
+        )
+        parser.add_argument(
+            "--status",
+            action="append",
+            choices=[status for status, _ in STATUS_CHOICES],
+            default=[],
+            help="Export orders with this status (repeatable).",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=2000,
+            help="Number of rows fetched from the database at a time.",
+        )
+
+    def handle(self, *args: tuple[Any, ...], **kwargs: Any) -> None:
+        """Command entry point."""
+
+        start_time: datetime = datetime.now()
+        to_stdout: bool = kwargs["output"] == "-"
+        if to_stdout and kwargs["gzip"]:
+            raise CommandError("--gzip needs an --output file.")
+        try:
+            chunks = export_orders(
+                kwargs["format"],
+                kwargs["gzip"],
+                kwargs["chunk_size"],
+                created_from=parse_moment(kwargs["created_from"], "--from"),
+                created_to=parse_moment(kwargs["created_to"], "--to"),
+                statuses=kwargs["status"],
+            )
+        except ValidationError as error:
+            raise CommandError(" ".join(error.messages))
+
+        written: int = 0
+        if to_stdout:
+            # Chunks hold whole lines, so they decode on their own
+            for chunk in chunks:
+                self.stdout.write(chunk.decode(), ending="")
+                written += len(chunk)
+            self.stdout.flush()
+        else:
+            with open(kwargs["output"], "wb") as output:
+                for chunk in chunks:
+                    output.write(chunk)
+                    written += len(chunk)
+
+        # Keep stdout for the data
+        self.stderr.write(
+            f"Wrote {written} bytes in "
+            f"{(datetime.now() - start_time).total_seconds()} seconds."
+        )
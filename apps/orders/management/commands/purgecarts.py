@@ -0,0 +1,108 @@
+# Python modules
+from datetime import timedelta
+from time import perf_counter
+from typing import Any
+
+# Django modules
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+from django.db.models import QuerySet
+from django.utils import timezone
+
+# Project modules
+from apps.core.purge import delete_in_chunks
+from apps.orders.models import CartItem
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete abandoned cart lines and ownerless ones in primary key "
+        "chunks, without loading them"
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=settings.CART_RETENTION_DAYS,
+            help="Age in days of the users' cart lines deleted.",
+        )
+        parser.add_argument(
+            "--guest-days",
+            type=int,
+            default=settings.GUEST_CART_RETENTION_DAYS,
+            help="Age in days of the guest cart lines deleted.",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=10000,
+            help="Primary keys covered by each DELETE statement.",
+        )
+        parser.add_argument(
+            "--sleep",
+            type=float,
+            default=0.1,
+            help="Seconds to wait after each chunk, releasing the locks.",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Count the lines each chunk would delete, delete nothing.",
+        )
+
+    def purge(self, name: str, queryset: QuerySet, **kwargs: Any) -> int:
+        verb: str = "would delete" if kwargs["dry_run"] else "deleted"
+        start_time: float = perf_counter()
+        total: int = 0
+        for first, stop, rows in delete_in_chunks(
+            queryset,
+            kwargs["chunk_size"],
+            kwargs["sleep"],
+            kwargs["dry_run"],
+        ):
+            total += rows
+            if rows or kwargs["verbosity"] > 1:
+                self.stdout.write(
+                    f"{name}: ids {first}-{stop - 1} {verb} {rows} rows "
+                    f"({total} so far)"
+                )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{name}: {verb} {total} rows in "
+                f"{perf_counter() - start_time:.2f} seconds."
+            )
+        )
+        return total
+
+    def handle(self, *args: tuple[Any, ...], **kwargs: Any) -> None:
+        """Command entry point."""
+
+        if kwargs["chunk_size"] < 1:
+            raise CommandError("The chunk size must be positive.")
+        if min(kwargs["days"], kwargs["guest_days"]) < 0:
+            raise CommandError("Retention days can't be negative.")
+        now = timezone.now()
+        self.purge(
+            "User carts",
+            CartItem.objects.filter(
+                user__isnull=False,
+                created_at__lt=now - timedelta(days=kwargs["days"]),
+            ),
+            **kwargs,
+        )
+        self.purge(
+            "Guest carts",
+            CartItem.objects.filter(
+                guest_token__isnull=False,
+                created_at__lt=now - timedelta(days=kwargs["guest_days"]),
+            ),
+            **kwargs,
+        )
+        self.purge(
+            "Ownerless lines",
+            CartItem.objects.filter(
+                user__isnull=True, guest_token__isnull=True
+            ),
+            **kwargs,
+        )
@@ -0,0 +1,36 @@
+# Python modules
+from typing import Any
+from datetime import datetime
+
+# Django modules
+from django.core.management.base import BaseCommand, CommandParser
+
+# Project modules
+from apps.orders.models import StockReservation
+
+
+class Command(BaseCommand):
+    help = "Give the units of the expired stock reservations back to stock"
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Number of reservations released per transaction.",
+        )
+
+    def handle(self, *args: tuple[Any, ...], **kwargs: Any) -> None:
+        """Command entry point."""
+
+        start_time: datetime = datetime.now()
+        released: int = StockReservation.objects.release_expired(
+            batch_size=kwargs["batch_size"]
+        )
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Released {released} expired reservations in "
+                f"{(datetime.now() - start_time).total_seconds()} seconds."
+            )
+        )
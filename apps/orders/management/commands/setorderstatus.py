@@ -0,0 +1,83 @@
+# Python modules
+import sys
+from typing import Any, Iterator, TextIO
+from datetime import datetime
+
+# Django modules
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+
+# Project modules
+from apps.orders.models import STATUS_TRANSITIONS, Order
+
+
+class Command(BaseCommand):
+    help = "Move orders to a status; order ids are read from a file or stdin"
+    stealth_options = ("stdin",)
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "status",
+            choices=sorted(STATUS_TRANSITIONS),
+            help="New status: S (shipped) or D (delivered).",
+        )
+        parser.add_argument(
+            "--file",
+            default="-",
+            help="File of whitespace separated order ids, - for stdin.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=5000,
+            help="Number of orders moved per statement.",
+        )
+
+    @staticmethod
+    def read_ids(stream: TextIO) -> Iterator[int]:
+        for line in stream:
+            for token in line.split():
+                try:
+                    yield int(token)
+                except ValueError:
+                    raise CommandError(f"Invalid order id: {token!r}")
+
+    def batches(self, stream: TextIO, batch_size: int) -> Iterator[list[int]]:
+        batch: list[int] = []
+        for order_id in self.read_ids(stream):
+            batch.append(order_id)
+            if len(batch) == batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def handle(self, *args: tuple[Any, ...], **kwargs: Any) -> None:
+        """Command entry point."""
+
+        start_time: datetime = datetime.now()
+        stdin: TextIO = kwargs.get("stdin") or sys.stdin
+        stream: TextIO = (
+            stdin if kwargs["file"] == "-" else open(kwargs["file"])
+        )
+        requested: int = 0
+        moved: int = 0
+        try:
+            for batch in self.batches(stream, kwargs["batch_size"]):
+                requested += len(set(batch))
+                moved += len(
+                    Order.objects.filter(pk__in=batch).transition(
+                        kwargs["status"]
+                    )
+                )
+        finally:
+            if stream is not stdin:
+                stream.close()
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Moved {moved} orders to status {kwargs['status']} in "
+                f"{(datetime.now() - start_time).total_seconds()} seconds, "
+                f"skipped {requested - moved} that were missing or had a "
+                f"status that doesn't allow it."
+            )
+        )
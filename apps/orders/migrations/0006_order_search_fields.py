@@ -0,0 +1,47 @@
+# Generated by Django 5.0 on 2026-10-18 15:27
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def normalize(value):
+    return " ".join((value or "").casefold().split())
+
+
+def fill_normalized_fields(apps, schema_editor):
+    # Delivery cities and pickup points repeat a lot: update the orders
+    # once per distinct value rather than once per order
+    Order = apps.get_model("orders", "Order")
+    orders = Order.objects.using(schema_editor.connection.alias)
+    for name in ("delivery_city", "delivery_pickup_point"):
+        values = orders.order_by().values_list(name, flat=True).distinct()
+        for value in values.iterator():
+            orders.filter(**{name: value}).update(
+                **{f"{name}_normalized": normalize(value)}
+            )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0005_created_keyset_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='delivery_city_normalized',
+            field=models.CharField(db_index=True, default='', editable=False, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='delivery_pickup_point_normalized',
+            field=models.CharField(db_index=True, default='', editable=False, max_length=512),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['phone_number'], name='order_phone_idx'),
+        ),
+        migrations.RunPython(fill_normalized_fields, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 5.0 on 2026-10-18 16:33
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Min, OuterRef, Subquery, Sum
+from django.db.models.functions import Least
+
+
+def merge_duplicate_lines(apps, schema_editor):
+    # Every product keeps the first line of a cart, with the quantity of
+    # all its lines: one UPDATE and one DELETE whatever the duplicates
+    CartItem = apps.get_model("orders", "CartItem")
+    items = CartItem.objects.using(schema_editor.connection.alias)
+    lines = items.filter(user__isnull=False).order_by()
+    groups = lines.values("user_id", "product_id")
+    totals = (
+        lines.filter(
+            user_id=OuterRef("user_id"), product_id=OuterRef("product_id")
+        )
+        .values("user_id", "product_id")
+        .annotate(total=Sum("quantity"))
+        .values("total")
+    )
+    items.filter(
+        pk__in=groups.annotate(lines=Count("id"), first=Min("id"))
+        .filter(lines__gt=1)
+        .values("first")
+    ).update(quantity=Least(Subquery(totals), 32767))
+    lines.exclude(
+        pk__in=groups.annotate(first=Min("id")).values("first")
+    ).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0008_stockreservation'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cartitem',
+            name='guest_token',
+            field=models.CharField(blank=True, editable=False, max_length=64, null=True),
+        ),
+        migrations.RunPython(merge_duplicate_lines, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='cartitem',
+            constraint=models.UniqueConstraint(fields=('user', 'product'), name='cartitem_user_product_key'),
+        ),
+        migrations.AddConstraint(
+            model_name='cartitem',
+            constraint=models.UniqueConstraint(fields=('guest_token', 'product'), name='cartitem_guest_product_key'),
+        ),
+    ]
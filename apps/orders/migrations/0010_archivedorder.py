@@ -0,0 +1,40 @@
+# Generated by Django 5.0 on 2026-10-18 16:40
+
+import django.core.serializers.json
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0009_cartitem_unique_lines'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedOrder',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField()),
+                ('period', models.DateField()),
+                ('phone_number', models.CharField(max_length=20)),
+                ('delivery_city', models.CharField(max_length=64)),
+                ('delivery_pickup_point', models.CharField(max_length=512)),
+                ('delivery_personal_address', models.CharField(blank=True, max_length=512, null=True)),
+                ('requires_couriers_delivery', models.CharField(choices=[('required', 'Courier delivery required'), ('not_required', 'Pickup')], max_length=32)),
+                ('status', models.CharField(choices=[('P', 'Processing'), ('S', 'Shipped'), ('D', 'Delivered')], max_length=20)),
+                ('total_price', models.DecimalField(decimal_places=2, max_digits=14)),
+                ('items', models.JSONField(default=list, encoder=django.core.serializers.json.DjangoJSONEncoder)),
+                ('status_history', models.JSONField(default=list, encoder=django.core.serializers.json.DjangoJSONEncoder)),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ('-created_at',),
+                'indexes': [models.Index(fields=['-created_at', '-id'], name='archivedorder_created_idx'), models.Index(fields=['period', '-created_at'], name='archivedorder_period_idx'), models.Index(fields=['user', '-created_at'], name='archivedorder_user_idx')],
+            },
+        ),
+    ]
@@ -1,11 +1,20 @@
 # Python modules + Third party modules
+import re
+from collections import Counter
+from datetime import timedelta
+from decimal import Decimal
 
 # Django modules
-from django.db import models
+from django.conf import settings
+from django.db import connections, models, transaction
 from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
 from django.core.validators import RegexValidator
-from django.db.models import CheckConstraint, Q
+from django.db.models import CheckConstraint, F, Q, Sum, Value
+from django.db.models.functions import Coalesce
 from django.core.validators import MaxValueValidator, MinValueValidator
+from django.utils import timezone
 
 # Project modules
 from apps.products.models import Product
@@ -23,21 +32,267 @@ STATUS_CHOICES = [
     ('D', 'Delivered'),
 ]
 
+# Columns of the hot rows copied to an archived order
+ARCHIVED_ORDER_FIELDS = (
+    "id",
+    "user_id",
+    "created_at",
+    "phone_number",
+    "delivery_city",
+    "delivery_pickup_point",
+    "delivery_personal_address",
+    "requires_couriers_delivery",
+    "status",
+)
+ARCHIVED_ITEM_FIELDS = (
+    "id", "order_id", "product_id", "name", "price", "quantity", "created_at"
+)
+ARCHIVED_HISTORY_FIELDS = (
+    "order_id", "from_status", "to_status", "changed_by_id", "changed_at"
+)
+
+# Legal status changes: the status an order must have to move to a status
+STATUS_TRANSITIONS = {
+    'S': 'P',
+    'D': 'S',
+}
+
+
+CART_TOTAL_PRICE_FIELD = models.DecimalField(max_digits=14, decimal_places=2)
+
+# Session key of the token of a visitor's guest cart
+GUEST_CART_SESSION_KEY = "guest_cart_token"
+
+# An order id or a phone number, possibly typed with separators
+NUMERIC_SEARCH_RE = re.compile(r"^\+?[\d\s()-]+$")
+MAX_ORDER_ID = 2 ** 63 - 1
+
+
+def normalize_search_text(value):
+    """Case-folded value with collapsed whitespace, as stored for search."""
+    return " ".join((value or "").casefold().split())
+
+
+def prefix_filter(field, prefix, using="default"):
+    """
+    Q matching the values of field that start with prefix, in a way the
+    field's index can serve.
+
+    SQLite's LIKE is case-insensitive and can't use an ordinary index,
+    so there the prefix becomes a range of the (binary) index order.
+    Postgres serves LIKE 'prefix%' from the varchar_pattern_ops index
+    Django adds for db_index fields.
+    """
+    if connections[using].vendor == "sqlite":
+        upper_bound = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+        return Q(**{f"{field}__gte": prefix, f"{field}__lt": upper_bound})
+    return Q(**{f"{field}__startswith": prefix})
+
+
+def numeric_search(query):
+    """Digits of a numeric search query, or None for text queries."""
+    if not NUMERIC_SEARCH_RE.match(query):
+        return None
+    digits = re.sub(r"\D", "", query)
+    return digits or None
+
+
+def cart_owner(owner):
+    """Field and value identifying a cart: a user or a guest token."""
+    if isinstance(owner, str):
+        return "guest_token", owner
+    return "user", owner
+
+
+def add_quantities(queryset, rows, unique_fields, update_fields=()):
+    """
+    Insert rows (field attname -> value) of the queryset's model with
+    one INSERT ... ON CONFLICT DO UPDATE statement: a row conflicting
+    with a stored one on unique_fields adds its quantity to the stored
+    one and replaces its update_fields.
+    """
+    connection = connections[queryset.db]
+    quote = connection.ops.quote_name
+    meta = queryset.model._meta
+    fields = [meta.get_field(name) for name in rows[0]]
+    table = quote(meta.db_table)
+    values = "({})".format(", ".join(["%s"] * len(fields)))
+    sql = (
+        "INSERT INTO {table} ({columns}) VALUES {values} "
+        "ON CONFLICT ({conflict}) DO UPDATE SET {updates}"
+    ).format(
+        table=table,
+        columns=", ".join(quote(field.column) for field in fields),
+        values=", ".join([values] * len(rows)),
+        conflict=", ".join(
+            quote(meta.get_field(name).column) for name in unique_fields
+        ),
+        updates=", ".join([
+            "quantity = {table}.quantity + excluded.quantity".format(
+                table=table
+            ),
+            *(
+                "{column} = excluded.{column}".format(column=quote(name))
+                for name in update_fields
+            ),
+        ]),
+    )
+    params = [
+        field.get_db_prep_save(row[field.attname], connection)
+        for row in rows
+        for field in fields
+    ]
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+
 
 class CartItemQuerySet(models.QuerySet):
     """Cart Item QuerySet."""
 
+    @staticmethod
+    def summary_aggregates() -> dict:
+        """
+        Aggregates of the cart totals, shared by cart_summary(),
+        acart_summary() and cart_total_quantity(): total_price and
+        total_quantity, 0 if empty.
+        """
+        return {
+            "total_price": Coalesce(
+                Sum(
+                    F('product__price') * F('quantity'),
+                    output_field=CART_TOTAL_PRICE_FIELD,
+                ),
+                Value(Decimal('0.00')),
+                output_field=CART_TOTAL_PRICE_FIELD,
+            ),
+            "total_quantity": Coalesce(Sum('quantity'), Value(0)),
+        }
+
+    def cart_summary(self):
+        """
+        Get total price and total quantity of the cart items
+        with a single aggregate query.
+        """
+        return self.aggregate(**self.summary_aggregates())
+
+    async def acart_summary(self):
+        """Async cart_summary()."""
+        return await self.aaggregate(**self.summary_aggregates())
+
     def cart_total_price(self):
         """Get total price of user's cart items."""
-        if self:
-            return sum(cart_item.get_products_price() for cart_item in self)
-        return 0
+        return self.cart_summary()['total_price']
 
     def cart_total_quantity(self):
         """Get total quantity of items in the user's cart."""
-        if self:
-            return sum(cart_item.quantity for cart_item in self)
-        return 0
+        return self.aggregate(
+            total_quantity=self.summary_aggregates()['total_quantity']
+        )['total_quantity']
+
+    def add(self, owner, product_id, quantity=1):
+        """Add units of a product to the cart of owner (see add_many)."""
+        self.add_many(owner, {product_id: quantity})
+
+    def add_many(self, owner, quantities):
+        """
+        Add units of products (product id -> units) to the cart of
+        owner, a user or the token of a guest cart.
+
+        Every line is inserted, or has its quantity incremented, by a
+        single INSERT ... ON CONFLICT DO UPDATE whatever the number of
+        lines. The units of a user's cart are reserved first; raises
+        ValidationError when a product is short of stock.
+        """
+        quantities = {pk: n for pk, n in quantities.items() if n > 0}
+        if not quantities:
+            return
+        owner_field, _ = cart_owner(owner)
+        owner_row = (
+            {"user_id": owner.pk} if owner_field == "user"
+            else {"guest_token": owner}
+        )
+        with transaction.atomic(using=self.db):
+            if owner_field == "user":
+                StockReservation.objects.using(self.db).reserve(
+                    owner, quantities
+                )
+            now = timezone.now()
+            add_quantities(
+                self,
+                [
+                    {
+                        **owner_row,
+                        "product_id": product_id,
+                        "quantity": quantity,
+                        "created_at": now,
+                    }
+                    for product_id, quantity in quantities.items()
+                ],
+                (owner_field, "product"),
+            )
+
+    def set_quantities(self, owner, quantities):
+        """
+        Set the units of products (product id -> units) in the cart of
+        owner, a user or the token of a guest cart: one upsert for the
+        lines kept and one delete for the lines set to 0. The units held
+        for a user's cart follow; raises ValidationError when a product
+        is short of stock.
+        """
+        owner_field, owner_value = cart_owner(owner)
+        kept = {pk: n for pk, n in quantities.items() if n > 0}
+        removed = [pk for pk, n in quantities.items() if n <= 0]
+        with transaction.atomic(using=self.db):
+            if owner_field == "user":
+                StockReservation.objects.using(self.db).adjust(
+                    owner, quantities
+                )
+            if kept:
+                self.bulk_create(
+                    [
+                        CartItem(
+                            product_id=product_id,
+                            quantity=quantity,
+                            **{owner_field: owner_value},
+                        )
+                        for product_id, quantity in kept.items()
+                    ],
+                    update_conflicts=True,
+                    unique_fields=(owner_field, "product"),
+                    update_fields=("quantity",),
+                )
+            if removed:
+                self.filter(
+                    product_id__in=removed, **{owner_field: owner_value}
+                ).delete()
+
+    def remove(self, owner, product_id):
+        """Remove a product from the cart of owner (see set_quantities)."""
+        self.set_quantities(owner, {product_id: 0})
+
+    def merge_guest_cart(self, guest_token, user):
+        """
+        Move a guest cart into the user's cart, adding up the quantities
+        of the products in both, with one INSERT ... SELECT ... ON
+        CONFLICT DO UPDATE and one DELETE. The moved units are not
+        reserved: the checkout takes them if still missing.
+        """
+        connection = connections[self.db]
+        quote = connection.ops.quote_name
+        table = quote(self.model._meta.db_table)
+        sql = (
+            "INSERT INTO {table} (user_id, product_id, quantity, created_at) "
+            "SELECT %s, product_id, quantity, created_at FROM {table} "
+            "WHERE guest_token = %s "
+            "ON CONFLICT (user_id, product_id) "
+            "DO UPDATE SET quantity = {table}.quantity + excluded.quantity"
+        ).format(table=table)
+        with transaction.atomic(using=self.db):
+            with connection.cursor() as cursor:
+                cursor.execute(sql, [user.pk, guest_token])
+                merged = cursor.rowcount
+            self.filter(guest_token=guest_token).delete()
+        return merged
 
 
 class CartItem(models.Model):
@@ -55,6 +310,10 @@ class CartItem(models.Model):
         to=Product,
         on_delete=models.CASCADE,
     )
+    # Cart of a visitor not signed in, merged into the user's on login
+    guest_token = models.CharField(
+        max_length=64, blank=True, null=True, editable=False
+    )
     quantity = models.PositiveSmallIntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
 
@@ -64,9 +323,28 @@ class CartItem(models.Model):
         """Meta class."""
 
         ordering = ("-created_at",)
+        indexes = [
+            models.Index(
+                fields=["user", "-created_at"],
+                name="cartitem_user_created_idx",
+            ),
+        ]
+        # One line per product and cart, the targets of the upserts
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "product"],
+                name="cartitem_user_product_key",
+            ),
+            models.UniqueConstraint(
+                fields=["guest_token", "product"],
+                name="cartitem_guest_product_key",
+            ),
+        ]
 
     def __str__(self):
         """Magic method."""
+        if self.user_id is None:
+            return "Guest cart"
         return f"{self.user.username}'s cart"
 
     def get_products_price(self):
@@ -74,6 +352,309 @@ class CartItem(models.Model):
         return round(self.product.price * self.quantity, 2)
 
 
+class StockReservationQuerySet(models.QuerySet):
+    """Stock reservation QuerySet."""
+
+    def reserve(self, user, quantities):
+        """
+        Hold more units of products (product id -> units) for the user
+        until STOCK_RESERVATION_SECONDS from now, with one stock update
+        and one upsert. Raises ValidationError when a product is short
+        of stock; untracked products are not reserved.
+        """
+        with transaction.atomic(using=self.db, savepoint=False):
+            taken = Product.objects.using(self.db).take_stock(quantities)
+            if not taken:
+                return
+            expires_at = timezone.now() + timedelta(
+                seconds=settings.STOCK_RESERVATION_SECONDS
+            )
+            add_quantities(
+                self,
+                [
+                    {
+                        "user_id": user.pk,
+                        "product_id": product_id,
+                        "quantity": quantity,
+                        "expires_at": expires_at,
+                    }
+                    for product_id, quantity in taken.items()
+                ],
+                ("user", "product"),
+                ("expires_at",),
+            )
+
+    def adjust(self, user, quantities):
+        """
+        Make the units held for the user match quantities (product id
+        -> units): the extra units are taken off the stock and those no
+        longer wanted given back.
+        """
+        with transaction.atomic(using=self.db, savepoint=False):
+            reservations = self.filter(user=user, product_id__in=quantities)
+            held = dict(
+                reservations.select_for_update()
+                .values_list("product_id", "quantity")
+            )
+            products = Product.objects.using(self.db)
+            taken = products.take_stock({
+                product_id: quantity - held.get(product_id, 0)
+                for product_id, quantity in quantities.items()
+            })
+            products.give_stock({
+                product_id: quantity - max(quantities[product_id], 0)
+                for product_id, quantity in held.items()
+            })
+            expires_at = timezone.now() + timedelta(
+                seconds=settings.STOCK_RESERVATION_SECONDS
+            )
+            kept = [
+                StockReservation(
+                    user=user,
+                    product_id=product_id,
+                    quantity=quantity,
+                    expires_at=expires_at,
+                )
+                for product_id, quantity in quantities.items()
+                if quantity > 0 and (product_id in held or product_id in taken)
+            ]
+            if kept:
+                self.bulk_create(
+                    kept,
+                    update_conflicts=True,
+                    unique_fields=("user", "product"),
+                    update_fields=("quantity", "expires_at"),
+                )
+            reservations.filter(
+                product_id__in=[
+                    product_id for product_id, quantity in quantities.items()
+                    if quantity <= 0
+                ]
+            ).delete()
+
+    def release(self, user, product_ids=None):
+        """
+        Give the units held for the user (for product_ids only, if
+        given) back to the stock. Returns the released quantities.
+        """
+        with transaction.atomic(using=self.db):
+            reservations = self.filter(user=user)
+            if product_ids is not None:
+                reservations = reservations.filter(product_id__in=product_ids)
+            held = dict(
+                reservations.select_for_update()
+                .values_list("product_id", "quantity")
+            )
+            if held:
+                Product.objects.using(self.db).give_stock(held)
+                reservations.filter(product_id__in=held).delete()
+        return held
+
+    def claim(self, user, quantities):
+        """
+        Sell quantities (product id -> units) to the user: the units it
+        holds are used, the missing ones taken off the stock and the
+        surplus given back, then its reservations are removed.
+        """
+        reservations = self.filter(user=user)
+        held = dict(
+            reservations.select_for_update()
+            .values_list("product_id", "quantity")
+        )
+        Product.objects.using(self.db).take_stock({
+            product_id: quantity - held.get(product_id, 0)
+            for product_id, quantity in quantities.items()
+        })
+        if held:
+            Product.objects.using(self.db).give_stock({
+                product_id: quantity - quantities.get(product_id, 0)
+                for product_id, quantity in held.items()
+            })
+            reservations.filter(product_id__in=held).delete()
+
+    def release_expired(self, now=None, batch_size=1000):
+        """
+        Give the units of the expired reservations back to the stock,
+        batch_size reservations at a time: one select, one stock update
+        per kind of product and one delete per batch, each batch in its
+        own short transaction. Rows locked by a checkout are skipped.
+
+        Returns the number of reservations released.
+        """
+        now = now or timezone.now()
+        released = 0
+        while True:
+            with transaction.atomic(using=self.db):
+                batch = list(
+                    self.filter(expires_at__lte=now)
+                    .select_for_update(skip_locked=True)
+                    .order_by("expires_at")
+                    .values_list("pk", "product_id", "quantity")[:batch_size]
+                )
+                quantities = Counter()
+                for _, product_id, quantity in batch:
+                    quantities[product_id] += quantity
+                Product.objects.using(self.db).give_stock(quantities)
+                self.filter(pk__in=[pk for pk, _, _ in batch]).delete()
+            released += len(batch)
+            if len(batch) < batch_size:
+                return released
+
+
+class StockReservation(models.Model):
+    """
+    Units of a product held for a user's cart until they expire.
+    """
+
+    user = models.ForeignKey(
+        to=get_user_model(),
+        on_delete=models.CASCADE,
+    )
+    product = models.ForeignKey(
+        to=Product,
+        on_delete=models.CASCADE,
+    )
+    quantity = models.PositiveIntegerField()
+    expires_at = models.DateTimeField(db_index=True)
+
+    objects = StockReservationQuerySet().as_manager()
+
+    class Meta:
+        """Meta class."""
+
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "product"],
+                name="stockreservation_user_product_key",
+            ),
+        ]
+
+    def __str__(self):
+        """Magic str method."""
+        return f"{self.quantity} of product {self.product_id} held"
+
+
+class OrderQuerySet(models.QuerySet):
+    """Order QuerySet."""
+
+    def search(self, query):
+        """
+        Orders matching an admin search query.
+
+        A number matches an order id or a phone number exactly. Text
+        matches the start of the normalized delivery city or pickup
+        point, or any part of the name of an item of the order. Items
+        are matched with an IN subquery (a semi-join), so an order with
+        several matching items is returned once and the delivery field
+        indexes can still serve their branches of the OR.
+        """
+        query = query.strip()
+        digits = numeric_search(query)
+        if digits is not None:
+            condition = Q(phone_number__in=[digits, f"+{digits}"])
+            if int(digits) <= MAX_ORDER_ID and not query.startswith("+"):
+                condition |= Q(pk=int(digits))
+            return self.filter(condition)
+
+        text = normalize_search_text(query)
+        if not text:
+            return self
+        return self.filter(
+            prefix_filter("delivery_city_normalized", text, self.db)
+            | prefix_filter("delivery_pickup_point_normalized", text, self.db)
+            | Q(
+                pk__in=OrderItem.objects.filter(
+                    name__icontains=query
+                ).values("order_id")
+            )
+        )
+
+    def transition(self, status, changed_by=None):
+        """
+        Move the orders of the queryset to status, for orders whose
+        status allows it (STATUS_TRANSITIONS); the others are skipped.
+
+        The orders to move are locked and then changed by a single
+        UPDATE of the locked ids, and their history rows are written
+        with one bulk insert, so thousands of orders cost the same few
+        statements and an order moved concurrently is never moved twice.
+
+        Returns the ids of the moved orders.
+        """
+        if status not in STATUS_TRANSITIONS:
+            raise ValidationError(
+                f"Orders can't be moved to status {status!r}."
+            )
+        expected = STATUS_TRANSITIONS[status]
+
+        with transaction.atomic(using=self.db):
+            orders = self.filter(status=expected).order_by()
+            order_ids = list(
+                orders.select_for_update().values_list("pk", flat=True)
+            )
+            if not order_ids:
+                return []
+            self.model.objects.using(self.db).filter(
+                pk__in=order_ids
+            ).update(status=status)
+            OrderStatusHistory.objects.using(self.db).bulk_create(
+                OrderStatusHistory(
+                    order_id=order_id,
+                    from_status=expected,
+                    to_status=status,
+                    changed_by=changed_by,
+                )
+                for order_id in order_ids
+            )
+        return order_ids
+
+    def create_from_cart(self, user, **order_fields):
+        """
+        Convert the user's cart into an order inside one transaction.
+        The reserved units are sold and the missing ones taken off the
+        stock; ValidationError is raised if a product is short of stock.
+
+        The cart rows are locked and read together with the product
+        name and price in a single joined select, the order items are
+        created with one bulk insert and the cart is removed with one
+        delete statement, so the number of queries does not depend
+        on the cart size.
+        """
+        with transaction.atomic(using=self.db):
+            cart_items = CartItem.objects.using(self.db).filter(user=user)
+            lines = list(
+                cart_items
+                .select_for_update(of=("self",))
+                .order_by()
+                .values_list(
+                    "product_id",
+                    "product__name",
+                    "product__price",
+                    "quantity",
+                )
+            )
+            if not lines:
+                raise ValidationError("Cart is empty.")
+            quantities = Counter()
+            for product_id, _, _, quantity in lines:
+                quantities[product_id] += quantity
+            StockReservation.objects.using(self.db).claim(user, quantities)
+
+            order = self.create(user=user, **order_fields)
+            OrderItem.objects.using(self.db).bulk_create(
+                OrderItem(
+                    order=order,
+                    product_id=product_id,
+                    name=name,
+                    price=price,
+                    quantity=quantity,
+                )
+                for product_id, name, price, quantity in lines
+            )
+            cart_items.delete()
+        return order
+
+
 class Order(models.Model):
     """
     Order item database (table) model.
@@ -98,6 +679,13 @@ class Order(models.Model):
     )
     delivery_city = models.CharField(max_length=64)
     delivery_pickup_point = models.CharField(max_length=512)
+    # Search copies of the delivery fields (normalize_search_text)
+    delivery_city_normalized = models.CharField(
+        max_length=64, db_index=True, editable=False, default=""
+    )
+    delivery_pickup_point_normalized = models.CharField(
+        max_length=512, db_index=True, editable=False, default=""
+    )
     delivery_personal_address = models.CharField(
         max_length=512,
         null=True,
@@ -114,10 +702,33 @@ class Order(models.Model):
         default='P'
     )
 
+    objects = OrderQuerySet().as_manager()
+
     class Meta:
         """Meta class."""
 
         ordering = ("-created_at",)
+        indexes = [
+            models.Index(
+                fields=["-created_at", "-id"],
+                name="order_created_idx",
+            ),
+            models.Index(
+                fields=["user", "-created_at"],
+                name="order_user_created_idx",
+            ),
+            models.Index(
+                fields=["status", "-created_at"],
+                name="order_status_created_idx",
+            ),
+            models.Index(fields=["phone_number"], name="order_phone_idx"),
+            # Orders still being processed are a small, hot subset
+            models.Index(
+                fields=["-created_at"],
+                condition=Q(status='P'),
+                name="order_open_created_idx",
+            ),
+        ]
         # In case user chose a courier delivery, but did not provide an address
         constraints = [
             CheckConstraint(
@@ -137,6 +748,79 @@ class Order(models.Model):
         return (f"Order № {self.pk}"
                 f" User: {self.user.username}")
 
+    def save(self, *args, **kwargs):
+        """Keeps the normalized search copies of the delivery fields."""
+        self.delivery_city_normalized = normalize_search_text(
+            self.delivery_city
+        )
+        self.delivery_pickup_point_normalized = normalize_search_text(
+            self.delivery_pickup_point
+        )
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None:
+            update_fields = set(update_fields)
+            for name in ("delivery_city", "delivery_pickup_point"):
+                if name in update_fields:
+                    update_fields.add(f"{name}_normalized")
+            kwargs["update_fields"] = update_fields
+        super().save(*args, **kwargs)
+
+
+class OrderStatusHistory(models.Model):
+    """
+    Order status change database (table) model.
+    """
+
+    order = models.ForeignKey(
+        to=Order,
+        on_delete=models.CASCADE,
+        related_name="status_history",
+    )
+    from_status = models.CharField(max_length=20, choices=STATUS_CHOICES)
+    to_status = models.CharField(max_length=20, choices=STATUS_CHOICES)
+    changed_by = models.ForeignKey(
+        to=get_user_model(),
+        on_delete=models.SET_NULL,
+        blank=True,
+        null=True,
+        related_name="+",
+    )
+    changed_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        """Meta class."""
+
+        verbose_name_plural = "order status history"
+        ordering = ("-changed_at",)
+        indexes = [
+            models.Index(
+                fields=["order", "-changed_at"],
+                name="orderstatus_order_changed_idx",
+            ),
+        ]
+
+    def __str__(self):
+        """Magic str method."""
+        return (f"Order № {self.order_id}: "
+                f"{self.from_status} -> {self.to_status}")
+
+
+class OrderItemQuerySet(models.QuerySet):
+    """Order Item QuerySet."""
+
+    def search(self, query):
+        """
+        Order items matching an admin search query: a number matches
+        the order or product id, text any part of the item name.
+        """
+        query = query.strip()
+        digits = numeric_search(query)
+        if digits is not None and int(digits) <= MAX_ORDER_ID:
+            return self.filter(
+                Q(order_id=int(digits)) | Q(product_id=int(digits))
+            )
+        return self.filter(name__icontains=query)
+
 
 class OrderItem(models.Model):
     """
@@ -156,14 +840,173 @@ class OrderItem(models.Model):
     quantity = models.PositiveIntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    objects = OrderItemQuerySet().as_manager()
+
+    class Meta:
+        """Meta class."""
+
+        ordering = ("-created_at",)
+        indexes = [
+            models.Index(
+                fields=["-created_at", "-id"],
+                name="orderitem_created_idx",
+            ),
+            models.Index(
+                fields=["product", "-created_at"],
+                name="orderitem_product_created_idx",
+            ),
+        ]
+
+    def __str__(self):
+        """Magic str method."""
+        return f'Order Item from order: {self.order_id}'
+
+
+class ArchivedOrderQuerySet(models.QuerySet):
+    """Archived Order QuerySet."""
+
+    def search(self, query):
+        """
+        Archived orders matching an admin search query: a number matches
+        an order id or a phone number exactly, text matches nothing.
+        """
+        query = query.strip()
+        digits = numeric_search(query)
+        if digits is None:
+            return self.none()
+        condition = Q(phone_number__in=[digits, f"+{digits}"])
+        if int(digits) <= MAX_ORDER_ID and not query.startswith("+"):
+            condition |= Q(pk=int(digits))
+        return self.filter(condition)
+
+    def archive(self, before, batch_size=1000):
+        """
+        Moves up to batch_size delivered orders created before the
+        given moment, with their items and status history, out of the
+        hot tables into the archive, in one transaction.
+
+        The orders of the batch are read and locked together (skipping
+        rows other transactions hold) and their items and history read
+        with one query per table. The archived orders are written with
+        one bulk insert and the rows removed from the hot tables with
+        one DELETE per table, without following cascades.
+
+        Returns the ids of the archived orders.
+        """
+        db = self.db
+        with transaction.atomic(using=db):
+            orders = list(
+                Order.objects.using(db)
+                .filter(status='D', created_at__lt=before)
+                .select_for_update(skip_locked=True)
+                .order_by("pk")
+                .values(*ARCHIVED_ORDER_FIELDS)[:batch_size]
+            )
+            if not orders:
+                return []
+            order_ids = [order["id"] for order in orders]
+            items = {order_id: [] for order_id in order_ids}
+            for item in (
+                OrderItem.objects.using(db)
+                .filter(order_id__in=order_ids)
+                .order_by("pk")
+                .values(*ARCHIVED_ITEM_FIELDS)
+            ):
+                items[item.pop("order_id")].append(item)
+            history = {order_id: [] for order_id in order_ids}
+            for change in (
+                OrderStatusHistory.objects.using(db)
+                .filter(order_id__in=order_ids)
+                .order_by("changed_at", "pk")
+                .values(*ARCHIVED_HISTORY_FIELDS)
+            ):
+                history[change.pop("order_id")].append(change)
+
+            self.bulk_create(
+                self.model(
+                    **order,
+                    period=order["created_at"].date().replace(day=1),
+                    total_price=sum(
+                        (
+                            item["price"] * item["quantity"]
+                            for item in items[order["id"]]
+                        ),
+                        Decimal(0),
+                    ),
+                    items=items[order["id"]],
+                    status_history=history[order["id"]],
+                )
+                for order in orders
+            )
+            OrderStatusHistory.objects.using(db).filter(
+                order_id__in=order_ids
+            )._raw_delete(db)
+            OrderItem.objects.using(db).filter(
+                order_id__in=order_ids
+            )._raw_delete(db)
+            Order.objects.using(db).filter(pk__in=order_ids)._raw_delete(db)
+        return order_ids
+
+
+class ArchivedOrder(models.Model):
+    """
+    Delivered order moved out of the hot tables, with its items and
+    status history kept as JSON. The primary key is the original order
+    id, so an archived order is still fetched by its id.
+    """
+
+    id = models.BigIntegerField(primary_key=True, verbose_name="ID")
+    user = models.ForeignKey(
+        to=get_user_model(),
+        on_delete=models.CASCADE,
+        blank=True,
+        null=True,
+    )
+    created_at = models.DateTimeField()
+    # First day of the month of created_at: the archive partition
+    period = models.DateField()
+    phone_number = models.CharField(max_length=20)
+    delivery_city = models.CharField(max_length=64)
+    delivery_pickup_point = models.CharField(max_length=512)
+    delivery_personal_address = models.CharField(
+        max_length=512,
+        null=True,
+        blank=True
+    )
+    requires_couriers_delivery = models.CharField(
+        max_length=32,
+        choices=REQUIRES_DELIVERY_CHOICES,
+    )
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES)
+    total_price = models.DecimalField(max_digits=14, decimal_places=2)
+    items = models.JSONField(encoder=DjangoJSONEncoder, default=list)
+    status_history = models.JSONField(encoder=DjangoJSONEncoder, default=list)
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    objects = ArchivedOrderQuerySet().as_manager()
+
     class Meta:
         """Meta class."""
 
         ordering = ("-created_at",)
+        indexes = [
+            models.Index(
+                fields=["-created_at", "-id"],
+                name="archivedorder_created_idx",
+            ),
+            models.Index(
+                fields=["period", "-created_at"],
+                name="archivedorder_period_idx",
+            ),
+            models.Index(
+                fields=["user", "-created_at"],
+                name="archivedorder_user_idx",
+            ),
+        ]
 
     def __str__(self):
         """Magic str method."""
-        return f'Order Item from order: {self.order.id}'
+        return f"Archived order № {self.pk}"
 
 
 class Review(models.Model):
@@ -193,6 +1036,16 @@ class Review(models.Model):
 
         default_related_name = 'reviews'
         ordering = ('-created_at',)
+        indexes = [
+            models.Index(
+                fields=['-created_at', '-id'],
+                name='review_created_idx',
+            ),
+            models.Index(
+                fields=['product', '-created_at'],
+                name='review_product_created_idx',
+            ),
+        ]
 
     def __str__(self):
         """Magic str method."""
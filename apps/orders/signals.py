@@ -0,0 +1,64 @@
+# Django modules
+from django.contrib.auth.signals import user_logged_in
+from django.db.models import QuerySet
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+# Project modules
+from apps.products.models import ProductRatingStats
+from .models import GUEST_CART_SESSION_KEY, CartItem, Review
+
+
+@receiver(pre_save, sender=Review)
+def remember_previous_rating(sender, instance, **kwargs):
+    """Keep the stored rating of an edited review."""
+    instance._previous_rating = None
+    if instance.pk is not None:
+        instance._previous_rating = (
+            sender.objects.filter(pk=instance.pk)
+            .values_list("product_id", "rate")
+            .first()
+        )
+
+
+@receiver(post_save, sender=Review)
+def add_rating(sender, instance, created, **kwargs):
+    """Count a new or edited review in the product rating stats."""
+    previous = getattr(instance, "_previous_rating", None)
+    if previous == (instance.product_id, instance.rate):
+        return
+    if previous is not None:
+        ProductRatingStats.objects.apply_rating(*previous, delta=-1)
+    ProductRatingStats.objects.apply_rating(
+        instance.product_id, instance.rate, delta=1
+    )
+
+
+@receiver(post_delete, sender=Review)
+def remove_rating(sender, instance, **kwargs):
+    """
+    Remove a deleted review from the product rating stats, unless it
+    goes with its product (reviews are only cascaded from it), whose
+    stats are deleted too.
+    """
+    origin = kwargs.get("origin")
+    if isinstance(origin, QuerySet):
+        origin = origin.model
+    elif origin is not None:
+        origin = type(origin)
+    if origin is not None and origin is not sender:
+        return
+    ProductRatingStats.objects.apply_rating(
+        instance.product_id, instance.rate, delta=-1
+    )
+
+
+@receiver(user_logged_in)
+def merge_guest_cart(sender, request, user, **kwargs):
+    """Move the cart filled before signing in into the user's cart."""
+    session = getattr(request, "session", None)
+    if session is None:
+        return
+    guest_token = session.pop(GUEST_CART_SESSION_KEY, None)
+    if guest_token:
+        CartItem.objects.merge_guest_cart(guest_token, user)
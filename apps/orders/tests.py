@@ -1,3 +1,1081 @@
-from django.test import TestCase
+# Python modules
+import csv
+import gzip
+import json
+from collections import Counter
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+from tempfile import NamedTemporaryFile
+from math import ceil
+from unittest import skipUnless
 
-# Create your tests here.
+# Django modules
+from django.core.exceptions import ValidationError
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import RequestFactory, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+# Project modules
+from apps.analytics.models import DAILY_SALES_WATERMARK, RollupWatermark
+from apps.users.models import CustomUser
+from apps.products.models import Category, Product
+from apps.orders.models import (
+    GUEST_CART_SESSION_KEY,
+    ArchivedOrder,
+    CartItem,
+    Order,
+    OrderItem,
+    OrderStatusHistory,
+    Review,
+    StockReservation,
+    prefix_filter,
+)
+from apps.orders.exports import HEADER, export_orders
+from apps.orders.views import order_export
+
+
+class CartItemQuerySetTestCase(TestCase):
+    """Cart totals tests."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_user(
+            email="buyer@example.com", username="buyer", password="12345"
+        )
+        category = Category.objects.create(name="Books")
+        cls.products = [
+            Product.objects.create(
+                category=category,
+                seller=cls.user,
+                name=f"Product {i}",
+                price=Decimal("10.15") + i,
+            )
+            for i in range(3)
+        ]
+
+    def test_empty_cart(self):
+        with self.assertNumQueries(1):
+            summary = CartItem.objects.filter(user=self.user).cart_summary()
+        self.assertEqual(summary["total_price"], Decimal("0.00"))
+        self.assertEqual(summary["total_quantity"], 0)
+
+    def test_cart_totals_in_single_query(self):
+        CartItem.objects.bulk_create(
+            CartItem(user=self.user, product=product, quantity=i + 1)
+            for i, product in enumerate(self.products)
+        )
+        cart = CartItem.objects.filter(user=self.user)
+
+        with self.assertNumQueries(1):
+            summary = cart.cart_summary()
+
+        # 10.15 * 1 + 11.15 * 2 + 12.15 * 3
+        self.assertEqual(summary["total_price"], Decimal("68.90"))
+        self.assertEqual(summary["total_quantity"], 6)
+        self.assertEqual(cart.cart_total_price(), Decimal("68.90"))
+        self.assertEqual(cart.cart_total_quantity(), 6)
+
+    async def test_cart_endpoint(self):
+        url = reverse("cart")
+        response = await self.async_client.get(url)
+        self.assertEqual(response.status_code, 401)
+
+        await CartItem.objects.abulk_create(
+            CartItem(user=self.user, product=product, quantity=i + 1)
+            for i, product in enumerate(self.products)
+        )
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.get(url)
+        data = response.json()
+        self.assertEqual(data["count"], 3)
+        self.assertEqual(data["total_price"], "68.90")
+        self.assertEqual(data["total_quantity"], 6)
+        self.assertEqual(
+            [item["product"]["id"] for item in data["items"]],
+            [product.id for product in reversed(self.products)],
+        )
+        self.assertEqual(data["items"][0]["subtotal"], "36.45")
+
+
+class CreateOrderFromCartTestCase(TestCase):
+    """Checkout tests."""
+
+    ORDER_FIELDS = {
+        "phone_number": "+77011234567",
+        "delivery_city": "Almaty",
+        "delivery_pickup_point": "Pickup 1",
+    }
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_user(
+            email="buyer@example.com", username="buyer", password="12345"
+        )
+        category = Category.objects.create(name="Books")
+        cls.products = Product.objects.bulk_create(
+            Product(
+                category=category,
+                seller=cls.user,
+                name=f"Product {i}",
+                price=Decimal("9.99"),
+            )
+            for i in range(1000)
+        )
+
+    def fill_cart(self, size):
+        CartItem.objects.bulk_create(
+            CartItem(user=self.user, product=product, quantity=2)
+            for product in self.products[:size]
+        )
+
+    def test_create_order_from_cart(self):
+        self.fill_cart(3)
+
+        order = Order.objects.create_from_cart(self.user, **self.ORDER_FIELDS)
+
+        self.assertEqual(order.user, self.user)
+        self.assertEqual(order.delivery_city, "Almaty")
+        self.assertFalse(CartItem.objects.filter(user=self.user).exists())
+        items = OrderItem.objects.filter(order=order)
+        self.assertEqual(items.count(), 3)
+        self.assertEqual(
+            set(items.values_list("name", "price", "quantity")),
+            {
+                (product.name, Decimal("9.99"), 2)
+                for product in self.products[:3]
+            },
+        )
+
+    def test_empty_cart(self):
+        with self.assertRaises(ValidationError):
+            Order.objects.create_from_cart(self.user, **self.ORDER_FIELDS)
+        self.assertFalse(Order.objects.exists())
+
+    def test_query_count_does_not_grow_with_cart_size(self):
+        fields = ("order", "product", "name", "price", "quantity", "created_at")
+        counts = {}
+        for size in (1, 10, 100, 1000):
+            self.fill_cart(size)
+            with CaptureQueriesContext(connection) as context:
+                Order.objects.create_from_cart(self.user, **self.ORDER_FIELDS)
+            # Backends with a bound on query parameters (SQLite) split
+            # the bulk insert into batches; those are the only extra
+            # statements allowed.
+            batch_size = connection.ops.bulk_batch_size(
+                [OrderItem._meta.get_field(name) for name in fields],
+                [None] * size,
+            )
+            counts[size] = len(context) - (ceil(size / batch_size) - 1)
+
+        self.assertEqual(len(set(counts.values())), 1, counts)
+
+
+@skipUnless(connection.vendor == "sqlite", "EXPLAIN QUERY PLAN is SQLite only")
+class OrderIndexesTestCase(TestCase):
+    """Query plan tests for the orders indexes."""
+
+    def assertUsesIndex(self, queryset, index_name):
+        self.assertIn(f"INDEX {index_name} ", queryset.explain())
+
+    def test_cart_items_by_user(self):
+        self.assertUsesIndex(
+            CartItem.objects.filter(user_id=1), "cartitem_user_created_idx"
+        )
+
+    def test_orders_by_user(self):
+        self.assertUsesIndex(
+            Order.objects.filter(user_id=1), "order_user_created_idx"
+        )
+
+    def test_orders_by_status(self):
+        self.assertUsesIndex(
+            Order.objects.filter(status="S"), "order_status_created_idx"
+        )
+
+    def test_open_orders(self):
+        # The ORM binds the status as a parameter, which SQLite never
+        # matches against a partial index's predicate: the open orders
+        # are served, without a sort, by the status index.
+        plan = Order.objects.filter(status="P").order_by("-created_at")
+        self.assertUsesIndex(plan, "order_status_created_idx")
+        self.assertNotIn("TEMP B-TREE", plan.explain())
+
+    def test_order_items_by_product(self):
+        self.assertUsesIndex(
+            OrderItem.objects.filter(product_id=1),
+            "orderitem_product_created_idx",
+        )
+
+    def test_reviews_by_product(self):
+        self.assertUsesIndex(
+            Review.objects.filter(product_id=1), "review_product_created_idx"
+        )
+
+
+@skipUnless(connection.vendor == "postgresql", "PostgreSQL planner")
+class OpenOrdersIndexTestCase(TestCase):
+    """The open orders are read from their partial index."""
+
+    def test_open_orders(self):
+        with connection.cursor() as cursor:
+            # The test tables are too small for an index to beat a scan
+            cursor.execute("SET LOCAL enable_seqscan = off")
+        plan = Order.objects.filter(status="P").order_by("-created_at")
+        self.assertIn("order_open_created_idx", plan.explain())
+
+
+class AdminChangelistQueriesTestCase(TestCase):
+    """Admin changelists run the same queries whatever the page size."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = CustomUser.objects.create_superuser(
+            email="admin@example.com", username="admin", password="12345"
+        )
+        cls.category = Category.objects.create(name="Books")
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+        self.rows = 0
+
+    def add_rows(self, count):
+        """Adds rows with their own user and product to every table."""
+        for i in range(self.rows, self.rows + count):
+            user = CustomUser.objects.create_user(
+                email=f"user{i}@example.com", username=f"user{i}"
+            )
+            product = Product.objects.create(
+                category=self.category, seller=user, name=f"Product {i}",
+                price=Decimal("9.99"),
+            )
+            CartItem.objects.create(user=user, product=product, quantity=1)
+            order = Order.objects.create(
+                user=user,
+                phone_number="+77011234567",
+                delivery_city="Almaty",
+                delivery_pickup_point="Pickup 1",
+            )
+            OrderItem.objects.create(
+                order=order, product=product, name=product.name,
+                price=product.price, quantity=1,
+            )
+            Review.objects.create(author=user, product=product, rate=5, text="")
+        self.rows += count
+
+    def assertBoundedQueries(self, url_name):
+        url = reverse(url_name)
+        self.add_rows(1)
+        with CaptureQueriesContext(connection) as context:
+            self.client.get(url)
+
+        self.add_rows(20)
+        with self.assertNumQueries(len(context)):
+            response = self.client.get(url)
+        self.assertEqual(len(response.context["cl"].result_list), 21)
+
+    def test_cart_item_changelist(self):
+        self.assertBoundedQueries("admin:orders_cartitem_changelist")
+
+    def test_order_changelist(self):
+        self.assertBoundedQueries("admin:orders_order_changelist")
+
+    def test_order_item_changelist(self):
+        self.assertBoundedQueries("admin:orders_orderitem_changelist")
+
+    def test_review_changelist(self):
+        self.assertBoundedQueries("admin:orders_review_changelist")
+
+
+class OrderSearchTestCase(TestCase):
+    """Order admin search tests."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = CustomUser.objects.create_superuser(
+            email="admin@example.com", username="admin", password="12345"
+        )
+        category = Category.objects.create(name="Tools")
+        cls.shovel, cls.rake = (
+            Product.objects.create(
+                category=category, seller=cls.admin, name=name, price=1
+            )
+            for name in ("Garden shovel", "Rake")
+        )
+        cls.almaty = Order.objects.create(
+            user=cls.admin,
+            phone_number="+77011234567",
+            delivery_city="  Almaty ",
+            delivery_pickup_point="Dostyk  Plaza",
+        )
+        cls.astana = Order.objects.create(
+            user=cls.admin,
+            phone_number="77017654321",
+            delivery_city="Astana",
+            delivery_pickup_point="Mega Silk Way",
+        )
+        OrderItem.objects.bulk_create(
+            OrderItem(order=cls.almaty, product=product, name=name, price=1)
+            for product, name in (
+                (cls.shovel, "Garden shovel"),
+                (cls.shovel, "Garden shovel XL"),
+                (cls.rake, "Rake"),
+            )
+        )
+
+    def search(self, query):
+        return list(Order.objects.search(query).order_by("pk"))
+
+    def test_normalized_fields(self):
+        self.assertEqual(self.almaty.delivery_city_normalized, "almaty")
+        self.assertEqual(
+            self.almaty.delivery_pickup_point_normalized, "dostyk plaza"
+        )
+
+        self.astana.delivery_city = "Nur-Sultan"
+        self.astana.save(update_fields=["delivery_city"])
+        self.astana.refresh_from_db()
+        self.assertEqual(self.astana.delivery_city_normalized, "nur-sultan")
+
+    def test_numeric_queries(self):
+        self.assertEqual(self.search(str(self.astana.pk)), [self.astana])
+        self.assertEqual(self.search("+77011234567"), [self.almaty])
+        self.assertEqual(self.search("7701 123-45-67"), [self.almaty])
+        self.assertEqual(self.search("+77017654321"), [self.astana])
+        self.assertEqual(self.search("99999999999999999999999"), [])
+
+    def test_text_queries(self):
+        self.assertEqual(self.search("alm"), [self.almaty])
+        self.assertEqual(self.search("ASTANA"), [self.astana])
+        self.assertEqual(self.search("mega silk"), [self.astana])
+        self.assertEqual(self.search("maty"), [])
+        self.assertEqual(self.search("shovel"), [self.almaty])
+
+    def test_admin_search(self):
+        self.client.force_login(self.admin)
+
+        response = self.client.get(
+            reverse("admin:orders_order_changelist"), {"q": "shovel"}
+        )
+        self.assertEqual(
+            list(response.context["cl"].result_list), [self.almaty]
+        )
+
+        response = self.client.get(
+            reverse("admin:orders_orderitem_changelist"),
+            {"q": str(self.rake.pk)},
+        )
+        self.assertEqual(
+            [item.name for item in response.context["cl"].result_list],
+            ["Rake"],
+        )
+
+    @skipUnless(connection.vendor == "sqlite", "EXPLAIN QUERY PLAN")
+    def test_prefix_queries_use_indexes(self):
+        plan = Order.objects.filter(
+            prefix_filter("delivery_city_normalized", "alm")
+        ).explain()
+        self.assertIn("delivery_city_normalized", plan)
+        self.assertIn("INDEX", plan)
+        self.assertIn(
+            "order_phone_idx",
+            Order.objects.search("+77011234567").explain(),
+        )
+
+
+class OrderStatusTransitionTestCase(TestCase):
+    """Order status transition tests."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = CustomUser.objects.create_superuser(
+            email="admin@example.com", username="admin", password="12345"
+        )
+        cls.orders = Order.objects.bulk_create(
+            Order(
+                user=cls.admin,
+                phone_number="+77011234567",
+                delivery_city="Almaty",
+                delivery_pickup_point="Pickup 1",
+                status=status,
+            )
+            for status in ["P"] * 150 + ["S"] * 10 + ["D"] * 5
+        )
+
+    def statuses(self):
+        return Counter(Order.objects.values_list("status", flat=True))
+
+    def test_transition(self):
+        moved = Order.objects.all().transition("S", changed_by=self.admin)
+
+        self.assertEqual(len(moved), 150)
+        self.assertEqual(self.statuses(), {"S": 160, "D": 5})
+        history = OrderStatusHistory.objects.all()
+        self.assertEqual(history.count(), 150)
+        self.assertEqual(
+            set(history.values_list("order_id", flat=True)), set(moved)
+        )
+        self.assertEqual(
+            set(history.values_list("from_status", "to_status", "changed_by")),
+            {("P", "S", self.admin.pk)},
+        )
+
+    def test_only_legal_transitions(self):
+        # Processing orders can't skip shipping
+        moved = Order.objects.filter(status="P").transition("D")
+
+        self.assertEqual(moved, [])
+        self.assertEqual(self.statuses(), {"P": 150, "S": 10, "D": 5})
+        with self.assertRaises(ValidationError):
+            Order.objects.all().transition("P")
+
+    def test_query_count_does_not_grow_with_orders(self):
+        ids = [order.pk for order in self.orders[:150]]
+        with CaptureQueriesContext(connection) as context:
+            Order.objects.filter(pk__in=ids[:1]).transition("S")
+        with self.assertNumQueries(len(context)):
+            Order.objects.filter(pk__in=ids[1:]).transition("S")
+        # Already shipped: nothing to update or log
+        with self.assertNumQueries(len(context) - 2):
+            Order.objects.filter(pk__in=ids).transition("S")
+
+    def test_only_the_locked_orders_are_updated(self):
+        with CaptureQueriesContext(connection) as context:
+            moved = Order.objects.filter(
+                user__email="admin@example.com"
+            ).transition("S")
+
+        update = next(
+            query["sql"] for query in context
+            if query["sql"].startswith("UPDATE")
+        )
+        self.assertEqual(len(moved), 150)
+        self.assertNotIn(CustomUser._meta.db_table, update)
+
+    def test_admin_actions(self):
+        self.client.force_login(self.admin)
+        url = reverse("admin:orders_order_changelist")
+        selected = [self.orders[0].pk, self.orders[-1].pk]
+
+        response = self.client.post(
+            url,
+            {"action": "mark_shipped", "_selected_action": selected},
+            follow=True,
+        )
+
+        self.assertEqual(
+            list(
+                Order.objects.filter(pk__in=selected)
+                .order_by("pk").values_list("status", flat=True)
+            ),
+            ["S", "D"],
+        )
+        messages = [str(message) for message in response.context["messages"]]
+        self.assertIn("1 orders marked as shipped.", messages)
+        self.assertTrue(any("1 orders were skipped" in m for m in messages))
+
+    def test_command(self):
+        ids = [order.pk for order in self.orders[150:160]]
+        out = StringIO()
+
+        call_command(
+            "setorderstatus",
+            "D",
+            "--batch-size=3",
+            stdin=StringIO("\n".join(map(str, ids)) + "\n999999\n"),
+            stdout=out,
+        )
+
+        self.assertEqual(self.statuses(), {"P": 150, "D": 15})
+        self.assertIn("Moved 10 orders", out.getvalue())
+        self.assertIn("skipped 1", out.getvalue())
+
+        with NamedTemporaryFile("w", suffix=".txt") as ids_file:
+            ids_file.write(f"{self.orders[0].pk} {self.orders[1].pk}")
+            ids_file.flush()
+            call_command(
+                "setorderstatus", "S", f"--file={ids_file.name}",
+                stdout=StringIO(),
+            )
+        self.assertEqual(self.statuses(), {"P": 148, "S": 2, "D": 15})
+
+        with self.assertRaises(CommandError):
+            call_command(
+                "setorderstatus", "S", stdin=StringIO("12 abc"),
+                stdout=StringIO(),
+            )
+
+
+class OrderExportTestCase(TestCase):
+    """Orders export tests."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = CustomUser.objects.create_superuser(
+            email="admin@example.com", username="admin", password="12345"
+        )
+        category = Category.objects.create(name="Books")
+        cls.book = Product.objects.create(
+            category=category, seller=cls.admin, name="Book", price="10.50"
+        )
+        cls.orders = []
+        for days_ago, status in ((0, "P"), (10, "S"), (40, "D")):
+            order = Order.objects.create(
+                user=cls.admin,
+                phone_number="+77011234567",
+                delivery_city="Almaty",
+                delivery_pickup_point="Pickup, 1",
+                status=status,
+            )
+            Order.objects.filter(pk=order.pk).update(
+                created_at=timezone.now() - timedelta(days=days_ago)
+            )
+            OrderItem.objects.bulk_create(
+                OrderItem(
+                    order=order, product=cls.book, name=name, price="10.50",
+                    quantity=2,
+                )
+                for name in ("Book", 'Book "2"')
+            )
+            cls.orders.append(order)
+
+    def export(self, export_format="csv", compress=False, **filters):
+        return b"".join(export_orders(export_format, compress, **filters))
+
+    def test_csv(self):
+        rows = list(csv.reader(StringIO(self.export().decode())))
+
+        self.assertEqual(tuple(rows[0]), HEADER)
+        self.assertEqual(len(rows), 7)
+        first = dict(zip(HEADER, rows[1]))
+        self.assertEqual(first["order_id"], str(self.orders[0].pk))
+        self.assertEqual(first["delivery_pickup_point"], "Pickup, 1")
+        self.assertEqual(first["customer_email"], "admin@example.com")
+        self.assertEqual(first["price"], "10.50")
+        self.assertEqual(dict(zip(HEADER, rows[2]))["name"], 'Book "2"')
+
+    def test_ndjson_gzip(self):
+        data = gzip.decompress(self.export("ndjson", compress=True))
+
+        rows = [json.loads(line) for line in data.decode().splitlines()]
+        self.assertEqual(len(rows), 6)
+        self.assertEqual(rows[0]["order_id"], self.orders[0].pk)
+        self.assertEqual(rows[0]["price"], "10.50")
+        self.assertEqual(rows[0]["quantity"], 2)
+
+    def test_filters(self):
+        def exported_orders(**filters):
+            data = self.export("ndjson", **filters).decode()
+            return {json.loads(line)["order_id"] for line in data.splitlines()}
+
+        self.assertEqual(
+            exported_orders(statuses=["S", "D"]),
+            {self.orders[1].pk, self.orders[2].pk},
+        )
+        self.assertEqual(
+            exported_orders(
+                created_from=timezone.now() - timedelta(days=20),
+                created_to=timezone.now() - timedelta(days=1),
+            ),
+            {self.orders[1].pk},
+        )
+        with self.assertRaises(ValidationError):
+            self.export(statuses=["X"])
+
+    def test_view_streams(self):
+        request = RequestFactory().get(
+            reverse("order-export"), {"format": "ndjson", "status": "P"}
+        )
+        request.user = self.admin
+
+        # Nothing is read until the response is consumed
+        with self.assertNumQueries(0):
+            response = order_export(request)
+
+        self.assertTrue(response.streaming)
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        self.assertIn(".ndjson", response["Content-Disposition"])
+        self.assertEqual(
+            len(b"".join(response.streaming_content).splitlines()), 2
+        )
+
+    async def test_view_streams_under_asgi(self):
+        await self.async_client.aforce_login(self.admin)
+
+        response = await self.async_client.get(
+            reverse("order-export"), {"format": "ndjson", "status": "P"}
+        )
+
+        self.assertTrue(response.is_async)
+        data = b"".join([chunk async for chunk in response.streaming_content])
+        self.assertEqual(len(data.splitlines()), 2)
+
+    def test_view_access_and_errors(self):
+        url = reverse("order-export")
+        self.assertEqual(self.client.get(url).status_code, 302)
+
+        self.client.force_login(self.admin)
+        response = self.client.get(url, {"created_from": "yesterday"})
+        self.assertEqual(response.status_code, 400)
+        response = self.client.get(url, {"created_from": "2024-02-30"})
+        self.assertEqual(response.status_code, 400)
+
+        response = self.client.get(url, {"gzip": "1"})
+        self.assertEqual(response["Content-Type"], "application/gzip")
+        self.assertTrue(response["Content-Disposition"].endswith('.csv.gz"'))
+        data = gzip.decompress(b"".join(response.streaming_content))
+        self.assertEqual(len(data.decode().splitlines()), 7)
+
+    def test_command(self):
+        with NamedTemporaryFile(suffix=".csv.gz") as output:
+            call_command(
+                "exportorders",
+                "--gzip",
+                f"--output={output.name}",
+                "--status=D",
+                "--chunk-size=1",
+                stderr=StringIO(),
+            )
+            with gzip.open(output.name, "rt") as exported:
+                rows = list(csv.reader(exported))
+
+        self.assertEqual(len(rows), 3)
+        self.assertEqual(rows[1][0], str(self.orders[2].pk))
+
+        stdout = StringIO()
+        call_command(
+            "exportorders", "--format=ndjson", "--status=S",
+            stdout=stdout, stderr=StringIO(),
+        )
+        rows = [json.loads(line) for line in stdout.getvalue().splitlines()]
+        self.assertEqual(
+            [row["order_id"] for row in rows], [self.orders[1].pk] * 2
+        )
+
+        with self.assertRaises(CommandError):
+            call_command("exportorders", "--gzip", stderr=StringIO())
+        with self.assertRaises(CommandError):
+            call_command("exportorders", "--from=tomorrow", stderr=StringIO())
+        with self.assertRaises(CommandError):
+            call_command(
+                "exportorders", "--to=2024-02-30T10:00", stderr=StringIO()
+            )
+
+
+class StockReservationTestCase(TestCase):
+    """Cart reservations, checkout and sweep tests."""
+
+    ORDER_FIELDS = CreateOrderFromCartTestCase.ORDER_FIELDS
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_user(
+            email="buyer@example.com", username="buyer", password="12345"
+        )
+        category = Category.objects.create(name="Books")
+        cls.book, cls.pen = (
+            Product.objects.create(
+                category=category,
+                seller=cls.user,
+                name=name,
+                price="1.00",
+                stock=stock,
+            )
+            for name, stock in (("Book", 5), ("Pen", 1))
+        )
+
+    def stock(self, product):
+        product.refresh_from_db()
+        return product.stock
+
+    def held(self):
+        return dict(
+            StockReservation.objects.filter(user=self.user)
+            .values_list("product_id", "quantity")
+        )
+
+    def test_add_to_cart_reserves(self):
+        CartItem.objects.add(self.user, self.book.pk, 2)
+        CartItem.objects.add(self.user, self.book.pk)
+        self.assertEqual(self.stock(self.book), 2)
+        self.assertEqual(self.held(), {self.book.pk: 3})
+        self.assertEqual(
+            list(
+                CartItem.objects.filter(user=self.user)
+                .values_list("quantity", flat=True)
+            ),
+            [3],
+        )
+
+        with self.assertRaises(ValidationError):
+            CartItem.objects.add(self.user, self.book.pk, 3)
+        self.assertEqual(self.stock(self.book), 2)
+        self.assertEqual(self.held(), {self.book.pk: 3})
+
+        CartItem.objects.remove(self.user, self.book.pk)
+        self.assertEqual(self.stock(self.book), 5)
+        self.assertEqual(self.held(), {})
+        self.assertFalse(CartItem.objects.filter(user=self.user).exists())
+
+    def test_checkout_claims_reservations(self):
+        CartItem.objects.add(self.user, self.book.pk, 2)
+        # A line added without a reservation takes its units at checkout
+        CartItem.objects.create(user=self.user, product=self.pen, quantity=1)
+
+        Order.objects.create_from_cart(self.user, **self.ORDER_FIELDS)
+        self.assertEqual((self.stock(self.book), self.stock(self.pen)), (3, 0))
+        self.assertEqual(self.held(), {})
+
+    def test_checkout_short_of_stock(self):
+        CartItem.objects.add(self.user, self.book.pk, 2)
+        CartItem.objects.create(user=self.user, product=self.pen, quantity=2)
+
+        with self.assertRaises(ValidationError):
+            Order.objects.create_from_cart(self.user, **self.ORDER_FIELDS)
+        self.assertFalse(Order.objects.exists())
+        self.assertEqual((self.stock(self.book), self.stock(self.pen)), (3, 1))
+        self.assertEqual(self.held(), {self.book.pk: 2})
+
+    def test_release_expired(self):
+        other = CustomUser.objects.create_user(
+            email="other@example.com", username="other"
+        )
+        CartItem.objects.add(self.user, self.book.pk, 2)
+        CartItem.objects.add(self.user, self.pen.pk)
+        CartItem.objects.add(other, self.book.pk, 1)
+        StockReservation.objects.filter(user=self.user).update(
+            expires_at=timezone.now() - timedelta(seconds=1)
+        )
+
+        out = StringIO()
+        call_command("releasereservations", batch_size=1, stdout=out)
+        self.assertIn("Released 2 expired reservations", out.getvalue())
+        self.assertEqual((self.stock(self.book), self.stock(self.pen)), (4, 1))
+        self.assertEqual(self.held(), {})
+        self.assertEqual(StockReservation.objects.get().user, other)
+
+
+class CartLinesTestCase(TestCase):
+    """Cart upserts, bulk lines and guest cart merge tests."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_user(
+            email="buyer@example.com", username="buyer", password="12345"
+        )
+        category = Category.objects.create(name="Books")
+        cls.products = Product.objects.bulk_create(
+            Product(
+                category=category,
+                seller=cls.user,
+                name=f"Product {i}",
+                price="2.00",
+            )
+            for i in range(5)
+        )
+        cls.ids = [product.pk for product in cls.products]
+
+    def lines(self, **owner):
+        return dict(
+            CartItem.objects.filter(**owner)
+            .values_list("product_id", "quantity")
+        )
+
+    def inserts(self, context):
+        return [
+            query["sql"] for query in context
+            if query["sql"].startswith("INSERT")
+        ]
+
+    def test_add_increments_the_line(self):
+        CartItem.objects.add(self.user, self.ids[0])
+        CartItem.objects.add(self.user, self.ids[0], 2)
+        self.assertEqual(self.lines(user=self.user), {self.ids[0]: 3})
+
+    def test_add_many_in_one_statement(self):
+        CartItem.objects.add(self.user, self.ids[0])
+        with CaptureQueriesContext(connection) as context:
+            CartItem.objects.add_many(
+                self.user, {pk: 2 for pk in self.ids}
+            )
+        self.assertEqual(len(self.inserts(context)), 1)
+        self.assertEqual(
+            self.lines(user=self.user),
+            {pk: 3 if pk == self.ids[0] else 2 for pk in self.ids},
+        )
+
+    def test_set_quantities(self):
+        CartItem.objects.add_many(self.user, {pk: 1 for pk in self.ids[:3]})
+        with CaptureQueriesContext(connection) as context:
+            CartItem.objects.set_quantities(
+                self.user,
+                {self.ids[0]: 0, self.ids[1]: 5, self.ids[3]: 2},
+            )
+        self.assertEqual(len(self.inserts(context)), 1)
+        self.assertEqual(
+            self.lines(user=self.user),
+            {self.ids[1]: 5, self.ids[2]: 1, self.ids[3]: 2},
+        )
+
+        CartItem.objects.remove(self.user, self.ids[1])
+        self.assertNotIn(self.ids[1], self.lines(user=self.user))
+
+    def test_set_quantities_follows_reservations(self):
+        Product.objects.set_stock(self.ids[0], 5)
+        CartItem.objects.add(self.user, self.ids[0], 2)
+        CartItem.objects.set_quantities(self.user, {self.ids[0]: 4})
+        self.assertEqual(
+            Product.objects.get(pk=self.ids[0]).stock, 1
+        )
+        self.assertEqual(
+            StockReservation.objects.get(user=self.user).quantity, 4
+        )
+        with self.assertRaises(ValidationError):
+            CartItem.objects.set_quantities(self.user, {self.ids[0]: 6})
+
+        CartItem.objects.set_quantities(self.user, {self.ids[0]: 0})
+        self.assertEqual(Product.objects.get(pk=self.ids[0]).stock, 5)
+        self.assertFalse(StockReservation.objects.exists())
+
+    def test_guest_cart_merged_on_login(self):
+        CartItem.objects.add(self.user, self.ids[0], 2)
+        CartItem.objects.add_many("guest", {self.ids[0]: 1, self.ids[1]: 4})
+        self.assertEqual(
+            self.lines(guest_token="guest"), {self.ids[0]: 1, self.ids[1]: 4}
+        )
+
+        session = self.client.session
+        session[GUEST_CART_SESSION_KEY] = "guest"
+        session.save()
+        response = self.client.get(reverse("cart"))
+        self.assertEqual(response.json()["total_quantity"], 5)
+
+        self.client.force_login(self.user)
+        self.assertEqual(
+            self.lines(user=self.user), {self.ids[0]: 3, self.ids[1]: 4}
+        )
+        self.assertFalse(CartItem.objects.filter(guest_token="guest").exists())
+        self.assertNotIn(GUEST_CART_SESSION_KEY, self.client.session)
+        self.assertEqual(
+            self.client.get(reverse("cart")).json()["total_quantity"], 7
+        )
+
+
+class PurgeCartsTestCase(TestCase):
+    """Chunked abandoned cart purge tests."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_user(
+            email="buyer@example.com", username="buyer", password="12345"
+        )
+        category = Category.objects.create(name="Books")
+        products = Product.objects.bulk_create(
+            Product(
+                category=category,
+                seller=cls.user,
+                name=f"Product {i}",
+                price="2.00",
+            )
+            for i in range(6)
+        )
+        cls.ids = [product.pk for product in products]
+
+    def setUp(self):
+        CartItem.objects.add_many(self.user, dict.fromkeys(self.ids, 1))
+        CartItem.objects.add_many("guest", dict.fromkeys(self.ids[:4], 1))
+        CartItem.objects.create(product_id=self.ids[0], quantity=1)
+        # Half of every cart is 60 days old
+        CartItem.objects.filter(product_id__in=self.ids[::2]).update(
+            created_at=timezone.now() - timedelta(days=60)
+        )
+
+    def test_dry_run(self):
+        out = StringIO()
+        call_command("purgecarts", dry_run=True, chunk_size=2, stdout=out)
+        output = out.getvalue()
+        self.assertIn("User carts: would delete 0 rows", output)
+        self.assertIn("Guest carts: would delete 2 rows", output)
+        self.assertIn("Ownerless lines: would delete 1 rows", output)
+        self.assertRegex(
+            output, r"Guest carts: ids \d+-\d+ would delete 1 rows"
+        )
+        self.assertEqual(CartItem.objects.count(), 11)
+
+    def test_purge(self):
+        out = StringIO()
+        with CaptureQueriesContext(connection) as context:
+            call_command(
+                "purgecarts", days=30, chunk_size=2, sleep=0, stdout=out
+            )
+        self.assertIn("User carts: deleted 3 rows", out.getvalue())
+        self.assertEqual(
+            set(CartItem.objects.values_list("product_id", "guest_token")),
+            {(pk, None) for pk in self.ids[1::2]}
+            | {(pk, "guest") for pk in self.ids[1:4:2]},
+        )
+        # No row is loaded: one DELETE per chunk of primary keys
+        self.assertFalse(
+            [
+                query for query in context
+                if 'FROM "orders_cartitem"' in query["sql"]
+                and query["sql"].startswith("SELECT")
+                and "MIN" not in query["sql"]
+            ]
+        )
+
+
+class ArchiveOrdersTestCase(TestCase):
+    """Delivered order archival tests."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = CustomUser.objects.create_superuser(
+            email="admin@example.com", username="admin", password="12345"
+        )
+        category = Category.objects.create(name="Books")
+        cls.product = Product.objects.create(
+            category=category, seller=cls.admin, name="Book", price="2.50"
+        )
+
+    def setUp(self):
+        self.orders = Order.objects.bulk_create(
+            Order(
+                user=self.admin,
+                phone_number="+77011234567",
+                delivery_city="Almaty",
+                delivery_pickup_point="Pickup 1",
+                status="S" if i < 4 else "P",
+            )
+            for i in range(5)
+        )
+        OrderItem.objects.bulk_create(
+            OrderItem(
+                order=order,
+                product=self.product,
+                name="Book",
+                price="2.50",
+                quantity=quantity,
+            )
+            for order in self.orders
+            for quantity in (1, 3)
+        )
+        Order.objects.filter(
+            pk__in=[order.pk for order in self.orders[:3]]
+        ).transition("D", changed_by=self.admin)
+        # Orders 0, 1 and 4 are 60 days old, only 0 and 1 are delivered
+        self.old = timezone.now() - timedelta(days=60)
+        Order.objects.filter(
+            pk__in=[self.orders[i].pk for i in (0, 1, 4)]
+        ).update(created_at=self.old)
+        RollupWatermark.objects.create(
+            name=DAILY_SALES_WATERMARK, value=timezone.now()
+        )
+
+    def test_archive(self):
+        out = StringIO()
+        call_command(
+            "archiveorders", days=30, batch_size=1, sleep=0, stdout=out
+        )
+        self.assertIn("Archived 2 orders", out.getvalue())
+
+        archived_ids = [self.orders[0].pk, self.orders[1].pk]
+        self.assertFalse(Order.objects.filter(pk__in=archived_ids).exists())
+        self.assertFalse(
+            OrderItem.objects.filter(order_id__in=archived_ids).exists()
+        )
+        self.assertFalse(
+            OrderStatusHistory.objects.filter(
+                order_id__in=archived_ids
+            ).exists()
+        )
+        self.assertEqual(Order.objects.count(), 3)
+
+        archived = ArchivedOrder.objects.get(pk=self.orders[0].pk)
+        self.assertEqual(archived.user, self.admin)
+        self.assertEqual(archived.status, "D")
+        self.assertEqual(archived.created_at, self.old)
+        self.assertEqual(archived.period, self.old.date().replace(day=1))
+        self.assertEqual(archived.total_price, Decimal("10.00"))
+        self.assertEqual(
+            [
+                (item["name"], item["price"], item["quantity"])
+                for item in archived.items
+            ],
+            [("Book", "2.50", 1), ("Book", "2.50", 3)],
+        )
+        self.assertEqual(
+            [
+                (change["from_status"], change["to_status"])
+                for change in archived.status_history
+            ],
+            [("S", "D")],
+        )
+
+    def test_batch_query_count(self):
+        before = timezone.now() - timedelta(days=30)
+        # Savepoint, 3 reads, 1 insert, 3 deletes, release
+        with self.assertNumQueries(9):
+            ids = ArchivedOrder.objects.archive(before, batch_size=10)
+        self.assertEqual(len(ids), 2)
+        with self.assertNumQueries(3):
+            self.assertEqual(
+                ArchivedOrder.objects.archive(before, batch_size=10), []
+            )
+
+    def test_dry_run(self):
+        out = StringIO()
+        call_command("archiveorders", days=30, dry_run=True, stdout=out)
+        self.assertIn("Would archive 2 orders", out.getvalue())
+        self.assertEqual(Order.objects.count(), 5)
+        self.assertFalse(ArchivedOrder.objects.exists())
+
+    def test_keeps_orders_the_rollup_has_not_read(self):
+        RollupWatermark.objects.filter(name=DAILY_SALES_WATERMARK).update(
+            value=self.old
+        )
+        call_command("archiveorders", days=0, sleep=0, stdout=StringIO())
+        self.assertFalse(ArchivedOrder.objects.exists())
+
+        RollupWatermark.objects.all().delete()
+        with self.assertRaises(CommandError):
+            call_command("archiveorders", stdout=StringIO())
+
+    def test_admin(self):
+        ArchivedOrder.objects.archive(timezone.now(), batch_size=10)
+        self.client.force_login(self.admin)
+        url = reverse("admin:orders_archivedorder_changelist")
+        order = self.orders[0]
+
+        response = self.client.get(url, {"q": str(order.pk)})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [row.pk for row in response.context["cl"].result_list],
+            [order.pk],
+        )
+        period = self.old.date().replace(day=1).isoformat()
+        response = self.client.get(url, {"period": period})
+        self.assertEqual(
+            {row.pk for row in response.context["cl"].result_list},
+            {self.orders[0].pk, self.orders[1].pk},
+        )
+
+        # Read-only, and the hot tables are never read
+        change_url = reverse(
+            "admin:orders_archivedorder_change", args=[order.pk]
+        )
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(change_url)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "<td>2.50</td>", count=2)
+        self.assertNotContains(response, 'name="_save"')
+        self.assertFalse(
+            [
+                query for query in context
+                if '"orders_order"' in query["sql"]
+                or '"orders_orderitem"' in query["sql"]
+            ]
+        )
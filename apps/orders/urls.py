@@ -0,0 +1,10 @@
+# Django modules
+from django.urls import path
+
+# Project modules
+from . import views
+
+urlpatterns = [
+    path("cart/", views.cart, name="cart"),
+    path("orders/export/", views.order_export, name="order-export"),
+]
@@ -1,3 +1,123 @@
-from django.shortcuts import render
+# Python modules
+import secrets
+from datetime import datetime
+from typing import Optional
 
-# Create your views here.
+# Third party modules
+from asgiref.sync import sync_to_async
+
+# Django modules
+from django.contrib.admin.views.decorators import staff_member_required
+from django.core.exceptions import ValidationError
+from django.core.handlers.asgi import ASGIRequest
+from django.http import (
+    HttpRequest,
+    HttpResponse,
+    JsonResponse,
+    StreamingHttpResponse,
+)
+from django.views.decorators.http import require_GET
+
+# Project modules
+from .exports import CONTENT_TYPES, aiter_chunks, export_orders, parse_moment
+from .models import GUEST_CART_SESSION_KEY, CartItem
+
+
+def guest_cart_token(
+    request: HttpRequest, create: bool = False
+) -> Optional[str]:
+    """Token of the visitor's guest cart, kept in their session."""
+    token: Optional[str] = request.session.get(GUEST_CART_SESSION_KEY)
+    if token is None and create:
+        token = request.session[GUEST_CART_SESSION_KEY] = (
+            secrets.token_urlsafe(32)
+        )
+    return token
+
+
+@require_GET
+async def cart(request: HttpRequest) -> JsonResponse:
+    """
+    Cart of the signed in user, or of the visitor's guest cart: its
+    items, newest first, and totals.
+    """
+    user = await request.auser()
+    if user.is_authenticated:
+        items = CartItem.objects.filter(user=user)
+    else:
+        guest_token = await sync_to_async(guest_cart_token)(request)
+        if guest_token is None:
+            return JsonResponse(
+                {"detail": "Authentication credentials were not provided."},
+                status=401,
+            )
+        items = CartItem.objects.filter(guest_token=guest_token)
+    rows = items.select_related("product").only(
+        "id", "quantity", "created_at",
+        "product__id", "product__name", "product__price",
+    ).order_by("-created_at", "-id")
+    summary: dict = await items.acart_summary()
+    return JsonResponse(
+        {
+            "count": await items.acount(),
+            "total_price": round(summary["total_price"], 2),
+            "total_quantity": summary["total_quantity"],
+            "items": [
+                {
+                    "id": item.id,
+                    "product": {
+                        "id": item.product.id,
+                        "name": item.product.name,
+                        "price": item.product.price,
+                    },
+                    "quantity": item.quantity,
+                    "subtotal": item.get_products_price(),
+                    "created_at": item.created_at,
+                }
+                async for item in rows.aiterator()
+            ],
+        }
+    )
+
+
+@require_GET
+@staff_member_required
+def order_export(request: HttpRequest) -> HttpResponse:
+    """
+    Streams orders with their items as CSV or NDJSON.
+
+    Query parameters: format (csv or ndjson), gzip (1 to compress),
+    created_from and created_to (dates or datetimes, the end is
+    excluded) and status (repeatable). Under ASGI the chunks are
+    handed over as an async iterator, so they are streamed too.
+    """
+    export_format: str = request.GET.get("format", "csv")
+    compress: bool = request.GET.get("gzip") in ("1", "true")
+    try:
+        chunks = export_orders(
+            export_format,
+            compress,
+            created_from=parse_moment(
+                request.GET.get("created_from"), "created_from"
+            ),
+            created_to=parse_moment(
+                request.GET.get("created_to"), "created_to"
+            ),
+            statuses=request.GET.getlist("status"),
+        )
+    except ValidationError as error:
+        return JsonResponse({"detail": " ".join(error.messages)}, status=400)
+
+    filename: str = f"orders-{datetime.now():%Y%m%d-%H%M%S}.{export_format}"
+    if compress:
+        filename += ".gz"
+    if isinstance(request, ASGIRequest):
+        chunks = aiter_chunks(chunks)
+    response = StreamingHttpResponse(
+        chunks,
+        content_type=(
+            "application/gzip" if compress else CONTENT_TYPES[export_format]
+        ),
+    )
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return response
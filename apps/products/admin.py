@@ -1,10 +1,46 @@
 # Django modules
+from django import forms
 from django.contrib import admin
+from django.contrib.auth import get_user_model
+from django.core.exceptions import PermissionDenied, ValidationError
+from django.template.response import TemplateResponse
+from django.urls import path
 
 # Project modules
+from apps.core.admin import LargeTableAdminMixin
+from .imports import READERS, guess_format, import_products
 from .models import Category, Product
 
 
+class ProductImportForm(forms.Form):
+    """Upload of a seller's products file."""
+
+    file = forms.FileField(
+        help_text=(
+            "CSV or NDJSON with the columns sku, name, description, "
+            "price and category (by name)."
+        ),
+    )
+    seller = forms.EmailField(help_text="Email of the seller owning the products.")
+    format = forms.ChoiceField(
+        choices=[("", "From the file extension")]
+        + [(name, name.upper()) for name in sorted(READERS)],
+        required=False,
+    )
+    create_categories = forms.BooleanField(
+        required=False,
+        help_text="Create the unknown categories instead of rejecting rows.",
+    )
+
+    def clean_seller(self):
+        seller = get_user_model().objects.filter(
+            email__iexact=self.cleaned_data["seller"]
+        ).first()
+        if seller is None:
+            raise ValidationError("Unknown seller.")
+        return seller
+
+
 @admin.register(Category)
 class CategoryAdmin(admin.ModelAdmin):
     """
@@ -34,19 +70,23 @@ class CategoryAdmin(admin.ModelAdmin):
 
 
 @admin.register(Product)
-class ProductAdmin(admin.ModelAdmin):
+class ProductAdmin(LargeTableAdminMixin, admin.ModelAdmin):
     """
     Product admin configuration class.
     """
 
+    change_list_template = "products/admin/product_change_list.html"
     list_display = (
         "id",
+        "sku",
         "name",
         "category",
         "seller",
         "price",
+        "stock",
         "created_at",
     )
+    list_select_related = ("category", "seller")
     search_fields = (
         "name",
         "category__name",
@@ -64,6 +104,7 @@ class ProductAdmin(admin.ModelAdmin):
             "Product Information",
             {
                 "fields": (
+                    "sku",
                     "name",
                     "description",
                     "price",
@@ -71,6 +112,16 @@ class ProductAdmin(admin.ModelAdmin):
                 ),
             },
         ),
+        (
+            "Stock",
+            {
+                "fields": (
+                    "stock",
+                    "stock_shards",
+                    "available_stock",
+                ),
+            },
+        ),
         (
             "Relations",
             {
@@ -88,4 +139,81 @@ class ProductAdmin(admin.ModelAdmin):
         ),
     ]
 
-    readonly_fields = ("created_at",)
+    readonly_fields = ("stock_shards", "available_stock", "created_at")
+
+    def get_readonly_fields(self, request, obj=None):
+        """The stock of a sharded product lives in its counter rows."""
+        readonly_fields = super().get_readonly_fields(request, obj)
+        if obj is not None and obj.stock_shards:
+            return ("stock", *readonly_fields)
+        return readonly_fields
+
+    def get_form(self, request, obj=None, **kwargs):
+        form = super().get_form(request, obj, **kwargs)
+        if "stock" in form.base_fields:
+            # The stock counts as edited against the value the form showed
+            form.base_fields["stock"].show_hidden_initial = True
+        return form
+
+    def save_model(self, request, obj, form, change):
+        """
+        Writes the stock only when it was edited, so saving a product
+        never overwrites the units sold since the form was loaded.
+        """
+        if not change:
+            return super().save_model(request, obj, form, change)
+        obj.save(update_fields=[
+            field.name for field in obj._meta.concrete_fields
+            if not field.primary_key
+            and field.name not in ("stock", "stock_shards")
+        ])
+        if "stock" in form.changed_data:
+            Product.objects.set_stock(obj.pk, obj.stock)
+
+    def get_urls(self):
+        return [
+            path(
+                "import/",
+                self.admin_site.admin_view(self.import_view),
+                name="products_product_import",
+            ),
+            *super().get_urls(),
+        ]
+
+    def import_view(self, request):
+        """Upserts the products of an uploaded file and shows the report."""
+        if not (
+            self.has_add_permission(request)
+            and self.has_change_permission(request)
+        ):
+            raise PermissionDenied
+        report = None
+        form = ProductImportForm(request.POST or None, request.FILES or None)
+        if request.method == "POST" and form.is_valid():
+            upload = form.cleaned_data["file"]
+            try:
+                report = import_products(
+                    upload,
+                    form.cleaned_data["seller"],
+                    form.cleaned_data["format"] or guess_format(upload.name),
+                    create_categories=form.cleaned_data["create_categories"],
+                )
+            except ValidationError as error:
+                form.add_error("file", error)
+        return TemplateResponse(
+            request,
+            "products/admin/import.html",
+            {
+                **self.admin_site.each_context(request),
+                "opts": self.opts,
+                "title": "Import products",
+                "form": form,
+                "report": report,
+            },
+        )
+
+    def get_search_results(self, request, queryset, search_term):
+        """Search through the full-text index instead of icontains scans."""
+        if not search_term:
+            return queryset, False
+        return queryset.search(search_term), False
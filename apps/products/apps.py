@@ -5,3 +5,7 @@ from django.apps import AppConfig
 class ProductsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.products'
+
+    def ready(self):
+        """Connect the products signal receivers."""
+        from . import signals  # noqa: F401
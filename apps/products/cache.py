@@ -0,0 +1,146 @@
+# Python modules
+import hashlib
+import threading
+import time
+from collections import Counter
+from typing import Any, Awaitable, Callable, Iterable
+
+# Django modules
+from django.conf import settings
+from django.core.cache import caches
+
+
+# Bumped when a change can show up in every catalog response
+CATALOG_SCOPE = "catalog"
+
+_stats: Counter = Counter()
+_stats_lock = threading.Lock()
+
+
+def product_scopes(product_id, category_id, seller_id) -> list[str]:
+    """Cache scopes that show the product."""
+    return [
+        "products",
+        f"product:{product_id}",
+        f"category:{category_id}",
+        f"seller:{seller_id}",
+    ]
+
+
+def get_cache():
+    return caches[getattr(settings, "CATALOG_CACHE_ALIAS", "default")]
+
+
+def version_key(scope: str) -> str:
+    return f"catalog:version:{scope}"
+
+
+def get_versions(scopes: Iterable[str]) -> list[int]:
+    """
+    Current version counters of the scopes.
+
+    A missing counter starts from the current time rather than 1, so
+    after an eviction it never goes back to a version that may still
+    have stale entries cached.
+    """
+    cache = get_cache()
+    keys: list[str] = [version_key(scope) for scope in scopes]
+    versions: dict[str, int] = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            cache.add(key, time.time_ns(), timeout=None)
+            versions[key] = cache.get(key)
+    return [versions[key] for key in keys]
+
+
+async def aget_versions(scopes: Iterable[str]) -> list[int]:
+    """Async get_versions()."""
+    cache = get_cache()
+    keys: list[str] = [version_key(scope) for scope in scopes]
+    versions: dict[str, int] = await cache.aget_many(keys)
+    for key in keys:
+        if key not in versions:
+            await cache.aadd(key, time.time_ns(), timeout=None)
+            versions[key] = await cache.aget(key)
+    return [versions[key] for key in keys]
+
+
+def bump_versions(scopes: Iterable[str]) -> None:
+    """Invalidates every entry cached under the scopes."""
+    cache = get_cache()
+    for scope in set(scopes):
+        try:
+            cache.incr(version_key(scope))
+        except ValueError:
+            cache.add(version_key(scope), time.time_ns(), timeout=None)
+
+
+def record(event: str) -> None:
+    with _stats_lock:
+        _stats[event] += 1
+
+
+def cache_stats() -> dict[str, int]:
+    """Hit and miss counters of this process."""
+    with _stats_lock:
+        return {"hits": _stats["hit"], "misses": _stats["miss"]}
+
+
+def reset_cache_stats() -> None:
+    with _stats_lock:
+        _stats.clear()
+
+
+def entry_key(name: str, versions: list[int]) -> str:
+    digest: str = hashlib.md5(name.encode()).hexdigest()
+    return f"catalog:{'.'.join(str(version) for version in versions)}:{digest}"
+
+
+def get_or_build(
+    name: str,
+    scopes: Iterable[str],
+    build: Callable[[], Any],
+) -> tuple[Any, bool]:
+    """
+    Returns the cached value of name, building and storing it on a miss.
+
+    The key embeds the version of every scope the value depends on
+    (plus the catalog-wide one), so bumping any of them makes the
+    entry unreachable without deleting it.
+    """
+    cache = get_cache()
+    key: str = entry_key(name, get_versions([CATALOG_SCOPE, *scopes]))
+
+    value: Any = cache.get(key)
+    if value is not None:
+        record("hit")
+        return value, True
+
+    record("miss")
+    value = build()
+    cache.set(key, value, getattr(settings, "CATALOG_CACHE_TIMEOUT", 300))
+    return value, False
+
+
+async def aget_or_build(
+    name: str,
+    scopes: Iterable[str],
+    build: Callable[[], Awaitable[Any]],
+) -> tuple[Any, bool]:
+    """Async get_or_build(), with an async build."""
+    cache = get_cache()
+    key: str = entry_key(
+        name, await aget_versions([CATALOG_SCOPE, *scopes])
+    )
+
+    value: Any = await cache.aget(key)
+    if value is not None:
+        record("hit")
+        return value, True
+
+    record("miss")
+    value = await build()
+    await cache.aset(
+        key, value, getattr(settings, "CATALOG_CACHE_TIMEOUT", 300)
+    )
+    return value, False
@@ -0,0 +1,244 @@
+# Python modules
+import codecs
+import csv
+import json
+import time
+from itertools import islice
+from typing import Any, BinaryIO, Iterable, Iterator
+
+# Django modules
+from django.core.exceptions import ValidationError
+from django.db import transaction
+
+# Project modules
+from .cache import CATALOG_SCOPE, bump_versions
+from .models import Category, Product
+from .search import get_search_backend
+
+
+# Columns of an import row; category is resolved by name
+IMPORT_COLUMNS = ("sku", "name", "description", "price", "category")
+
+# Product fields overwritten when the seller already has the sku
+UPDATE_FIELDS = ["name", "description", "price", "category"]
+
+# Row errors kept for the report, the others are only counted
+MAX_ERRORS = 1000
+
+# Product ids reindexed per search index statement
+INDEX_BATCH_SIZE = 500
+
+
+def csv_rows(stream: BinaryIO) -> Iterator[tuple[int, Any]]:
+    """(line number, dict) of every record of a UTF-8 CSV file."""
+    reader = csv.DictReader(
+        codecs.iterdecode(stream, "utf-8-sig"), strict=True
+    )
+    try:
+        for record in reader:
+            yield reader.line_num, record
+    except (csv.Error, UnicodeDecodeError) as error:
+        raise ValidationError(f"Line {reader.line_num}: {error}")
+
+
+def ndjson_rows(stream: BinaryIO) -> Iterator[tuple[int, Any]]:
+    """(line number, decoded value) of every non-blank NDJSON line."""
+    for line_number, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            yield line_number, json.loads(line)
+        except ValueError as error:
+            # Reported on the row, the next lines are still readable
+            yield line_number, error
+
+
+READERS = {
+    "csv": csv_rows,
+    "ndjson": ndjson_rows,
+}
+
+
+def guess_format(filename: str) -> str:
+    """Import format from the file extension, CSV by default."""
+    extension: str = filename.rsplit(".", 1)[-1].lower()
+    return "ndjson" if extension in ("ndjson", "jsonl") else "csv"
+
+
+class ProductImport:
+    """
+    Upserts the products of one seller from import rows.
+
+    Rows are validated and written batch_size at a time: each batch is
+    one bulk INSERT ... ON CONFLICT (seller, sku) DO UPDATE plus its
+    search reindex, in its own transaction. Invalid rows are reported
+    with their line number and skipped, the rest of their batch is
+    still imported.
+    """
+
+    def __init__(
+        self,
+        seller,
+        batch_size: int = 2000,
+        create_categories: bool = False,
+        using: str = "default",
+    ) -> None:
+        self.seller = seller
+        self.batch_size = batch_size
+        self.create_categories = create_categories
+        self.using = using
+        self.fields = {
+            name: Product._meta.get_field(name)
+            for name in ("sku", "name", "description", "price")
+        }
+        self.rows: int = 0
+        self.imported: int = 0
+        self.error_count: int = 0
+        self.errors: list[tuple[int, str]] = []
+        self.seconds: float = 0.0
+
+        # Lowercased name -> id, built once; the oldest category wins
+        self.categories: dict[str, int] = {}
+        categories = Category.objects.using(using).order_by("-pk")
+        for pk, name in categories.values_list("pk", "name"):
+            self.categories[name.strip().casefold()] = pk
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.seconds if self.seconds else 0.0
+
+    def add_error(self, line_number: int, message: str) -> None:
+        self.error_count += 1
+        if len(self.errors) < MAX_ERRORS:
+            self.errors.append((line_number, message))
+
+    def clean(self, record: Any) -> dict[str, Any]:
+        """Validated product values of a row."""
+        if not isinstance(record, dict):
+            raise ValidationError(
+                str(record) if isinstance(record, ValueError)
+                else "A row must be an object."
+            )
+        values: dict[str, Any] = {}
+        messages: list[str] = []
+        for name, field in self.fields.items():
+            value = record.get(name)
+            if isinstance(value, (int, float)):
+                # JSON numbers, as written rather than as binary floats
+                value = str(value)
+            if isinstance(value, str):
+                value = value.strip()
+            if value in (None, ""):
+                value = None if field.null else ""
+            try:
+                values[name] = field.clean(value, None)
+            except ValidationError as error:
+                messages += [f"{name}: {message}" for message in error.messages]
+        if not values.get("sku"):
+            messages.append("sku: This field is required.")
+
+        category: str = str(record.get("category") or "").strip()
+        values["category"] = self.categories.get(category.casefold())
+        if not category:
+            messages.append("category: This field is required.")
+        elif values["category"] is None and not self.create_categories:
+            messages.append(f"category: Unknown category {category!r}.")
+        else:
+            values["category_name"] = category
+        if messages:
+            raise ValidationError(messages)
+        return values
+
+    def add_categories(self, names: Iterable[str]) -> None:
+        """Creates the missing categories, once each."""
+        missing: dict[str, str] = {}
+        for name in names:
+            missing.setdefault(name.casefold(), name)
+        if not missing:
+            return
+        created = Category.objects.using(self.using).bulk_create(
+            [Category(name=name) for name in missing.values()]
+        )
+        for category in created:
+            self.categories[category.name.casefold()] = category.pk
+        # Creating categories changes the category list
+        bump_versions(["categories"])
+
+    def write(self, chunk: list[tuple[int, Any]]) -> None:
+        """Validates and upserts one batch of rows."""
+        # Keyed by sku: the last row of a repeated sku wins
+        products: dict[str, dict[str, Any]] = {}
+        for line_number, record in chunk:
+            try:
+                values = self.clean(record)
+            except ValidationError as error:
+                self.add_error(line_number, " ".join(error.messages))
+                continue
+            products.pop(values["sku"], None)
+            products[values["sku"]] = values
+        if not products:
+            return
+
+        if self.create_categories:
+            self.add_categories(
+                values["category_name"]
+                for values in products.values()
+                if values["category"] is None
+            )
+
+        objects: list[Product] = [
+            Product(
+                seller=self.seller,
+                sku=values["sku"],
+                name=values["name"],
+                description=values["description"],
+                price=values["price"],
+                category_id=(
+                    values["category"]
+                    or self.categories[values["category_name"].casefold()]
+                ),
+            )
+            for values in products.values()
+        ]
+        with transaction.atomic(using=self.using):
+            Product.objects.using(self.using).bulk_create(
+                objects,
+                update_conflicts=True,
+                unique_fields=["seller", "sku"],
+                update_fields=UPDATE_FIELDS,
+            )
+            backend = get_search_backend(self.using)
+            ids: list[int] = [product.pk for product in objects]
+            for start in range(0, len(ids), INDEX_BATCH_SIZE):
+                backend.index_products(ids[start:start + INDEX_BATCH_SIZE])
+        self.imported += len(objects)
+
+    def run(self, rows: Iterable[tuple[int, Any]]) -> "ProductImport":
+        """Imports (line number, record) rows; returns the report."""
+        start: float = time.perf_counter()
+        rows = iter(rows)
+        try:
+            while chunk := list(islice(rows, self.batch_size)):
+                self.rows += len(chunk)
+                self.write(chunk)
+        finally:
+            self.seconds = time.perf_counter() - start
+            if self.imported:
+                bump_versions([CATALOG_SCOPE])
+        return self
+
+
+def import_products(
+    stream: BinaryIO,
+    seller,
+    import_format: str = "csv",
+    batch_size: int = 2000,
+    create_categories: bool = False,
+    using: str = "default",
+) -> ProductImport:
+    """Upserts the products of the seller from a CSV or NDJSON file."""
+    if import_format not in READERS:
+        raise ValidationError(f"Invalid import format {import_format!r}.")
+    return ProductImport(
+        seller, batch_size, create_categories, using
+    ).run(READERS[import_format](stream))
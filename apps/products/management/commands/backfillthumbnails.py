@@ -0,0 +1,91 @@
+# Python modules
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Iterator, Optional
+
+# Django modules
+from django.core.management.base import BaseCommand, CommandParser
+from django.db.models import QuerySet
+
+# Project modules
+from apps.products.models import Product
+from apps.products.thumbnails import flag_thumbnails, generate_thumbnails
+
+
+class Command(BaseCommand):
+    help = "Render the missing thumbnails of the product images"
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=4,
+            help="Number of images rendered at the same time.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Number of products fetched and queued at a time.",
+        )
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Render every image again, even with thumbnails.",
+        )
+
+    @staticmethod
+    def batches(products: QuerySet, batch_size: int) -> Iterator[list]:
+        """
+        (id, image) batches in id order, each fetched by its own query so
+        no read stays open while the workers write.
+        """
+        last_id: int = 0
+        while batch := list(products.filter(pk__gt=last_id)[:batch_size]):
+            yield batch
+            last_id = batch[-1][0]
+
+    @staticmethod
+    def render(product: tuple[int, str], force: bool) -> Optional[Exception]:
+        """Renders in a pool thread; the database is left to the caller."""
+        try:
+            generate_thumbnails(product[1], force=force)
+        except Exception as error:
+            return error
+        return None
+
+    def handle(self, *args: tuple[Any, ...], **kwargs: Any) -> None:
+        """Command entry point."""
+
+        start_time: datetime = datetime.now()
+        products = Product.objects.exclude(image="").exclude(image=None)
+        if not kwargs["force"]:
+            products = products.filter(has_thumbnails=False)
+        products = products.order_by("pk").values_list("pk", "image")
+
+        rendered: int = 0
+        failed: int = 0
+        with ThreadPoolExecutor(max_workers=kwargs["workers"]) as executor:
+            for batch in self.batches(products, kwargs["batch_size"]):
+                errors = executor.map(
+                    lambda product: self.render(product, kwargs["force"]),
+                    batch,
+                )
+                # Flagged from this thread: one writer at a time
+                for product, error in zip(batch, errors):
+                    if error is not None:
+                        self.stderr.write(
+                            f"Product {product[0]} ({product[1]}): {error}"
+                        )
+                    if error is None and flag_thumbnails(*product):
+                        rendered += 1
+                    else:
+                        failed += 1
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Rendered the thumbnails of {rendered} products in "
+                f"{(datetime.now() - start_time).total_seconds()} seconds, "
+                f"{failed} failed or were replaced meanwhile."
+            )
+        )
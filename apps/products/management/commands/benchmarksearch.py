@@ -0,0 +1,98 @@
+# Python modules
+from typing import Any, Callable
+from random import Random
+from statistics import mean, quantiles
+from time import perf_counter
+
+# Django modules
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+from django.db.models import Q, QuerySet
+
+# Project modules
+from apps.products.models import Product
+from apps.users.management.commands.generatedata import PkSampler
+
+
+class Command(BaseCommand):
+    help = "Compare full-text product search against icontains lookups"
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "--queries",
+            type=int,
+            default=50,
+            help="Number of search terms to run.",
+        )
+        parser.add_argument(
+            "--limit",
+            type=int,
+            default=20,
+            help="Number of results fetched per search (one page).",
+        )
+        parser.add_argument("--seed", type=int, default=None)
+
+    @staticmethod
+    def icontains(term: str) -> QuerySet:
+        """The lookup the product admin search used to run."""
+        return Product.objects.filter(
+            Q(name__icontains=term)
+            | Q(category__name__icontains=term)
+            | Q(seller__email__icontains=term)
+        ).order_by("-created_at")
+
+    def run(
+        self, search: Callable[[str], QuerySet], terms: list[str], limit: int
+    ) -> list[float]:
+        timings: list[float] = []
+        for term in terms:
+            start: float = perf_counter()
+            list(search(term)[:limit])
+            timings.append((perf_counter() - start) * 1000)
+        return timings
+
+    def report(self, name: str, timings: list[float]) -> None:
+        p95: float = (
+            quantiles(timings, n=20)[-1] if len(timings) > 1 else timings[0]
+        )
+        self.stdout.write(
+            f"  {name:>10}: mean {mean(timings):.2f} ms, p95 {p95:.2f} ms"
+        )
+
+    def compare(self, kind: str, terms: list[str], limit: int) -> None:
+        self.stdout.write(f"{kind} terms, e.g. {terms[0]!r}:")
+        fulltext: list[float] = self.run(Product.objects.search, terms, limit)
+        icontains: list[float] = self.run(self.icontains, terms, limit)
+        self.report("full-text", fulltext)
+        self.report("icontains", icontains)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"  full-text / icontains mean time: "
+                f"{mean(fulltext) / mean(icontains):.2f}"
+            )
+        )
+
+    def handle(self, *args: tuple[Any, ...], **kwargs: Any) -> None:
+        """Command entry point."""
+
+        sampler = PkSampler(
+            Product.objects.all(),
+            Random(kwargs["seed"]),
+            fields=("name", "seller__email"),
+        )
+        if not sampler:
+            raise CommandError("There are no products to search.")
+        samples: list[tuple[str, str]] = sampler.sample(kwargs["queries"])
+        self.stdout.write(
+            f"Running {len(samples)} searches of each kind over "
+            f"{Product.objects.count()} products."
+        )
+
+        # A seller handle matches a few products, a name word many
+        self.compare(
+            "Selective",
+            [email.split("@")[0] for _, email in samples],
+            kwargs["limit"],
+        )
+        self.compare(
+            "Broad", [name.split()[0] for name, _ in samples], kwargs["limit"]
+        )
@@ -0,0 +1,96 @@
+# Python modules
+import sys
+from typing import Any, BinaryIO
+
+# Django modules
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+
+# Project modules
+from apps.products.imports import READERS, guess_format, import_products
+
+
+class Command(BaseCommand):
+    help = "Import (create or update) a seller's products from CSV or NDJSON"
+    stealth_options = ("stdin",)
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "file",
+            help=(
+                "File with the columns sku, name, description, price and "
+                "category (by name), - for stdin."
+            ),
+        )
+        parser.add_argument(
+            "--seller",
+            required=True,
+            help="Email or id of the seller owning the products.",
+        )
+        parser.add_argument(
+            "--format",
+            choices=sorted(READERS),
+            help="File format, guessed from the file extension by default.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=2000,
+            help="Number of rows validated and upserted at a time.",
+        )
+        parser.add_argument(
+            "--create-categories",
+            action="store_true",
+            help="Create the unknown categories instead of rejecting rows.",
+        )
+        parser.add_argument(
+            "--max-errors",
+            type=int,
+            default=20,
+            help="Number of row errors printed.",
+        )
+
+    @staticmethod
+    def get_seller(value: str):
+        users = get_user_model().objects
+        seller = (
+            users.filter(pk=value).first() if value.isdigit()
+            else users.filter(email__iexact=value).first()
+        )
+        if seller is None:
+            raise CommandError(f"Unknown seller: {value!r}")
+        return seller
+
+    def handle(self, *args: tuple[Any, ...], **kwargs: Any) -> None:
+        """Command entry point."""
+
+        seller = self.get_seller(kwargs["seller"])
+        stdin: BinaryIO = kwargs.get("stdin") or sys.stdin.buffer
+        stream: BinaryIO = (
+            stdin if kwargs["file"] == "-" else open(kwargs["file"], "rb")
+        )
+        try:
+            report = import_products(
+                stream,
+                seller,
+                kwargs["format"] or guess_format(kwargs["file"]),
+                kwargs["batch_size"],
+                kwargs["create_categories"],
+            )
+        except ValidationError as error:
+            raise CommandError(" ".join(error.messages))
+        finally:
+            if stream is not stdin:
+                stream.close()
+
+        for line_number, message in report.errors[:kwargs["max_errors"]]:
+            self.stderr.write(f"Line {line_number}: {message}")
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Read {report.rows} rows and imported {report.imported} "
+                f"products in {report.seconds:.2f} seconds "
+                f"({report.rows_per_second:.0f} rows/s), "
+                f"{report.error_count} rows rejected."
+            )
+        )
@@ -0,0 +1,36 @@
+# Python modules
+from typing import Any
+from datetime import datetime
+
+# Django modules
+from django.core.management.base import BaseCommand, CommandParser
+
+# Project modules
+from apps.products.models import ProductRatingStats
+
+
+class Command(BaseCommand):
+    help = "Rebuild the denormalized product rating stats from reviews"
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=10000,
+            help="Number of product ids rebuilt per statement.",
+        )
+
+    def handle(self, *args: tuple[Any, ...], **kwargs: Any) -> None:
+        """Command entry point."""
+
+        start_time: datetime = datetime.now()
+        rebuilt: int = ProductRatingStats.objects.rebuild(
+            batch_size=kwargs["batch_size"]
+        )
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Rebuilt rating stats of {rebuilt} products in "
+                f"{(datetime.now() - start_time).total_seconds()} seconds."
+            )
+        )
@@ -0,0 +1,37 @@
+# Python modules
+from typing import Any
+from datetime import datetime
+
+# Django modules
+from django.core.management.base import BaseCommand, CommandParser
+
+# Project modules
+from apps.products.models import Product
+from apps.products.search import get_search_backend
+
+
+class Command(BaseCommand):
+    help = "Rebuild the product full-text search index"
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=10000,
+            help="Number of product ids indexed per statement.",
+        )
+
+    def handle(self, *args: tuple[Any, ...], **kwargs: Any) -> None:
+        """Command entry point."""
+
+        start_time: datetime = datetime.now()
+        indexed: int = get_search_backend().rebuild(
+            Product.objects.all(), batch_size=kwargs["batch_size"]
+        )
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Indexed {indexed} products in "
+                f"{(datetime.now() - start_time).total_seconds()} seconds."
+            )
+        )
@@ -0,0 +1,55 @@
+# Python modules
+from typing import Any
+
+# Django modules
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+
+# Project modules
+from apps.products.models import Product
+
+
+class Command(BaseCommand):
+    help = "Set the stock of a product, optionally sharded for flash sales"
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument("product", type=int, help="Product id.")
+        parser.add_argument(
+            "quantity",
+            help="Units available to reserve, 'none' to stop tracking.",
+        )
+        parser.add_argument(
+            "--shards",
+            type=int,
+            default=0,
+            help=(
+                "Spread the units over this many counter rows, so "
+                "concurrent buyers don't wait on a single row lock."
+            ),
+        )
+
+    def handle(self, *args: tuple[Any, ...], **kwargs: Any) -> None:
+        """Command entry point."""
+
+        if not Product.objects.filter(pk=kwargs["product"]).exists():
+            raise CommandError(f"Unknown product: {kwargs['product']}")
+        quantity: str = kwargs["quantity"]
+        if quantity.lower() != "none" and not quantity.isdigit():
+            raise CommandError("The quantity must be a number or 'none'.")
+        try:
+            Product.objects.set_stock(
+                kwargs["product"],
+                int(quantity) if quantity.isdigit() else None,
+                kwargs["shards"],
+            )
+        except ValidationError as error:
+            raise CommandError(" ".join(error.messages))
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Set the stock of product {kwargs['product']} to "
+                f"{quantity}"
+                + (f" over {kwargs['shards']} shards." if kwargs["shards"]
+                   else ".")
+            )
+        )
@@ -0,0 +1,32 @@
+# Generated by Django 5.0 on 2026-10-18 14:54
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0002_product_product_category_created_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductRatingStats',
+            fields=[
+                ('product', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='rating_stats', serialize=False, to='products.product')),
+                ('rating_count', models.PositiveIntegerField(default=0)),
+                ('rating_sum', models.PositiveIntegerField(default=0)),
+                ('rating_avg', models.FloatField(db_index=True, default=0.0)),
+                ('stars_0', models.PositiveIntegerField(default=0)),
+                ('stars_1', models.PositiveIntegerField(default=0)),
+                ('stars_2', models.PositiveIntegerField(default=0)),
+                ('stars_3', models.PositiveIntegerField(default=0)),
+                ('stars_4', models.PositiveIntegerField(default=0)),
+                ('stars_5', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name_plural': 'product rating stats',
+            },
+        ),
+    ]
@@ -0,0 +1,66 @@
+from django.conf import settings
+from django.db import migrations
+
+
+SEARCH_TABLE = "products_product_search"
+
+
+def create_search_index(apps, schema_editor):
+    connection = schema_editor.connection
+    users = connection.ops.quote_name(
+        apps.get_model(settings.AUTH_USER_MODEL)._meta.db_table
+    )
+    documents = (
+        "SELECT p.id, p.name, COALESCE(p.description, ''), c.name, u.email "
+        "FROM products_product p "
+        "JOIN products_category c ON c.id = p.category_id "
+        f"JOIN {users} u ON u.id = p.seller_id"
+    )
+    if connection.vendor == "sqlite":
+        schema_editor.execute(
+            f"CREATE VIRTUAL TABLE {SEARCH_TABLE} USING fts5("
+            "name, description, category, seller, "
+            "tokenize = 'unicode61 remove_diacritics 2')"
+        )
+        schema_editor.execute(
+            f"INSERT INTO {SEARCH_TABLE} "
+            f"(rowid, name, description, category, seller) {documents}"
+        )
+    elif connection.vendor == "postgresql":
+        schema_editor.execute(
+            f"CREATE TABLE {SEARCH_TABLE} ("
+            "product_id bigint PRIMARY KEY "
+            "REFERENCES products_product (id) "
+            "ON DELETE CASCADE DEFERRABLE INITIALLY DEFERRED, "
+            "document tsvector NOT NULL)"
+        )
+        schema_editor.execute(
+            f"CREATE INDEX {SEARCH_TABLE}_document_idx "
+            f"ON {SEARCH_TABLE} USING GIN (document)"
+        )
+        schema_editor.execute(
+            f"INSERT INTO {SEARCH_TABLE} (product_id, document) "
+            "SELECT d.id, "
+            "setweight(to_tsvector('simple', d.name), 'A') || "
+            "setweight(to_tsvector('simple', d.category), 'B') || "
+            "setweight(to_tsvector('simple', d.seller), 'C') || "
+            "setweight(to_tsvector('simple', d.description), 'D') "
+            f"FROM ({documents}) AS d (id, name, description, category, seller)"
+        )
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor in ("sqlite", "postgresql"):
+        schema_editor.execute(f"DROP TABLE IF EXISTS {SEARCH_TABLE}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0004_product_keyset_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
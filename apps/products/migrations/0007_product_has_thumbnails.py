@@ -0,0 +1,18 @@
+# Generated by Django 5.0 on 2026-10-18 16:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0006_product_sku'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='has_thumbnails',
+            field=models.BooleanField(default=False, editable=False),
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.0 on 2026-10-18 17:02
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+SEARCH_TABLE = "products_product_search"
+
+
+def rename_key(old, new):
+    """The index is keyed by rowid on every backend (FTS5 has no other)."""
+    def rename(apps, schema_editor):
+        if schema_editor.connection.vendor == "postgresql":
+            schema_editor.execute(
+                f"ALTER TABLE {SEARCH_TABLE} RENAME COLUMN {old} TO {new}"
+            )
+
+    return rename
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0008_product_stock'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            rename_key("product_id", "rowid"),
+            rename_key("rowid", "product_id"),
+        ),
+        migrations.CreateModel(
+            name='ProductSearchDocument',
+            fields=[
+                ('product', models.OneToOneField(db_column='rowid', db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='search_document', serialize=False, to='products.product')),
+            ],
+            options={
+                'db_table': 'products_product_search',
+                'managed': False,
+            },
+        ),
+    ]
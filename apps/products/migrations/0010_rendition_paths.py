@@ -0,0 +1,23 @@
+# Generated by Django 5.0 on 2026-10-18 17:30
+
+from django.db import migrations
+
+
+def reset_thumbnails(apps, schema_editor):
+    # Renditions moved to paths keyed by the full image name: products
+    # show their original image until backfillthumbnails renders them
+    Product = apps.get_model("products", "Product")
+    Product.objects.using(schema_editor.connection.alias).filter(
+        has_thumbnails=True
+    ).update(has_thumbnails=False)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0009_product_search_document'),
+    ]
+
+    operations = [
+        migrations.RunPython(reset_thumbnails, migrations.RunPython.noop),
+    ]
@@ -1,6 +1,26 @@
+# Python modules
+from random import randrange
+from typing import Optional
+
 # Django modules
 from django.conf import settings
-from django.db import models
+from django.db import connections, models, transaction
+from django.core.exceptions import ValidationError
+from django.db.models import (
+    Case,
+    F,
+    FloatField,
+    Max,
+    Min,
+    Q,
+    Sum,
+    Value,
+    When,
+)
+from django.db.models.functions import Cast, Coalesce, NullIf
+
+
+RATING_VALUES = range(0, 6)
 
 
 class Category(models.Model):
@@ -16,6 +36,128 @@ class Category(models.Model):
         return self.name
 
 
+class ProductQuerySet(models.QuerySet):
+    """Product QuerySet."""
+
+    def search(self, query: str) -> "ProductQuerySet":
+        """
+        Full-text search over name, description, category and seller,
+        best matches first.
+        """
+        from .search import get_search_backend
+
+        return get_search_backend(self.db).search(self, query)
+
+    def take_stock(self, quantities: dict[int, int]) -> dict[int, int]:
+        """
+        Take units of products (product id -> quantity) off their stock.
+
+        The plain products are decremented together by one conditional
+        UPDATE ... SET stock = stock - n WHERE stock >= n, so concurrent
+        buyers never read-modify-write and the stock never goes below
+        zero. Sharded products are taken from their counter rows. The
+        products whose stock is not tracked are left alone.
+
+        Returns the quantities taken, by product. Raises ValidationError
+        if a product is short of stock, and then nothing is taken.
+        """
+        quantities = {pk: n for pk, n in quantities.items() if n > 0}
+        if not quantities:
+            return {}
+        tracked: dict[int, int] = dict(
+            self.filter(
+                Q(stock__isnull=False) | Q(stock_shards__gt=0),
+                pk__in=quantities,
+            ).values_list("pk", "stock_shards")
+        )
+        if not tracked:
+            return {}
+        plain: list[int] = [pk for pk, shards in tracked.items() if not shards]
+        amount = Case(
+            *(When(pk=pk, then=Value(quantities[pk])) for pk in plain)
+        )
+        shards = StockShard.objects.using(self.db)
+
+        with transaction.atomic(using=self.db):
+            enough: bool = not plain or self.filter(
+                pk__in=plain, stock__gte=amount
+            ).update(stock=F("stock") - amount) == len(plain)
+            short: list[int] = []
+            if enough:
+                short = [
+                    pk for pk, count in tracked.items()
+                    if count and not shards.take(pk, quantities[pk], count)
+                ]
+            if enough and not short:
+                return {pk: quantities[pk] for pk in tracked}
+            transaction.set_rollback(True)
+        if not enough:
+            short += self.filter(
+                pk__in=plain, stock__lt=amount
+            ).values_list("pk", flat=True)
+        raise ValidationError(
+            "Not enough stock.",
+            code="out_of_stock",
+            params={"products": sorted(short)},
+        )
+
+    def give_stock(self, quantities: dict[int, int]) -> None:
+        """
+        Put units of products back on their stock, with one UPDATE for
+        the plain products and one for the sharded ones whatever their
+        number. Untracked products stay untracked (NULL + n is NULL).
+        """
+        quantities = {pk: n for pk, n in quantities.items() if n > 0}
+        if not quantities:
+            return
+        self.filter(pk__in=quantities, stock__isnull=False).update(
+            stock=F("stock") + Case(
+                *(When(pk=pk, then=Value(n)) for pk, n in quantities.items())
+            )
+        )
+        # Sharded products get their units back in their first row
+        StockShard.objects.using(self.db).filter(
+            product_id__in=quantities, shard=0
+        ).update(
+            quantity=F("quantity") + Case(
+                *(
+                    When(product_id=pk, then=Value(n))
+                    for pk, n in quantities.items()
+                )
+            )
+        )
+
+    def set_stock(
+        self, product_id: int, quantity: Optional[int], shards: int = 0
+    ) -> None:
+        """
+        Set the units of a product available to reserve, None to stop
+        tracking its stock. With shards, the units are spread over that
+        many counter rows, so concurrent buyers of a hot product rarely
+        wait on the same row lock.
+        """
+        if quantity is None and shards:
+            raise ValidationError("Only a tracked stock can be sharded.")
+        with transaction.atomic(using=self.db):
+            StockShard.objects.using(self.db).filter(
+                product_id=product_id
+            ).delete()
+            if not shards:
+                self.filter(pk=product_id).update(
+                    stock=quantity, stock_shards=0
+                )
+                return
+            StockShard.objects.using(self.db).bulk_create(
+                StockShard(
+                    product_id=product_id,
+                    shard=shard,
+                    quantity=quantity // shards + (shard < quantity % shards),
+                )
+                for shard in range(shards)
+            )
+            self.filter(pk=product_id).update(stock=None, stock_shards=shards)
+
+
 class Product(models.Model):
     """
     Product database (table) model.
@@ -25,12 +167,310 @@ class Product(models.Model):
         Category, on_delete=models.CASCADE, related_name='products')
     seller = models.ForeignKey(
         settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
+    sku = models.CharField(
+        max_length=64,
+        blank=True,
+        null=True,
+        help_text="Seller's own product code, unique per seller.",
+    )
     name = models.CharField(max_length=100)
     description = models.TextField(blank=True, null=True)
     price = models.DecimalField(max_digits=10, decimal_places=2)
     image = models.ImageField(upload_to='products/', blank=True, null=True)
+    has_thumbnails = models.BooleanField(default=False, editable=False)
+    stock = models.PositiveIntegerField(
+        blank=True,
+        null=True,
+        help_text=(
+            "Units on hand not held by reservations, empty when the "
+            "stock is not tracked."
+        ),
+    )
+    # Number of StockShard rows holding the stock instead, 0 for none
+    stock_shards = models.PositiveSmallIntegerField(
+        default=0, editable=False
+    )
     created_at = models.DateTimeField(auto_now_add=True)
 
+    objects = ProductQuerySet().as_manager()
+
+    class Meta:
+        """Meta class."""
+
+        constraints = [
+            # Natural key of imported products
+            models.UniqueConstraint(
+                fields=["seller", "sku"],
+                name="product_seller_sku_key",
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=["-created_at", "-id"],
+                name="product_created_idx",
+            ),
+            models.Index(
+                fields=["category", "-created_at", "-id"],
+                name="product_category_created_idx",
+            ),
+            models.Index(
+                fields=["seller", "-created_at", "-id"],
+                name="product_seller_created_idx",
+            ),
+        ]
+
     def __str__(self) -> str:
         """Returns the string representation of the object."""
         return self.name
+
+    def available_stock(self) -> Optional[int]:
+        """Units available to reserve, None when not tracked."""
+        if not self.stock_shards:
+            return self.stock
+        return self.shards.aggregate(total=Sum("quantity"))["total"] or 0
+
+    def thumbnail_url(
+        self, size: str = "small", image_format: str = "webp"
+    ) -> Optional[str]:
+        """
+        URL of an image rendition, or of the original image while its
+        renditions are not rendered yet.
+        """
+        from .thumbnails import rendition_name
+
+        if not self.image:
+            return None
+        if not self.has_thumbnails:
+            return self.image.url
+        return self.image.storage.url(
+            rendition_name(self.image.name, size, image_format)
+        )
+
+    def thumbnail_urls(self) -> dict[str, dict[str, Optional[str]]]:
+        """URLs of every rendition, by size then format."""
+        return {
+            size: {
+                image_format: self.thumbnail_url(size, image_format)
+                for image_format in settings.PRODUCT_THUMBNAIL_FORMATS
+            }
+            for size in settings.PRODUCT_THUMBNAIL_SIZES
+        }
+
+
+class StockShardQuerySet(models.QuerySet):
+    """Stock shard QuerySet."""
+
+    def take(self, product_id: int, quantity: int, shards: int) -> bool:
+        """
+        Take units of a sharded product: from the first row holding
+        enough, starting at a random one, so concurrent buyers spread
+        over the rows. When no single row holds enough, the rows are
+        locked and drained together. Returns whether the units were
+        taken.
+        """
+        first: int = randrange(shards)
+        for offset in range(shards):
+            if self.filter(
+                product_id=product_id,
+                shard=(first + offset) % shards,
+                quantity__gte=quantity,
+            ).update(quantity=F("quantity") - quantity):
+                return True
+
+        with transaction.atomic(using=self.db):
+            rows = list(
+                self.select_for_update()
+                .filter(product_id=product_id)
+                .order_by("shard")
+                .values_list("shard", "quantity")
+            )
+            if sum(available for _, available in rows) < quantity:
+                return False
+            for shard, available in rows:
+                taken: int = min(available, quantity)
+                if taken:
+                    self.filter(product_id=product_id, shard=shard).update(
+                        quantity=F("quantity") - taken
+                    )
+                    quantity -= taken
+        return True
+
+
+class StockShard(models.Model):
+    """
+    Counter row holding a part of the stock of a hot product.
+    """
+
+    product = models.ForeignKey(
+        Product, on_delete=models.CASCADE, related_name="shards"
+    )
+    shard = models.PositiveSmallIntegerField()
+    quantity = models.PositiveIntegerField(default=0)
+
+    objects = StockShardQuerySet().as_manager()
+
+    class Meta:
+        """Meta class."""
+
+        constraints = [
+            models.UniqueConstraint(
+                fields=["product", "shard"],
+                name="stockshard_product_shard_key",
+            ),
+        ]
+
+    def __str__(self) -> str:
+        """Returns the string representation of the object."""
+        return f"Stock shard {self.shard} of product {self.product_id}"
+
+
+class ProductRatingStatsQuerySet(models.QuerySet):
+    """Product rating stats QuerySet."""
+
+    def apply_rating(self, product_id: int, rate: int, delta: int = 1) -> None:
+        """
+        Add (delta=1) or remove (delta=-1) a single rating of the product.
+
+        The counters are changed in place with F-expressions, so
+        concurrent reviews never overwrite each other and the reviews
+        table is not recounted. A missing stats row is only created to
+        add a rating: removing one from a product without stats, such
+        as a product being deleted, changes nothing.
+        """
+        rating_count = F("rating_count") + delta
+        rating_sum = F("rating_sum") + rate * delta
+        changes = {
+            "rating_count": rating_count,
+            "rating_sum": rating_sum,
+            "rating_avg": Coalesce(
+                Cast(rating_sum, FloatField()) / NullIf(rating_count, 0),
+                Value(0.0),
+            ),
+            f"stars_{rate}": F(f"stars_{rate}") + delta,
+        }
+        updated = self.filter(product_id=product_id).update(**changes)
+        if not updated and delta > 0:
+            self.get_or_create(product_id=product_id)
+            self.filter(product_id=product_id).update(**changes)
+
+    def rebuild(self, batch_size: int = 10000) -> int:
+        """
+        Recompute the stats of every product from its reviews.
+
+        Each range of batch_size product ids is aggregated and upserted
+        by one INSERT ... SELECT statement, so no row goes through
+        Python and locks are held for one range at a time.
+        """
+        connection = connections[self.db]
+        quote = connection.ops.quote_name
+        review = Product._meta.get_field("reviews").related_model
+        stats_columns: list[str] = [
+            "rating_count",
+            "rating_sum",
+            "rating_avg",
+            *(f"stars_{rate}" for rate in RATING_VALUES),
+        ]
+        sql: str = (
+            "INSERT INTO {stats} (product_id, {columns}) "
+            "SELECT p.id, COUNT(r.id), COALESCE(SUM(r.rate), 0), "
+            "COALESCE(CAST(SUM(r.rate) AS DOUBLE PRECISION) "
+            "/ NULLIF(COUNT(r.id), 0), 0), {stars} "
+            "FROM {product} p LEFT JOIN {review} r ON r.product_id = p.id "
+            "WHERE p.id >= %s AND p.id < %s "
+            "GROUP BY p.id "
+            "ON CONFLICT (product_id) DO UPDATE SET {updates}"
+        ).format(
+            stats=quote(self.model._meta.db_table),
+            product=quote(Product._meta.db_table),
+            review=quote(review._meta.db_table),
+            columns=", ".join(stats_columns),
+            stars=", ".join(
+                f"SUM(CASE WHEN r.rate = {rate} THEN 1 ELSE 0 END)"
+                for rate in RATING_VALUES
+            ),
+            updates=", ".join(
+                f"{column} = excluded.{column}" for column in stats_columns
+            ),
+        )
+
+        bounds: dict = Product.objects.using(self.db).aggregate(
+            low=Min("pk"), high=Max("pk")
+        )
+        if bounds["low"] is None:
+            return 0
+        rebuilt: int = 0
+        with connection.cursor() as cursor:
+            for start in range(bounds["low"], bounds["high"] + 1, batch_size):
+                with transaction.atomic(using=self.db):
+                    cursor.execute(sql, [start, start + batch_size])
+                    rebuilt += cursor.rowcount
+        return rebuilt
+
+
+class ProductRatingStats(models.Model):
+    """
+    Denormalized product rating aggregates database (table) model.
+    """
+
+    product = models.OneToOneField(
+        Product,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="rating_stats",
+    )
+    rating_count = models.PositiveIntegerField(default=0)
+    rating_sum = models.PositiveIntegerField(default=0)
+    rating_avg = models.FloatField(default=0.0, db_index=True)
+    stars_0 = models.PositiveIntegerField(default=0)
+    stars_1 = models.PositiveIntegerField(default=0)
+    stars_2 = models.PositiveIntegerField(default=0)
+    stars_3 = models.PositiveIntegerField(default=0)
+    stars_4 = models.PositiveIntegerField(default=0)
+    stars_5 = models.PositiveIntegerField(default=0)
+
+    objects = ProductRatingStatsQuerySet().as_manager()
+
+    class Meta:
+        """Meta class."""
+
+        verbose_name_plural = "product rating stats"
+
+    def __str__(self) -> str:
+        """Returns the string representation of the object."""
+        return f"Rating of product {self.product_id}: {self.rating_avg:.2f}"
+
+    @property
+    def histogram(self) -> dict[int, int]:
+        """Number of reviews per star rating."""
+        return {
+            rate: getattr(self, f"stars_{rate}") for rate in RATING_VALUES
+        }
+
+
+class ProductSearchDocument(models.Model):
+    """
+    Row of the product search index, joined to rank the matches.
+
+    The table is created and kept by the search backend (an FTS5
+    table on SQLite, a tsvector one on PostgreSQL), keyed by the
+    product id in a rowid column.
+    """
+
+    product = models.OneToOneField(
+        Product,
+        on_delete=models.DO_NOTHING,
+        primary_key=True,
+        db_column="rowid",
+        db_constraint=False,
+        related_name="search_document",
+    )
+
+    class Meta:
+        """Meta class."""
+
+        managed = False
+        db_table = "products_product_search"
+
+    def __str__(self) -> str:
+        """Returns the string representation of the object."""
+        return f"Search document of product {self.product_id}"
@@ -0,0 +1,271 @@
+# Python modules
+import re
+from abc import ABC, abstractmethod
+from typing import Any, Optional
+
+# Django modules
+from django.db import connections, transaction
+from django.db.models import (
+    BooleanField,
+    FloatField,
+    Max,
+    Min,
+    Q,
+    QuerySet,
+    Value,
+)
+from django.db.models.expressions import RawSQL
+
+# Project modules
+from .models import Category, Product, ProductSearchDocument
+
+
+SEARCH_TABLE = ProductSearchDocument._meta.db_table
+TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def tokenize(query: str) -> list[str]:
+    """Words of a user query, stripped of any search syntax."""
+    return TOKEN_RE.findall(query.lower())
+
+
+class SearchBackend(ABC):
+    """
+    Product search: keeps the index of the products up to date and
+    matches user queries against it.
+    """
+
+    def __init__(self, using: str) -> None:
+        self.using = using
+        self.connection = connections[using]
+
+    def execute(self, sql: str, params: list[Any]) -> None:
+        with self.connection.cursor() as cursor:
+            cursor.execute(sql, params)
+
+    @abstractmethod
+    def index(self, where: str, params: list[Any]) -> None:
+        """(Re)indexes the products matching the WHERE clause on p."""
+
+    @abstractmethod
+    def remove(self, product_ids: list[int]) -> None:
+        """Removes products from the index."""
+
+    @abstractmethod
+    def clear(self) -> None:
+        """Empties the index."""
+
+    @abstractmethod
+    def search(self, queryset: QuerySet, query: str) -> QuerySet:
+        """Matching products, best first, with their search_rank."""
+
+    def index_products(self, product_ids: list[int]) -> None:
+        if product_ids:
+            placeholders: str = ", ".join(["%s"] * len(product_ids))
+            self.index(f"p.id IN ({placeholders})", list(product_ids))
+
+    def index_range(self, low: int, high: int, batch_size: int = 10000) -> None:
+        """Indexes the products with ids from low to high, in batches."""
+        for start in range(low, high + 1, batch_size):
+            with transaction.atomic(using=self.using):
+                self.index(
+                    "p.id >= %s AND p.id < %s",
+                    [start, min(start + batch_size, high + 1)],
+                )
+
+    def rebuild(self, queryset: QuerySet, batch_size: int = 10000) -> int:
+        """
+        Reindexes every product, one range of ids at a time, in one
+        transaction: searches keep seeing the previous index until the
+        new one is complete, and a failure leaves it untouched.
+        """
+        with transaction.atomic(using=self.using):
+            self.clear()
+            bounds: dict[str, Optional[int]] = queryset.aggregate(
+                low=Min("pk"), high=Max("pk")
+            )
+            if bounds["low"] is None:
+                return 0
+            self.index_range(bounds["low"], bounds["high"], batch_size)
+            return queryset.count()
+
+
+class SearchTableBackend(SearchBackend):
+    """
+    Product search index kept in a dedicated table.
+
+    The indexed document of a product is its name, description,
+    category name and seller email. Rows are (re)indexed with set-based
+    INSERT ... SELECT statements, so indexing many products costs one
+    statement per batch.
+    """
+
+    # SELECT of (product id, name, description, category, seller)
+    DOCUMENT_SQL = (
+        "SELECT p.id, p.name, COALESCE(p.description, ''), c.name, u.email "
+        "FROM {products} p "
+        "JOIN {categories} c ON c.id = p.category_id "
+        "JOIN {users} u ON u.id = p.seller_id "
+    )
+
+    def table(self, model) -> str:
+        return self.connection.ops.quote_name(model._meta.db_table)
+
+    @property
+    def document_sql(self) -> str:
+        from apps.users.models import CustomUser
+
+        return self.DOCUMENT_SQL.format(
+            products=self.table(Product),
+            categories=self.table(Category),
+            users=self.table(CustomUser),
+        )
+
+    def clear(self) -> None:
+        self.execute(f"DELETE FROM {SEARCH_TABLE}", [])
+
+    @abstractmethod
+    def match(
+        self, tokens: list[str]
+    ) -> tuple[str, list[Any], str, list[Any]]:
+        """
+        WHERE condition matching the search table rows and SQL
+        expression ranking a row (lower is better), with their params.
+        """
+
+    def search(self, queryset: QuerySet, query: str) -> QuerySet:
+        """
+        Matching products, best first, with their search_rank.
+
+        The search table is joined rather than queried per product, so
+        the index is matched once and every row is ranked once.
+        """
+        tokens: list[str] = tokenize(query)
+        if not tokens:
+            return queryset.none()
+        condition, params, rank, rank_params = self.match(tokens)
+        return (
+            queryset.filter(search_document__isnull=False)
+            .filter(RawSQL(condition, params, output_field=BooleanField()))
+            .annotate(
+                search_rank=RawSQL(
+                    rank, rank_params, output_field=FloatField()
+                )
+            )
+            .order_by("search_rank", "-pk")
+        )
+
+
+class SQLiteSearchBackend(SearchTableBackend):
+    """FTS5 virtual table ranked with bm25."""
+
+    # Column weights of bm25: name, description, category, seller
+    WEIGHTS = "10.0, 1.0, 5.0, 2.0"
+
+    def index(self, where: str, params: list[Any]) -> None:
+        self.execute(
+            f"DELETE FROM {SEARCH_TABLE} WHERE rowid IN "
+            f"(SELECT p.id FROM {self.table(Product)} p WHERE {where})",
+            params,
+        )
+        self.execute(
+            f"INSERT INTO {SEARCH_TABLE} "
+            "(rowid, name, description, category, seller) "
+            f"{self.document_sql} WHERE {where}",
+            params,
+        )
+
+    def remove(self, product_ids: list[int]) -> None:
+        if product_ids:
+            placeholders: str = ", ".join(["%s"] * len(product_ids))
+            self.execute(
+                f"DELETE FROM {SEARCH_TABLE} WHERE rowid IN ({placeholders})",
+                list(product_ids),
+            )
+
+    def match(
+        self, tokens: list[str]
+    ) -> tuple[str, list[Any], str, list[Any]]:
+        # Every word as a quoted prefix query, all of them required
+        expression: str = " ".join(f'"{token}"*' for token in tokens)
+        return (
+            f"{SEARCH_TABLE} MATCH %s",
+            [expression],
+            f"bm25({SEARCH_TABLE}, {self.WEIGHTS})",
+            [],
+        )
+
+
+class PostgresSearchBackend(SearchTableBackend):
+    """tsvector column with a GIN index, ranked with ts_rank."""
+
+    DOCUMENT = (
+        "setweight(to_tsvector('simple', d.name), 'A') || "
+        "setweight(to_tsvector('simple', d.category), 'B') || "
+        "setweight(to_tsvector('simple', d.seller), 'C') || "
+        "setweight(to_tsvector('simple', d.description), 'D')"
+    )
+
+    def index(self, where: str, params: list[Any]) -> None:
+        self.execute(
+            f"INSERT INTO {SEARCH_TABLE} (rowid, document) "
+            f"SELECT d.id, {self.DOCUMENT} FROM ({self.document_sql} "
+            f"WHERE {where}) AS d (id, name, description, category, seller) "
+            "ON CONFLICT (rowid) DO UPDATE SET document = excluded.document",
+            params,
+        )
+
+    def remove(self, product_ids: list[int]) -> None:
+        # Rows go away with the product (ON DELETE CASCADE)
+        pass
+
+    def match(
+        self, tokens: list[str]
+    ) -> tuple[str, list[Any], str, list[Any]]:
+        expression: str = " & ".join(f"{token}:*" for token in tokens)
+        return (
+            f"{SEARCH_TABLE}.document @@ to_tsquery('simple', %s)",
+            [expression],
+            f"-ts_rank({SEARCH_TABLE}.document, to_tsquery('simple', %s))",
+            [expression],
+        )
+
+
+class FallbackSearchBackend(SearchBackend):
+    """Plain icontains lookups, for databases without full-text search."""
+
+    def index(self, where: str, params: list[Any]) -> None:
+        pass
+
+    def remove(self, product_ids: list[int]) -> None:
+        pass
+
+    def clear(self) -> None:
+        pass
+
+    def search(self, queryset: QuerySet, query: str) -> QuerySet:
+        tokens: list[str] = tokenize(query)
+        if not tokens:
+            return queryset.none()
+        for token in tokens:
+            queryset = queryset.filter(
+                Q(name__icontains=token)
+                | Q(description__icontains=token)
+                | Q(category__name__icontains=token)
+                | Q(seller__email__icontains=token)
+            )
+        return queryset.annotate(
+            search_rank=Value(0.0, output_field=FloatField())
+        ).order_by("-pk")
+
+
+BACKENDS = {
+    "sqlite": SQLiteSearchBackend,
+    "postgresql": PostgresSearchBackend,
+}
+
+
+def get_search_backend(using: str = "default") -> SearchBackend:
+    return BACKENDS.get(
+        connections[using].vendor, FallbackSearchBackend
+    )(using)
@@ -0,0 +1,130 @@
+# Django modules
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+# Project modules
+from .cache import CATALOG_SCOPE, bump_versions, product_scopes
+from .models import Category, Product
+from .search import get_search_backend
+from .thumbnails import schedule_thumbnails
+
+
+@receiver(pre_save, sender=Product)
+def remember_previous_relations(sender, instance, **kwargs):
+    """
+    Keep the stored category and seller of an edited product, and
+    reset its thumbnails flag when its image changes.
+    """
+    instance._previous_relations = None
+    previous_image = None
+    if instance.pk is not None:
+        stored = (
+            sender.objects.filter(pk=instance.pk)
+            .values_list("category_id", "seller_id", "image")
+            .first()
+        )
+        if stored is not None:
+            instance._previous_relations = stored[:2]
+            previous_image = stored[2] or None
+    instance._image_changed = (instance.image.name or None) != previous_image
+    if instance._image_changed:
+        instance.has_thumbnails = False
+
+
+@receiver(post_save, sender=Product)
+def invalidate_saved_product(sender, instance, **kwargs):
+    """Invalidate the cached catalog pages showing the product."""
+    scopes: list[str] = product_scopes(
+        instance.pk, instance.category_id, instance.seller_id
+    )
+    previous = getattr(instance, "_previous_relations", None)
+    if previous is not None:
+        scopes += product_scopes(instance.pk, *previous)
+    bump_versions(scopes)
+
+
+@receiver(post_save, sender=Product)
+def render_thumbnails(sender, instance, **kwargs):
+    """Render the thumbnails of a new image once it is committed."""
+    if instance.image and getattr(instance, "_image_changed", False):
+        product_id, image_name = instance.pk, instance.image.name
+        transaction.on_commit(
+            lambda: schedule_thumbnails(product_id, image_name),
+            using=kwargs["using"],
+        )
+
+
+@receiver(post_delete, sender=Product)
+def invalidate_deleted_product(sender, instance, **kwargs):
+    """Invalidate the cached catalog pages showing the product."""
+    bump_versions(
+        product_scopes(instance.pk, instance.category_id, instance.seller_id)
+    )
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_category(sender, instance, **kwargs):
+    """
+    Category names are part of every product representation,
+    so a category change invalidates the whole catalog.
+    """
+    bump_versions([CATALOG_SCOPE, "categories"])
+
+
+@receiver(post_save, sender=Product)
+def index_product(sender, instance, using, **kwargs):
+    """Keep the product search index current."""
+    get_search_backend(using).index_products([instance.pk])
+
+
+@receiver(post_delete, sender=Product)
+def unindex_product(sender, instance, using, **kwargs):
+    """Drop a deleted product from the search index."""
+    get_search_backend(using).remove([instance.pk])
+
+
+@receiver(post_save, sender=Category)
+def reindex_category_products(sender, instance, created, using, **kwargs):
+    """The category name is part of its products' search documents."""
+    if not created:
+        get_search_backend(using).index("p.category_id = %s", [instance.pk])
+
+
+@receiver(pre_save, sender=settings.AUTH_USER_MODEL)
+def remember_previous_email(sender, instance, **kwargs):
+    """Keep the stored email of an edited user."""
+    instance._previous_email = None
+    update_fields = kwargs.get("update_fields")
+    if instance.pk is not None and (
+        update_fields is None or "email" in update_fields
+    ):
+        instance._previous_email = (
+            sender.objects.filter(pk=instance.pk)
+            .values_list("email", flat=True)
+            .first()
+        )
+
+
+def email_changed(instance) -> bool:
+    previous = getattr(instance, "_previous_email", None)
+    return previous is not None and previous != instance.email
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def invalidate_seller(sender, instance, **kwargs):
+    """
+    Seller emails are part of every product representation, so a
+    changed email invalidates the whole catalog.
+    """
+    if email_changed(instance):
+        bump_versions([CATALOG_SCOPE])
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def reindex_seller_products(sender, instance, using, **kwargs):
+    """The seller email is part of its products' search documents."""
+    if email_changed(instance):
+        get_search_backend(using).index("p.seller_id = %s", [instance.pk])
@@ -1,3 +1,1114 @@
-from django.test import TestCase
+# Python modules
+import json
+import shutil
+import threading
+from decimal import Decimal
+from io import BytesIO, StringIO
+from tempfile import NamedTemporaryFile, mkdtemp
+from unittest import skipUnless
+from unittest.mock import patch
 
-# Create your tests here.
+# Third party modules
+from PIL import Image
+
+# Django modules
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection
+from django.core.files.storage import default_storage
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+# Project modules
+from apps.users.models import CustomUser
+from apps.products.cache import (
+    CATALOG_SCOPE,
+    cache_stats,
+    get_versions,
+    reset_cache_stats,
+)
+from apps.products.imports import MAX_ERRORS, import_products
+from apps.products.models import (
+    Category,
+    Product,
+    ProductRatingStats,
+    StockShard,
+)
+from apps.products import thumbnails
+from apps.products.search import (
+    SearchTableBackend,
+    get_search_backend,
+)
+from apps.products.thumbnails import (
+    generate_thumbnails,
+    process_product_image,
+    rendition_name,
+    schedule_thumbnails,
+    wait_for_thumbnails,
+)
+from apps.orders.models import Review
+
+
+@skipUnless(connection.vendor == "sqlite", "EXPLAIN QUERY PLAN is SQLite only")
+class ProductIndexesTestCase(TestCase):
+    """Query plan tests for the products indexes."""
+
+    def assertUsesIndex(self, queryset, index_name):
+        plan = queryset.explain()
+        self.assertRegex(plan, rf"INDEX {index_name}\b")
+        self.assertNotIn("TEMP B-TREE", plan)
+
+    def test_products_by_category(self):
+        self.assertUsesIndex(
+            Product.objects.filter(category_id=1).order_by(
+                "-created_at", "-id"
+            ),
+            "product_category_created_idx",
+        )
+
+    def test_products_listing(self):
+        self.assertUsesIndex(
+            Product.objects.order_by("-created_at", "-id"),
+            "product_created_idx",
+        )
+
+    def test_products_by_seller(self):
+        self.assertUsesIndex(
+            Product.objects.filter(seller_id=1).order_by(
+                "-created_at", "-id"
+            ),
+            "product_seller_created_idx",
+        )
+
+
+class ProductRatingStatsTestCase(TestCase):
+    """Denormalized rating aggregates tests."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_user(
+            email="author@example.com", username="author", password="12345"
+        )
+        category = Category.objects.create(name="Books")
+        cls.product = Product.objects.create(
+            category=category, seller=cls.user, name="Book", price=10
+        )
+        cls.other_product = Product.objects.create(
+            category=category, seller=cls.user, name="Pen", price=1
+        )
+
+    def review(self, rate, product=None):
+        return Review.objects.create(
+            product=product or self.product,
+            author=self.user,
+            rate=rate,
+            text="Text",
+        )
+
+    def stats(self, product=None):
+        return ProductRatingStats.objects.get(product=product or self.product)
+
+    def test_reviews_update_stats(self):
+        self.review(5)
+        self.review(4)
+        review = self.review(1)
+
+        stats = self.stats()
+        self.assertEqual(stats.rating_count, 3)
+        self.assertAlmostEqual(stats.rating_avg, 10 / 3)
+        self.assertEqual(stats.histogram, {0: 0, 1: 1, 2: 0, 3: 0, 4: 1, 5: 1})
+
+        review.rate = 3
+        review.save()
+        stats = self.stats()
+        self.assertAlmostEqual(stats.rating_avg, 4.0)
+        self.assertEqual(stats.stars_1, 0)
+        self.assertEqual(stats.stars_3, 1)
+
+        review.product = self.other_product
+        review.save()
+        self.assertEqual(self.stats().rating_count, 2)
+        self.assertAlmostEqual(self.stats().rating_avg, 4.5)
+        self.assertEqual(self.stats(self.other_product).rating_count, 1)
+
+    def test_deleting_last_review(self):
+        review = self.review(5)
+        review.delete()
+
+        stats = self.stats()
+        self.assertEqual(stats.rating_count, 0)
+        self.assertEqual(stats.rating_avg, 0.0)
+        self.assertEqual(stats.stars_5, 0)
+
+    def test_deleting_reviewed_products(self):
+        self.review(5)
+        self.review(3, self.other_product)
+        self.product.delete()
+        self.assertFalse(
+            ProductRatingStats.objects.filter(product_id=self.product.pk)
+        )
+
+        # And by cascade from the category
+        self.other_product.category.delete()
+        self.assertFalse(ProductRatingStats.objects.exists())
+        self.assertFalse(Review.objects.exists())
+
+    def test_rebuild(self):
+        Review.objects.bulk_create(
+            Review(product=self.product, author=self.user, rate=rate, text="")
+            for rate in (2, 3, 3)
+        )
+
+        call_command("rebuildratings", stdout=StringIO())
+
+        stats = self.stats()
+        self.assertEqual(stats.rating_count, 3)
+        self.assertAlmostEqual(stats.rating_avg, 8 / 3)
+        self.assertEqual(stats.stars_3, 2)
+        self.assertEqual(self.stats(self.other_product).rating_count, 0)
+        self.assertEqual(
+            list(
+                Product.objects.order_by("-rating_stats__rating_avg")
+                .values_list("name", flat=True)
+            ),
+            ["Book", "Pen"],
+        )
+
+
+class CatalogAPITestCase(TestCase):
+    """Catalog endpoints tests."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.seller = CustomUser.objects.create_user(
+            email="seller@example.com", username="seller", password="12345"
+        )
+        cls.other_seller = CustomUser.objects.create_user(
+            email="other@example.com", username="other", password="12345"
+        )
+        cls.books = Category.objects.create(name="Books")
+        cls.pens = Category.objects.create(name="Pens")
+        # Same created_at for all rows, so the id breaks the ties
+        Product.objects.bulk_create(
+            Product(
+                category=cls.books if i % 2 else cls.pens,
+                seller=cls.seller if i % 3 else cls.other_seller,
+                name=f"Product {i}",
+                price=i,
+            )
+            for i in range(1, 31)
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def get_all(self, params, page_size):
+        ids, url = [], reverse("product-list")
+        params = {**params, "page_size": page_size}
+        while url:
+            with self.assertNumQueries(1):
+                response = self.client.get(url, params)
+            self.assertEqual(response.status_code, 200)
+            data = response.json()
+            ids += [product["id"] for product in data["results"]]
+            url, params = data["next"], {}
+        return ids
+
+    def test_pages_cover_every_product_once(self):
+        expected = list(
+            Product.objects.order_by("-created_at", "-id")
+            .values_list("id", flat=True)
+        )
+        for page_size in (1, 7, 30, 100):
+            self.assertEqual(self.get_all({}, page_size), expected)
+
+    def test_filters(self):
+        ids = self.get_all(
+            {
+                "category": self.books.id,
+                "seller": self.seller.id,
+                "min_price": "5",
+                "max_price": "20.50",
+            },
+            4,
+        )
+        expected = Product.objects.filter(
+            category=self.books,
+            seller=self.seller,
+            price__gte=5,
+            price__lte=20,
+        )
+        self.assertEqual(sorted(ids), sorted(p.id for p in expected))
+
+    def test_product_representation(self):
+        response = self.client.get(reverse("product-list"), {"page_size": 1})
+        product = Product.objects.latest("id")
+
+        self.assertEqual(
+            response.json()["results"][0],
+            {
+                "id": product.id,
+                "name": product.name,
+                "price": "30.00",
+                "thumbnail": None,
+                "created_at": DjangoJSONEncoder().default(product.created_at),
+                "category": {"id": self.pens.id, "name": "Pens"},
+                "seller": {
+                    "id": self.other_seller.id,
+                    "email": "other@example.com",
+                },
+            },
+        )
+
+    def test_invalid_parameters(self):
+        for params in (
+            {"cursor": "not-a-cursor"},
+            {"page_size": 0},
+            {"min_price": "cheap"},
+            {"category": "books"},
+        ):
+            response = self.client.get(reverse("product-list"), params)
+            self.assertEqual(response.status_code, 400, params)
+
+    def test_product_detail(self):
+        product = Product.objects.first()
+
+        response = self.client.get(reverse("product-detail", args=[product.id]))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["name"], product.name)
+        self.assertEqual(
+            self.client.get(reverse("product-detail", args=[0])).status_code,
+            404,
+        )
+
+    async def test_async_client(self):
+        product = await Product.objects.order_by("-created_at", "-id").afirst()
+        response = await self.async_client.get(
+            reverse("product-list"), {"page_size": 1}
+        )
+        self.assertEqual(response.json()["results"][0]["id"], product.id)
+        response = await self.async_client.get(
+            reverse("product-detail", args=[product.id])
+        )
+        self.assertEqual(response.json()["name"], product.name)
+        response = await self.async_client.get(
+            reverse("product-detail", args=[0])
+        )
+        self.assertEqual(response.status_code, 404)
+
+    def test_category_list(self):
+        response = self.client.get(reverse("category-list"), {"page_size": 1})
+        data = response.json()
+
+        self.assertEqual(data["results"][0]["name"], "Books")
+        response = self.client.get(data["next"])
+        self.assertEqual(response.json()["results"][0]["name"], "Pens")
+        self.assertIsNone(response.json()["next"])
+
+
+class CatalogCacheTestCase(TestCase):
+    """Catalog response cache tests."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.seller = CustomUser.objects.create_user(
+            email="seller@example.com", username="seller", password="12345"
+        )
+        cls.books = Category.objects.create(name="Books")
+        cls.pens = Category.objects.create(name="Pens")
+        cls.book = Product.objects.create(
+            category=cls.books, seller=cls.seller, name="Book", price=10
+        )
+        cls.pen = Product.objects.create(
+            category=cls.pens, seller=cls.seller, name="Pen", price=1
+        )
+
+    def setUp(self):
+        cache.clear()
+        reset_cache_stats()
+
+    def get(self, name, **params):
+        args = [params.pop("pk")] if "pk" in params else []
+        response = self.client.get(reverse(name, args=args), params)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_repeated_reads_are_served_from_cache(self):
+        self.assertEqual(self.get("product-list")["X-Cache"], "MISS")
+        with self.assertNumQueries(0):
+            response = self.get("product-list")
+        self.assertEqual(response["X-Cache"], "HIT")
+        self.assertEqual(cache_stats(), {"hits": 1, "misses": 1})
+
+    def test_product_change_invalidates_its_pages_only(self):
+        self.get("product-list", category=self.books.id)
+        self.get("product-list", category=self.pens.id)
+        self.get("product-detail", pk=self.book.id)
+
+        self.book.name = "Novel"
+        self.book.save()
+
+        response = self.get("product-list", category=self.books.id)
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertEqual(response.json()["results"][0]["name"], "Novel")
+        response = self.get("product-detail", pk=self.book.id)
+        self.assertEqual(response.json()["name"], "Novel")
+        self.assertEqual(
+            self.get("product-list", category=self.pens.id)["X-Cache"], "HIT"
+        )
+
+    def test_moving_product_invalidates_old_category(self):
+        self.get("product-list", category=self.pens.id)
+
+        self.pen.category = self.books
+        self.pen.save()
+
+        self.assertEqual(
+            self.get("product-list", category=self.pens.id).json()["results"],
+            [],
+        )
+
+    def test_deleting_product(self):
+        self.get("product-list", seller=self.seller.id)
+
+        self.pen.delete()
+
+        response = self.get("product-list", seller=self.seller.id)
+        self.assertEqual(len(response.json()["results"]), 1)
+
+    def test_category_change_invalidates_catalog(self):
+        self.get("product-list", seller=self.seller.id)
+        self.get("category-list")
+
+        self.books.name = "Literature"
+        self.books.save()
+
+        names = {
+            product["category"]["name"]
+            for product in self.get(
+                "product-list", seller=self.seller.id
+            ).json()["results"]
+        }
+        self.assertIn("Literature", names)
+        self.assertEqual(self.get("category-list")["X-Cache"], "MISS")
+
+    def test_filter_spellings_share_their_scope(self):
+        self.get("product-list", category="01")
+
+        self.book.price = 12
+        self.book.save()
+
+        response = self.get("product-list", category="01")
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertEqual(response.json()["results"][0]["price"], "12.00")
+
+    def test_seller_email_change_invalidates_catalog(self):
+        self.get("product-list")
+        self.get("product-detail", pk=self.book.id)
+
+        self.seller.last_name = "Seller"
+        self.seller.save()
+        self.assertEqual(self.get("product-list")["X-Cache"], "HIT")
+
+        self.seller.email = "shop@example.com"
+        self.seller.save()
+        for response in (
+            self.get("product-list"),
+            self.get("product-detail", pk=self.book.id),
+        ):
+            self.assertEqual(response["X-Cache"], "MISS")
+        self.assertEqual(
+            response.json()["seller"]["email"], "shop@example.com"
+        )
+
+
+class ProductSearchTestCase(TestCase):
+    """Full-text product search tests."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.seller = CustomUser.objects.create_user(
+            email="acme@example.com", username="acme", password="12345"
+        )
+        cls.books = Category.objects.create(name="Books")
+        cls.garden = Category.objects.create(name="Garden")
+        cls.novel = Product.objects.create(
+            category=cls.books,
+            seller=cls.seller,
+            name="Lorem novel",
+            description="A story about a garden",
+            price=10,
+        )
+        cls.shovel = Product.objects.create(
+            category=cls.garden, seller=cls.seller, name="Shovel", price=20
+        )
+
+    def search(self, query):
+        return list(
+            Product.objects.search(query).values_list("name", flat=True)
+        )
+
+    def test_ranks_name_and_category_above_description(self):
+        self.assertEqual(self.search("garden"), ["Shovel", "Lorem novel"])
+
+    def test_prefix_and_all_words(self):
+        self.assertEqual(self.search("nov lor"), ["Lorem novel"])
+        self.assertEqual(self.search("novel shovel"), [])
+
+    def test_seller_email(self):
+        self.assertEqual(len(self.search("acme")), 2)
+
+    def test_search_syntax_is_ignored(self):
+        self.assertEqual(self.search('"novel" OR NEAR('), [])
+        self.assertEqual(self.search("  "), [])
+
+    def test_index_follows_changes(self):
+        self.shovel.name = "Rake"
+        self.shovel.save()
+        self.assertEqual(self.search("rake"), ["Rake"])
+        self.assertEqual(self.search("shovel"), [])
+
+        self.garden.name = "Tools"
+        self.garden.save()
+        self.assertEqual(self.search("tools"), ["Rake"])
+
+        self.seller.email = "shop@example.com"
+        self.seller.save()
+        self.assertEqual(len(self.search("shop")), 2)
+
+        self.novel.delete()
+        self.assertEqual(self.search("lorem"), [])
+
+    def test_rebuild(self):
+        get_search_backend().clear()
+        self.assertEqual(self.search("shovel"), [])
+
+        call_command("rebuildsearchindex", stdout=StringIO())
+
+        self.assertEqual(self.search("shovel"), ["Shovel"])
+
+    def test_failed_rebuild_keeps_the_index(self):
+        backend = get_search_backend()
+        with patch.object(
+            type(backend), "index_range", side_effect=RuntimeError
+        ), self.assertRaises(RuntimeError):
+            backend.rebuild(Product.objects.all())
+
+        self.assertEqual(self.search("shovel"), ["Shovel"])
+
+    def test_backends_must_implement_the_index(self):
+        class IncompleteBackend(SearchTableBackend):
+            def index(self, where, params):
+                pass
+
+        with self.assertRaises(TypeError):
+            IncompleteBackend("default")
+
+    def test_admin_search(self):
+        admin = CustomUser.objects.create_superuser(
+            email="admin@example.com", username="admin", password="12345"
+        )
+        self.client.force_login(admin)
+
+        response = self.client.get(
+            reverse("admin:products_product_changelist"), {"q": "shov"}
+        )
+
+        self.assertEqual(
+            [product.name for product in response.context["cl"].result_list],
+            ["Shovel"],
+        )
+
+
+class ProductAdminTestCase(TestCase):
+    """Product admin changelist tests."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = CustomUser.objects.create_superuser(
+            email="admin@example.com", username="admin", password="12345"
+        )
+
+    def add_products(self, start, count):
+        for i in range(start, start + count):
+            Product.objects.create(
+                category=Category.objects.create(name=f"Category {i}"),
+                seller=CustomUser.objects.create_user(
+                    email=f"seller{i}@example.com", username=f"seller{i}"
+                ),
+                name=f"Product {i}",
+                price="1.00",
+            )
+
+    def test_changelist_queries_do_not_grow_with_rows(self):
+        self.client.force_login(self.admin)
+        url = reverse("admin:products_product_changelist")
+        self.add_products(0, 1)
+        with CaptureQueriesContext(connection) as context:
+            self.client.get(url)
+
+        self.add_products(1, 20)
+        with self.assertNumQueries(len(context)):
+            response = self.client.get(url)
+        self.assertEqual(len(response.context["cl"].result_list), 21)
+
+    def test_changelist_cursor_navigation(self):
+        self.client.force_login(self.admin)
+        url = reverse("admin:products_product_changelist")
+        self.add_products(0, 3)
+        names = list(
+            Product.objects.order_by("-created_at", "-id")
+            .values_list("name", flat=True)
+        )
+
+        with patch(
+            "apps.products.admin.ProductAdmin.list_per_page", 2
+        ):
+            response = self.client.get(url)
+            paginator = response.context["cl"].paginator
+            self.assertEqual(
+                [p.name for p in response.context["cl"].result_list], names[:2]
+            )
+            self.assertFalse(response.context["cl"].show_full_result_count)
+            self.assertContains(response, "?cursor=")
+
+            response = self.client.get(url, {"cursor": paginator.next_cursor})
+            self.assertEqual(
+                [p.name for p in response.context["cl"].result_list], names[2:]
+            )
+            self.assertIsNone(response.context["cl"].paginator.next_cursor)
+            self.assertContains(response, "First")
+
+            # Sorting on another column goes back to numbered pages
+            response = self.client.get(url, {"o": "2"})
+            self.assertIsNone(response.context["cl"].paginator.template_name)
+
+            response = self.client.get(url, {"cursor": "garbage"})
+            self.assertRedirects(
+                response, f"{url}?e=1", fetch_redirect_response=False
+            )
+
+
+class ProductImportTestCase(TestCase):
+    """Bulk product import tests."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.seller = CustomUser.objects.create_user(
+            email="seller@example.com", username="seller"
+        )
+        cls.other_seller = CustomUser.objects.create_user(
+            email="other@example.com", username="other"
+        )
+        cls.books = Category.objects.create(name="Books")
+        cls.pens = Category.objects.create(name="Pens")
+
+    def csv(self, *lines):
+        return BytesIO(
+            "\n".join(["sku,name,description,price,category", *lines]).encode()
+        )
+
+    def test_csv_creates_then_updates_by_seller_and_sku(self):
+        Product.objects.create(
+            category=self.books,
+            seller=self.other_seller,
+            sku="B-1",
+            name="Other book",
+            price=5,
+        )
+        report = import_products(
+            self.csv("B-1,Book,A book,10.50,books", "P-1,Pen,,1,Pens"),
+            self.seller,
+        )
+        self.assertEqual((report.rows, report.imported), (2, 2))
+        self.assertEqual(report.error_count, 0)
+        book = Product.objects.get(seller=self.seller, sku="B-1")
+        self.assertEqual(book.category, self.books)
+        self.assertEqual(book.price, Decimal("10.50"))
+        self.assertIsNone(Product.objects.get(sku="P-1").description)
+
+        created_at = book.created_at
+        import_products(self.csv("B-1,Novel,,12,Pens"), self.seller)
+        book.refresh_from_db()
+        self.assertEqual(
+            (book.name, book.price, book.category), ("Novel", 12, self.pens)
+        )
+        self.assertEqual(book.created_at, created_at)
+        self.assertEqual(Product.objects.filter(sku="B-1").count(), 2)
+        self.assertEqual(
+            [product.pk for product in Product.objects.search("novel")],
+            [book.pk],
+        )
+
+    def test_invalid_rows_are_reported_and_skipped(self):
+        report = import_products(
+            self.csv(
+                "B-1,Book,,10,Books",
+                ",No sku,,1,Books",
+                "B-2,Bad price,,ten,Books",
+                "B-3,Unknown category,,1,Toys",
+                "B-4,Too precise,,1.005,Books",
+                "B-5,Pen,,2,Pens",
+            ),
+            self.seller,
+            batch_size=2,
+        )
+        self.assertEqual((report.rows, report.imported), (6, 2))
+        self.assertEqual(
+            [line_number for line_number, _ in report.errors], [3, 4, 5, 6]
+        )
+        self.assertIn("sku", report.errors[0][1])
+        self.assertIn("Unknown category 'Toys'", report.errors[2][1])
+        self.assertEqual(
+            set(Product.objects.values_list("sku", flat=True)), {"B-1", "B-5"}
+        )
+
+    def test_errors_are_counted_past_the_report_limit(self):
+        report = import_products(
+            self.csv(*[f"B-{i},Book,,x,Books" for i in range(MAX_ERRORS + 5)]),
+            self.seller,
+        )
+        self.assertEqual(report.error_count, MAX_ERRORS + 5)
+        self.assertEqual(len(report.errors), MAX_ERRORS)
+
+    def test_ndjson_with_created_categories_and_repeated_skus(self):
+        lines = [
+            {"sku": "T-1", "name": "Kite", "price": 19.99, "category": "Toys"},
+            {"sku": "T-2", "name": "Ball", "price": "3", "category": "toys"},
+            {"sku": "T-1", "name": "Red kite", "price": 20, "category": "Toys"},
+        ]
+        stream = BytesIO(
+            b"\n".join(json.dumps(line).encode() for line in lines)
+            + b"\nnot json\n"
+        )
+        report = import_products(
+            stream, self.seller, "ndjson", create_categories=True
+        )
+        self.assertEqual(report.imported, 2)
+        self.assertEqual(report.errors[0][0], 4)
+        self.assertEqual(Category.objects.filter(name__iexact="toys").count(), 1)
+        kite = Product.objects.get(sku="T-1")
+        self.assertEqual((kite.name, kite.price), ("Red kite", 20))
+
+        report = import_products(
+            BytesIO(json.dumps(lines[0]).encode()), self.seller, "ndjson"
+        )
+        self.assertEqual(report.imported, 1)
+        self.assertEqual(
+            Product.objects.get(sku="T-1").price, Decimal("19.99")
+        )
+
+    def test_import_bumps_the_catalog_version(self):
+        version = get_versions([CATALOG_SCOPE])
+        import_products(self.csv("B-1,Book,,10,Books"), self.seller)
+        self.assertNotEqual(get_versions([CATALOG_SCOPE]), version)
+
+    def test_command(self):
+        with NamedTemporaryFile(suffix=".csv") as file:
+            file.write(self.csv("B-1,Book,,10,Books", "B-2,Pen,,x,Pens").read())
+            file.flush()
+            out, err = StringIO(), StringIO()
+            call_command(
+                "importproducts",
+                file.name,
+                seller="SELLER@example.com",
+                stdout=out,
+                stderr=err,
+            )
+        self.assertIn("imported 1 products", out.getvalue())
+        self.assertIn("rows/s", out.getvalue())
+        self.assertIn("Line 3: price", err.getvalue())
+
+        call_command(
+            "importproducts",
+            "-",
+            seller=str(self.seller.pk),
+            format="ndjson",
+            stdin=BytesIO(b'{"sku": "B-3", "name": "Ink", "price": 2, '
+                          b'"category": "Pens"}'),
+            stdout=StringIO(),
+        )
+        self.assertTrue(Product.objects.filter(sku="B-3").exists())
+
+        with self.assertRaisesMessage(CommandError, "Unknown seller"):
+            call_command("importproducts", "-", seller="nobody@example.com")
+
+    def test_admin_upload(self):
+        admin_user = CustomUser.objects.create_superuser(
+            email="admin@example.com", username="admin", password="12345"
+        )
+        self.client.force_login(admin_user)
+        url = reverse("admin:products_product_import")
+        self.assertContains(
+            self.client.get(reverse("admin:products_product_changelist")), url
+        )
+        response = self.client.post(
+            url,
+            {
+                "file": SimpleUploadedFile(
+                    "products.csv", self.csv("B-1,Book,,10,Books").read()
+                ),
+                "seller": "seller@example.com",
+            },
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context["report"].imported, 1)
+        self.assertContains(response, "imported 1 products")
+        self.assertTrue(
+            Product.objects.filter(seller=self.seller, sku="B-1").exists()
+        )
+
+
+def image_file(name="photo.png", size=(1200, 800), mode="RGBA", color="red"):
+    output = BytesIO()
+    Image.new(mode, size, color).save(output, "PNG")
+    return SimpleUploadedFile(name, output.getvalue(), "image/png")
+
+
+class MediaRootMixin:
+    """Stores the uploads of a test class in a temporary MEDIA_ROOT."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.media_root = mkdtemp()
+        cls.media_override = override_settings(MEDIA_ROOT=cls.media_root)
+        cls.media_override.enable()
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        cls.media_override.disable()
+        shutil.rmtree(cls.media_root, ignore_errors=True)
+
+
+@override_settings(
+    PRODUCT_THUMBNAIL_SIZES={"small": 100, "large": 400},
+    PRODUCT_THUMBNAIL_FORMATS=("webp", "jpeg"),
+)
+class ProductThumbnailTestCase(MediaRootMixin, TestCase):
+    """Product image rendition tests."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.seller = CustomUser.objects.create_user(
+            email="seller@example.com", username="seller"
+        )
+        cls.category = Category.objects.create(name="Books")
+
+    def create_product(self, **kwargs):
+        return Product.objects.create(
+            category=self.category,
+            seller=self.seller,
+            name="Book",
+            price=1,
+            **kwargs,
+        )
+
+    def test_rendition_names_are_deterministic(self):
+        self.assertEqual(
+            rendition_name("products/photo.png", "small", "webp"),
+            "thumbnails/products/photo.png/small.webp",
+        )
+        self.assertEqual(
+            rendition_name("products/photo.png", "large", "jpeg"),
+            "thumbnails/products/photo.png/large.jpg",
+        )
+
+    def test_images_sharing_a_stem_get_their_own_renditions(self):
+        png = self.create_product(image=image_file("shoe.png"))
+        jpg = self.create_product(image=image_file("shoe.jpg", color="blue"))
+
+        for product in (png, jpg):
+            self.assertTrue(
+                process_product_image(product.pk, product.image.name)
+            )
+            product.refresh_from_db()
+
+        self.assertTrue(png.has_thumbnails and jpg.has_thumbnails)
+        self.assertNotEqual(png.thumbnail_url(), jpg.thumbnail_url())
+        with default_storage.open(
+            rendition_name(jpg.image.name, "small", "jpeg")
+        ) as file:
+            red, green, blue = Image.open(file).getpixel((0, 0))
+        self.assertGreater(blue, red)
+
+    def test_generate_thumbnails(self):
+        name = default_storage.save("products/photo.png", image_file())
+        written = generate_thumbnails(name)
+        self.assertEqual(len(written), 4)
+        with default_storage.open(
+            rendition_name(name, "small", "webp")
+        ) as file:
+            image = Image.open(file)
+            self.assertEqual((image.format, image.size), ("WEBP", (100, 67)))
+        with default_storage.open(
+            rendition_name(name, "large", "jpeg")
+        ) as file:
+            image = Image.open(file)
+            self.assertEqual(
+                (image.format, image.mode, image.size), ("JPEG", "RGB", (400, 267))
+            )
+
+        # Existing renditions are kept, or replaced in place with force
+        self.assertEqual(generate_thumbnails(name), [])
+        self.assertEqual(
+            sorted(generate_thumbnails(name, force=True)), sorted(written)
+        )
+
+    def test_new_image_is_scheduled_after_commit(self):
+        with patch(
+            "apps.products.signals.schedule_thumbnails"
+        ) as schedule, self.captureOnCommitCallbacks(execute=True):
+            product = self.create_product(image=image_file())
+        schedule.assert_called_once_with(product.pk, product.image.name)
+
+        product.has_thumbnails = True
+        product.save()
+        with patch(
+            "apps.products.signals.schedule_thumbnails"
+        ) as schedule, self.captureOnCommitCallbacks(execute=True):
+            product.name = "Novel"
+            product.save()
+            self.assertTrue(product.has_thumbnails)
+            product.image = image_file("other.png")
+            product.save()
+        self.assertFalse(product.has_thumbnails)
+        schedule.assert_called_once_with(product.pk, product.image.name)
+
+    def test_thumbnail_urls(self):
+        self.assertIsNone(self.create_product().thumbnail_url())
+
+        product = self.create_product(image=image_file())
+        self.assertEqual(product.thumbnail_url(), product.image.url)
+
+        self.assertTrue(process_product_image(product.pk, product.image.name))
+        product.refresh_from_db()
+        self.assertTrue(product.has_thumbnails)
+        self.assertEqual(
+            product.thumbnail_url("large", "jpeg"),
+            default_storage.url(
+                rendition_name(product.image.name, "large", "jpeg")
+            ),
+        )
+        self.assertEqual(
+            set(product.thumbnail_urls()["small"]), {"webp", "jpeg"}
+        )
+        response = self.client.get(reverse("product-detail", args=[product.pk]))
+        self.assertEqual(
+            response.json()["thumbnails"]["small"]["webp"],
+            product.thumbnail_url("small", "webp"),
+        )
+
+    def test_replaced_image_is_not_flagged(self):
+        product = self.create_product(image=image_file())
+        old_name = product.image.name
+        product.image = image_file("other.png")
+        product.save()
+        self.assertFalse(process_product_image(product.pk, old_name))
+        product.refresh_from_db()
+        self.assertFalse(product.has_thumbnails)
+
+
+@override_settings(PRODUCT_THUMBNAIL_SIZES={"small": 100})
+class BackfillThumbnailsTestCase(MediaRootMixin, TransactionTestCase):
+    """Thumbnail backfill command tests."""
+
+    def test_backfill(self):
+        seller = CustomUser.objects.create_user(
+            email="seller@example.com", username="seller"
+        )
+        category = Category.objects.create(name="Books")
+        with patch("apps.products.signals.schedule_thumbnails"):
+            products = [
+                Product.objects.create(
+                    category=category,
+                    seller=seller,
+                    name=f"Book {i}",
+                    price=1,
+                    image=image_file(f"photo{i}.png", (300, 200)),
+                )
+                for i in range(5)
+            ]
+        Product.objects.create(
+            category=category, seller=seller, name="No image", price=1
+        )
+
+        out = StringIO()
+        call_command(
+            "backfillthumbnails", workers=3, batch_size=2, stdout=out
+        )
+        self.assertIn("of 5 products", out.getvalue())
+        self.assertEqual(
+            Product.objects.filter(has_thumbnails=True).count(), 5
+        )
+        for product in products:
+            self.assertTrue(
+                default_storage.exists(
+                    rendition_name(product.image.name, "small", "webp")
+                )
+            )
+
+        out = StringIO()
+        call_command("backfillthumbnails", stdout=out)
+        self.assertIn("of 0 products", out.getvalue())
+
+    def test_uploads_are_flagged_by_the_writer_thread(self):
+        seller = CustomUser.objects.create_user(
+            email="seller@example.com", username="seller"
+        )
+        category = Category.objects.create(name="Books")
+        with patch("apps.products.signals.schedule_thumbnails"):
+            products = [
+                Product.objects.create(
+                    category=category,
+                    seller=seller,
+                    name=f"Book {i}",
+                    price=1,
+                    image=image_file(f"photo{i}.png", (300, 200)),
+                )
+                for i in range(4)
+            ]
+
+        threads = set()
+        flag = thumbnails.flag_thumbnails
+
+        def flag_thumbnails(*args):
+            threads.add(threading.current_thread().name)
+            return flag(*args)
+
+        with patch.object(thumbnails, "flag_thumbnails", flag_thumbnails):
+            futures = [
+                schedule_thumbnails(product.pk, product.image.name)
+                for product in products
+            ]
+            wait_for_thumbnails()
+        self.assertEqual([future.result() for future in futures], [True] * 4)
+        self.assertEqual(
+            Product.objects.filter(has_thumbnails=True).count(), 4
+        )
+        self.assertEqual(len(threads), 1)
+        self.assertTrue(threads.pop().startswith("thumbnails-writer"))
+
+
+class ProductStockTestCase(TestCase):
+    """Stock decrement, sharding and setstock tests."""
+
+    @classmethod
+    def setUpTestData(cls):
+        seller = CustomUser.objects.create_user(
+            email="seller@example.com", username="seller"
+        )
+        category = Category.objects.create(name="Books")
+        cls.book, cls.pen, cls.mug = (
+            Product.objects.create(
+                category=category,
+                seller=seller,
+                name=name,
+                price="1.00",
+                stock=stock,
+            )
+            for name, stock in (("Book", 5), ("Pen", 2), ("Mug", None))
+        )
+
+    def stock(self, product):
+        product.refresh_from_db()
+        return product.available_stock()
+
+    def test_take_and_give(self):
+        taken = Product.objects.take_stock(
+            {self.book.pk: 3, self.pen.pk: 2, self.mug.pk: 7}
+        )
+        # The untracked mug is not counted
+        self.assertEqual(taken, {self.book.pk: 3, self.pen.pk: 2})
+        self.assertEqual(
+            (self.stock(self.book), self.stock(self.pen), self.stock(self.mug)),
+            (2, 0, None),
+        )
+
+        Product.objects.give_stock({self.pen.pk: 1, self.mug.pk: 1})
+        self.assertEqual((self.stock(self.pen), self.stock(self.mug)), (1, None))
+
+    def test_short_product_takes_nothing(self):
+        with self.assertRaises(ValidationError) as raised:
+            Product.objects.take_stock({self.book.pk: 1, self.pen.pk: 3})
+        self.assertEqual(raised.exception.params, {"products": [self.pen.pk]})
+        self.assertEqual((self.stock(self.book), self.stock(self.pen)), (5, 2))
+
+    def test_take_is_a_single_conditional_update(self):
+        with CaptureQueriesContext(connection) as context:
+            Product.objects.take_stock({self.book.pk: 1, self.pen.pk: 1})
+        updates = [
+            query["sql"] for query in context
+            if query["sql"].startswith("UPDATE")
+        ]
+        self.assertEqual(len(updates), 1)
+        self.assertIn('"stock" >=', updates[0])
+
+    def test_sharded_stock(self):
+        Product.objects.set_stock(self.book.pk, 10, shards=3)
+        self.assertEqual(
+            list(
+                StockShard.objects.filter(product=self.book)
+                .order_by("shard").values_list("quantity", flat=True)
+            ),
+            [4, 3, 3],
+        )
+        self.assertEqual(self.stock(self.book), 10)
+
+        Product.objects.take_stock({self.book.pk: 3})
+        # No row holds 6 units: they are drained from several rows
+        Product.objects.take_stock({self.book.pk: 6})
+        self.assertEqual(self.stock(self.book), 1)
+        with self.assertRaises(ValidationError):
+            Product.objects.take_stock({self.book.pk: 2})
+
+        Product.objects.give_stock({self.book.pk: 4})
+        self.assertEqual(self.stock(self.book), 5)
+
+        Product.objects.set_stock(self.book.pk, 7)
+        self.assertFalse(StockShard.objects.filter(product=self.book).exists())
+        self.assertEqual(self.stock(self.book), 7)
+
+    def test_setstock_command(self):
+        out = StringIO()
+        call_command("setstock", self.mug.pk, "8", shards=2, stdout=out)
+        self.assertIn("over 2 shards", out.getvalue())
+        self.assertEqual(self.stock(self.mug), 8)
+
+        call_command("setstock", self.mug.pk, "none", stdout=out)
+        self.assertIsNone(self.stock(self.mug))
+        with self.assertRaises(CommandError):
+            call_command("setstock", self.mug.pk, "none", shards=2)
+        with self.assertRaises(CommandError):
+            call_command("setstock", self.mug.pk, "-1")
+
+    def test_admin_edit_keeps_units_sold_meanwhile(self):
+        admin = CustomUser.objects.create_superuser(
+            email="admin@example.com", username="admin", password="12345"
+        )
+        self.client.force_login(admin)
+        url = reverse("admin:products_product_change", args=[self.book.pk])
+        form = {
+            "name": "Book, 2nd edition",
+            "price": "1.00",
+            "category": self.book.category_id,
+            "seller": self.book.seller_id,
+            "stock": "5",
+            "initial-stock": "5",
+        }
+        # Sold while the form was open
+        Product.objects.take_stock({self.book.pk: 2})
+        response = self.client.post(url, form)
+        self.assertEqual(response.status_code, 302)
+        self.book.refresh_from_db()
+        self.assertEqual((self.book.name, self.book.stock), (form["name"], 3))
+
+        self.client.post(url, {**form, "stock": "9"})
+        self.assertEqual(self.stock(self.book), 9)
@@ -0,0 +1,195 @@
+# Python modules
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from io import BytesIO
+from typing import Optional
+
+# Third party modules
+from PIL import Image, ImageOps
+
+# Django modules
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import Storage, default_storage
+from django.db import close_old_connections
+
+
+# Pillow encoder name and file extension of each rendition format
+FORMATS = {
+    "webp": ("WEBP", "webp"),
+    "jpeg": ("JPEG", "jpg"),
+}
+ENCODER_OPTIONS = {
+    "webp": {"quality": 80, "method": 4},
+    "jpeg": {"quality": 82, "optimize": True, "progressive": True},
+}
+
+_executor: Optional[ThreadPoolExecutor] = None
+_writer: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+_pending: set[Future] = set()
+
+
+def thumbnail_sizes() -> dict[str, int]:
+    """Rendition name -> longest side in pixels."""
+    return settings.PRODUCT_THUMBNAIL_SIZES
+
+
+def thumbnail_formats() -> tuple[str, ...]:
+    return tuple(settings.PRODUCT_THUMBNAIL_FORMATS)
+
+
+def rendition_name(image_name: str, size: str, image_format: str) -> str:
+    """
+    Storage path of a rendition, derived from the original's full path
+    only, so shoe.png and shoe.jpg don't share renditions:
+    products/shoe.png -> thumbnails/products/shoe.png/small.webp.
+    """
+    return f"thumbnails/{image_name}/{size}.{FORMATS[image_format][1]}"
+
+
+def render(source: Image.Image, size: int, image_format: str) -> bytes:
+    """Encoded rendition fitting in a size x size box."""
+    image: Image.Image = source.copy()
+    image.thumbnail((size, size), Image.Resampling.LANCZOS)
+    if image_format == "jpeg" or image.mode not in ("RGB", "RGBA"):
+        image = image.convert(
+            "RGBA" if image_format != "jpeg" and "A" in image.getbands()
+            else "RGB"
+        )
+    output = BytesIO()
+    image.save(
+        output, FORMATS[image_format][0], **ENCODER_OPTIONS[image_format]
+    )
+    return output.getvalue()
+
+
+def generate_thumbnails(
+    image_name: str,
+    storage: Storage = default_storage,
+    force: bool = False,
+) -> list[str]:
+    """
+    Writes the missing renditions of an image (every one with force);
+    returns the names written.
+    """
+    names: dict[tuple[str, str], str] = {
+        (size, image_format): rendition_name(image_name, size, image_format)
+        for size in thumbnail_sizes()
+        for image_format in thumbnail_formats()
+    }
+    if not force:
+        names = {
+            key: name for key, name in names.items()
+            if not storage.exists(name)
+        }
+    if not names:
+        return []
+
+    with storage.open(image_name, "rb") as file:
+        source: Image.Image = ImageOps.exif_transpose(Image.open(file))
+        source.load()
+    written: list[str] = []
+    for (size, image_format), name in names.items():
+        content: bytes = render(
+            source, thumbnail_sizes()[size], image_format
+        )
+        # Deterministic paths: replace rather than get a suffixed name
+        storage.delete(name)
+        written.append(storage.save(name, ContentFile(content)))
+    return written
+
+
+def flag_thumbnails(product_id: int, image_name: str) -> bool:
+    """
+    Marks the thumbnails of the product as rendered, unless its image
+    was replaced in the meantime.
+    """
+    from .cache import bump_versions, product_scopes
+    from .models import Product
+
+    product = Product.objects.filter(
+        pk=product_id, image=image_name
+    ).values_list("category_id", "seller_id").first()
+    if product is None:
+        return False
+    Product.objects.filter(pk=product_id, image=image_name).update(
+        has_thumbnails=True
+    )
+    bump_versions(product_scopes(product_id, *product))
+    return True
+
+
+def process_product_image(
+    product_id: int, image_name: str, force: bool = False
+) -> bool:
+    """Renders the thumbnails of a product image and flags the product."""
+    generate_thumbnails(image_name, force=force)
+    return flag_thumbnails(product_id, image_name)
+
+
+def flag_rendered(
+    rendered: Future, product_id: int, image_name: str
+) -> bool:
+    """Flags the product once the pool has rendered its thumbnails."""
+    rendered.result()
+    return flag_thumbnails(product_id, image_name)
+
+
+def run_in_worker(function, *args):
+    """Runs a task in a pool thread, which owns its database connection."""
+    close_old_connections()
+    try:
+        return function(*args)
+    finally:
+        close_old_connections()
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """
+    Pool rendering the thumbnails off the request path. Pillow releases
+    the GIL while decoding, resizing and encoding, so threads are
+    enough and share the process' settings and storage.
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.PRODUCT_THUMBNAIL_WORKERS,
+                thread_name_prefix="thumbnails",
+            )
+        return _executor
+
+
+def get_writer() -> ThreadPoolExecutor:
+    """
+    Single thread writing the flags of the rendered thumbnails: the
+    pool threads never touch the database, so they don't contend with
+    each other for the SQLite write lock.
+    """
+    global _writer
+    with _executor_lock:
+        if _writer is None:
+            _writer = ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix="thumbnails-writer"
+            )
+        return _writer
+
+
+def schedule_thumbnails(product_id: int, image_name: str) -> Future:
+    """
+    Renders the thumbnails in the pool and flags the product from the
+    writer thread; the returned future is the flag's.
+    """
+    rendered: Future = get_executor().submit(generate_thumbnails, image_name)
+    future: Future = get_writer().submit(
+        run_in_worker, flag_rendered, rendered, product_id, image_name
+    )
+    _pending.add(future)
+    future.add_done_callback(_pending.discard)
+    return future
+
+
+def wait_for_thumbnails(timeout: Optional[float] = None) -> None:
+    """Blocks until the scheduled renditions are written."""
+    wait(list(_pending), timeout=timeout)
@@ -0,0 +1,11 @@
+# Django modules
+from django.urls import path
+
+# Project modules
+from . import views
+
+urlpatterns = [
+    path("products/", views.product_list, name="product-list"),
+    path("products/<int:pk>/", views.product_detail, name="product-detail"),
+    path("categories/", views.category_list, name="category-list"),
+]
@@ -1,3 +1,210 @@
-from django.shortcuts import render
+# Python modules
+from decimal import Decimal, InvalidOperation
+from typing import Any, Optional
 
-# Create your views here.
+# Django modules
+from django.core.exceptions import ValidationError
+from django.db.models import QuerySet
+from django.http import Http404, HttpRequest, JsonResponse
+from django.views.decorators.http import require_GET
+
+# Project modules
+from apps.core.pagination import KeysetPaginator
+from .cache import aget_or_build
+from .models import Category, Product
+
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+PRODUCT_LIST_FIELDS = (
+    "id",
+    "name",
+    "price",
+    "image",
+    "has_thumbnails",
+    "created_at",
+    "category__id",
+    "category__name",
+    "seller__id",
+    "seller__email",
+)
+
+
+def serialize_product(product: Product) -> dict[str, Any]:
+    """Product representation shared by the catalog endpoints."""
+    return {
+        "id": product.id,
+        "name": product.name,
+        "price": product.price,
+        "thumbnail": product.thumbnail_url(),
+        "created_at": product.created_at,
+        "category": {
+            "id": product.category.id,
+            "name": product.category.name,
+        },
+        "seller": {
+            "id": product.seller.id,
+            "email": product.seller.email,
+        },
+    }
+
+
+def get_page_size(request: HttpRequest) -> int:
+    try:
+        page_size = int(request.GET.get("page_size", DEFAULT_PAGE_SIZE))
+    except ValueError:
+        raise ValidationError("page_size must be an integer.")
+    if not 1 <= page_size <= MAX_PAGE_SIZE:
+        raise ValidationError(
+            f"page_size must be between 1 and {MAX_PAGE_SIZE}."
+        )
+    return page_size
+
+
+# (query parameter, lookup, parser) of the product list filters
+PRODUCT_FILTERS = (
+    ("category", "category_id", int),
+    ("seller", "seller_id", int),
+    ("min_price", "price__gte", Decimal),
+    ("max_price", "price__lte", Decimal),
+)
+
+
+def product_filters(request: HttpRequest) -> dict[str, Any]:
+    """Parsed values of the product list filters given, by parameter."""
+    filters: dict[str, Any] = {}
+    for param, _, parse in PRODUCT_FILTERS:
+        value: Optional[str] = request.GET.get(param)
+        if value in (None, ""):
+            continue
+        try:
+            filters[param] = parse(value)
+        except (ValueError, InvalidOperation):
+            raise ValidationError(f"Invalid {param} value.")
+    return filters
+
+
+def filter_products(queryset: QuerySet, filters: dict[str, Any]) -> QuerySet:
+    """Applies the category, seller and price range filters."""
+    return queryset.filter(**{
+        lookup: filters[param]
+        for param, lookup, _ in PRODUCT_FILTERS
+        if param in filters
+    })
+
+
+async def paginated_data(
+    request: HttpRequest,
+    paginator: KeysetPaginator,
+    serialize,
+) -> dict[str, Any]:
+    objects, next_cursor = await paginator.apage(request.GET.get("cursor"))
+    next_url: Optional[str] = None
+    if next_cursor:
+        params = request.GET.copy()
+        params["cursor"] = next_cursor
+        next_url = request.build_absolute_uri(
+            f"{request.path}?{params.urlencode()}"
+        )
+    return {
+        "results": [serialize(obj) for obj in objects],
+        "next": next_url,
+    }
+
+
+async def cached_response(
+    request: HttpRequest, scopes: list[str], build
+) -> JsonResponse:
+    """Serves the data from the catalog cache, keyed by the full URL."""
+    data, hit = await aget_or_build(
+        request.build_absolute_uri(), scopes, build
+    )
+    response = JsonResponse(data)
+    response["X-Cache"] = "HIT" if hit else "MISS"
+    return response
+
+
+def product_list_scopes(filters: dict[str, Any]) -> list[str]:
+    """
+    Version counters a product list page depends on, named after the
+    parsed ids: ?category=01 depends on the same scope as ?category=1.
+    """
+    scopes: list[str] = [
+        f"{name}:{filters[name]}"
+        for name in ("category", "seller")
+        if name in filters
+    ]
+    return scopes or ["products"]
+
+
+def error_response(error: ValidationError) -> JsonResponse:
+    return JsonResponse({"detail": " ".join(error.messages)}, status=400)
+
+
+@require_GET
+async def product_list(request: HttpRequest) -> JsonResponse:
+    """List products, newest first."""
+    try:
+        filters: dict[str, Any] = product_filters(request)
+        queryset: QuerySet = filter_products(
+            Product.objects.select_related("category", "seller").only(
+                *PRODUCT_LIST_FIELDS
+            ),
+            filters,
+        )
+        paginator = KeysetPaginator(queryset, get_page_size(request))
+        return await cached_response(
+            request,
+            product_list_scopes(filters),
+            lambda: paginated_data(request, paginator, serialize_product),
+        )
+    except ValidationError as error:
+        return error_response(error)
+
+
+@require_GET
+async def product_detail(request: HttpRequest, pk: int) -> JsonResponse:
+    """Single product."""
+
+    async def build() -> dict[str, Any]:
+        try:
+            product: Product = await Product.objects.select_related(
+                "category", "seller"
+            ).aget(pk=pk)
+        except Product.DoesNotExist:
+            raise Http404("No product matches the given query.")
+        return {
+            **serialize_product(product),
+            "description": product.description,
+            "image": product.image.url if product.image else None,
+            "thumbnails": product.thumbnail_urls() if product.image else None,
+        }
+
+    return await cached_response(request, [f"product:{pk}"], build)
+
+
+@require_GET
+async def category_list(request: HttpRequest) -> JsonResponse:
+    """List categories by id."""
+    try:
+        paginator = KeysetPaginator(
+            Category.objects.only("id", "name", "description"),
+            get_page_size(request),
+            ordering=("id",),
+        )
+        return await cached_response(
+            request,
+            ["categories"],
+            lambda: paginated_data(
+                request,
+                paginator,
+                lambda category: {
+                    "id": category.id,
+                    "name": category.name,
+                    "description": category.description,
+                },
+            ),
+        )
+    except ValidationError as error:
+        return error_response(error)
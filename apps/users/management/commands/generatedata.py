@@ -1,287 +1,657 @@
 # Python modules
-from typing import Any
-from random import choice, choices, randint, uniform
+from typing import Any, Callable, Iterator, Optional
+from concurrent.futures import ProcessPoolExecutor
+from decimal import Decimal
+from random import Random
 from datetime import datetime
+from time import perf_counter
+import multiprocessing
 
 # Django modules
-from django.core.management.base import BaseCommand
+import django
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError, CommandParser
 from django.contrib.auth.hashers import make_password
-from django.db.models import QuerySet
+from django.db import connections, router, transaction
+from django.db.models import Max, Min, Model, QuerySet
 from django.utils import timezone
 
 # Project modules
 from apps.users.models import CustomUser
-from apps.products.models import Category, Product
-from apps.orders.models import CartItem, Order, OrderItem, Review
-
-
-class Command(BaseCommand):
-    help = "Generate tasks data for testing purposes"
-
-    EMAIL_DOMAINS = (
-        "example.com",
-        "test.com",
-        "sample.org",
-        "demo.net",
-        "mail.com",
-    )
-    SOME_WORDS = (
-        "lorem",
-        "ipsum",
-        "dolor",
-        "sit",
-        "amet",
-        "consectetur",
-        "adipiscing",
-        "elit",
-        "sed",
-        "do",
-        "eiusmod",
-        "tempor",
-        "incididunt",
-        "ut",
-        "labore",
-        "et",
-        "dolore",
-        "magna",
-        "aliqua",
-    )
-
-    def __generate_users(self, user_count: int = 20) -> None:
-        """
-        Generates users for testing purposes.
-        """
-
-        USER_PASSWORD = make_password(password="12345")
-        created_users: list[CustomUser] = []
-        users_before: int = CustomUser.objects.count()
-
-        for i in range(user_count):
-            username: str = f"user{i+1}"
-            email: str = f"user{i+1}@{choice(self.EMAIL_DOMAINS)}"
-            first_name: str = choice(self.SOME_WORDS).capitalize()
-            last_name: str = choice(self.SOME_WORDS).capitalize()
-            created_users.append(
-                CustomUser(
-                    username=username,
-                    email=email,
-                    password=USER_PASSWORD,
-                    first_name=first_name,
-                    last_name=last_name,
-                    phone=f"+7701{randint(1000000,9999999)}",
-                    is_seller=choice([True, False]),
-                    address=f"Street {randint(1, 50)}, City {randint(1, 10)}",
-                    date_joined=timezone.now(),
-                )
-            )
-
-        CustomUser.objects.bulk_create(created_users, ignore_conflicts=True)
-        users_after: int = CustomUser.objects.count()
-
-        self.stdout.write(
-            self.style.SUCCESS(
-                f"Created {users_after - users_before} CustomUser records."
-            )
+from apps.products.cache import CATALOG_SCOPE, bump_versions
+from apps.products.models import Category, Product, ProductRatingStats
+from apps.products.search import get_search_backend
+from apps.orders.models import (
+    CartItem,
+    Order,
+    OrderItem,
+    Review,
+    normalize_search_text,
+)
+
+
+EMAIL_DOMAINS = (
+    "example.com",
+    "test.com",
+    "sample.org",
+    "demo.net",
+    "mail.com",
+)
+SOME_WORDS = (
+    "lorem",
+    "ipsum",
+    "dolor",
+    "sit",
+    "amet",
+    "consectetur",
+    "adipiscing",
+    "elit",
+    "sed",
+    "do",
+    "eiusmod",
+    "tempor",
+    "incididunt",
+    "ut",
+    "labore",
+    "et",
+    "dolore",
+    "magna",
+    "aliqua",
+)
+
+
+class PkSampler:
+    """
+    Draws random rows of a table without materializing it.
+
+    Every draw reads a few short runs of consecutive primary keys
+    starting at random points of the pk range, so gaps in the ids and
+    filtered querysets only cost indexed range scans. Small tables are
+    read once and sampled from memory.
+    """
+
+    WINDOWS = 8
+    IN_MEMORY_LIMIT = 10_000
+
+    def __init__(
+        self,
+        queryset: QuerySet,
+        rng: Random,
+        fields: tuple[str, ...] = ("pk",),
+    ) -> None:
+        self.queryset = queryset.order_by("pk").values_list(
+            *fields, flat=len(fields) == 1
         )
-
-    def __generate_categories(self, category_count: int = 20) -> None:
-        """
-        Generates categories for testing purposes.
-        """
-
-        created_categories: list[Category] = []
-        before: int = Category.objects.count()
-
-        for i in range(category_count):
-            name: str = choice(self.SOME_WORDS).capitalize()
-            created_categories.append(
-                Category(
-                    name=name,
-                    description=f"Category about {name.lower()} products."
-                )
-            )
-
-        Category.objects.bulk_create(created_categories, ignore_conflicts=True)
-        after: int = Category.objects.count()
-
-        self.stdout.write(
-            self.style.SUCCESS(
-                f"Created {after - before} Category records."
-            )
+        self.rng = rng
+        bounds: dict[str, Optional[int]] = queryset.aggregate(
+            low=Min("pk"), high=Max("pk")
         )
-
-    def __generate_products(self, product_count: int = 20) -> None:
-        """
-        Generates products for testing purposes.
-        """
-
-        created_products: list[Product] = []
-        before: int = Product.objects.count()
-
-        categories: QuerySet[Category] = Category.objects.all()
-        sellers: QuerySet[CustomUser] = CustomUser.objects.filter(is_seller=True)
-        if not sellers.exists():
-            sellers = CustomUser.objects.all()
-
-        for i in range(product_count):
-            name: str = " ".join(choices(self.SOME_WORDS, k=2)).capitalize()
-            created_products.append(
-                Product(
-                    category=choice(categories),
-                    seller=choice(sellers),
-                    name=name,
-                    description=f"Description for {name}",
-                    price=round(uniform(10.0, 500.0), 2),
-                    image=f"https://placehold.co/150x150?text=Product+{i+1}",
+        self.low = bounds["low"]
+        self.high = bounds["high"]
+        self.rows: Optional[list[Any]] = None
+        if self.low is not None and (
+            self.high - self.low < self.IN_MEMORY_LIMIT
+        ):
+            self.rows = list(self.queryset)
+
+    def __bool__(self) -> bool:
+        return self.low is not None
+
+    def sample(self, k: int) -> list[Any]:
+        """Returns k random rows (with repetitions)."""
+        if self.rows is not None:
+            return self.rng.choices(self.rows, k=k)
+
+        window: int = -(-k // self.WINDOWS)
+        pool: list[Any] = []
+        for _ in range(self.WINDOWS):
+            start: int = self.rng.randint(self.low, self.high)
+            rows: list[Any] = list(
+                self.queryset.filter(pk__gte=start)[:window]
+            )
+            if len(rows) < window:
+                rows += self.queryset[:window - len(rows)]
+            pool.extend(rows)
+        return self.rng.choices(pool, k=k)
+
+
+class DataGenerator:
+    """
+    Builds test data rows in fixed-size batches.
+
+    Each build_* method returns the database-ready values of the
+    model's INSERT_FIELDS for a range of row numbers, so any part of a
+    model's rows can be generated independently from the others and
+    inserted without instantiating models.
+    """
+
+    def __init__(self, rng: Random) -> None:
+        self.rng = rng
+        self._password: Optional[str] = None
+        self._samplers: dict[str, PkSampler] = {}
+
+    @property
+    def password(self) -> str:
+        if self._password is None:
+            self._password = make_password(password="12345")
+        return self._password
+
+    def sampler(self, name: str) -> PkSampler:
+        """Returns a (cached) sampler of the foreign key targets."""
+        if name not in self._samplers:
+            if name == "sellers":
+                sampler = PkSampler(
+                    CustomUser.objects.filter(is_seller=True), self.rng
+                )
+                if not sampler:
+                    sampler = PkSampler(CustomUser.objects.all(), self.rng)
+            elif name == "products":
+                sampler = PkSampler(
+                    Product.objects.all(),
+                    self.rng,
+                    fields=("pk", "name", "price"),
+                )
+            else:
+                sampler = PkSampler(
+                    {
+                        "users": CustomUser.objects.all(),
+                        "categories": Category.objects.all(),
+                        "orders": Order.objects.all(),
+                    }[name],
+                    self.rng,
                 )
+            self._samplers[name] = sampler
+        return self._samplers[name]
+
+    def words(self, k: int) -> str:
+        return " ".join(self.rng.choices(SOME_WORDS, k=k)).capitalize()
+
+    def now(self, model: type[Model]) -> Any:
+        """Current time, adapted for the database of the model."""
+        connection = connections[router.db_for_write(model)]
+        return connection.ops.adapt_datetimefield_value(timezone.now())
+
+    def build_users(self, rows: range) -> list[tuple]:
+        now: Any = self.now(CustomUser)
+        return [
+            (
+                self.password,
+                False,
+                f"user{i}",
+                self.words(1),
+                self.words(1),
+                False,
+                True,
+                now,
+                f"user{i}@{self.rng.choice(EMAIL_DOMAINS)}",
+                f"+7701{self.rng.randint(1000000, 9999999)}",
+                self.rng.choice([True, False]),
+                (
+                    f"Street {self.rng.randint(1, 50)}, "
+                    f"City {self.rng.randint(1, 10)}"
+                ),
             )
-
-        Product.objects.bulk_create(created_products, ignore_conflicts=True)
-        after: int = Product.objects.count()
-
-        self.stdout.write(
-            self.style.SUCCESS(
-                f"Created {after - before} Product records."
+            for i in rows
+        ]
+
+    def build_categories(self, rows: range) -> list[tuple]:
+        categories: list[tuple] = []
+        for _ in rows:
+            name: str = self.words(1)
+            categories.append(
+                (name, f"Category about {name.lower()} products.")
             )
-        )
-
-    def __generate_cart_items(self, count: int = 20) -> None:
-        """
-        Generates cart items for testing purposes.
-        """
-
-        created_items: list[CartItem] = []
-        before: int = CartItem.objects.count()
-
-        users: QuerySet[CustomUser] = CustomUser.objects.all()
-        products: QuerySet[Product] = Product.objects.all()
-
-        for _ in range(count):
-            created_items.append(
-                CartItem(
-                    user=choice(users),
-                    product=choice(products),
-                    quantity=randint(1, 5),
+        return categories
+
+    def build_products(self, rows: range) -> list[tuple]:
+        now: Any = self.now(Product)
+        categories: list[int] = self.sampler("categories").sample(len(rows))
+        sellers: list[int] = self.sampler("sellers").sample(len(rows))
+        products: list[tuple] = []
+        for i, category_id, seller_id in zip(rows, categories, sellers):
+            name: str = self.words(2)
+            products.append(
+                (
+                    category_id,
+                    seller_id,
+                    name,
+                    f"Description for {name}",
+                    Decimal(f"{self.rng.uniform(10.0, 500.0):.2f}"),
+                    f"https://placehold.co/150x150?text=Product+{i}",
+                    False,
+                    0,
+                    now,
                 )
             )
-
-        CartItem.objects.bulk_create(created_items, ignore_conflicts=True)
-        after: int = CartItem.objects.count()
-
-        self.stdout.write(
-            self.style.SUCCESS(
-                f"Created {after - before} CartItem records."
+        return products
+
+    def build_cart_items(self, rows: range) -> list[tuple]:
+        now: Any = self.now(CartItem)
+        users: list[int] = self.sampler("users").sample(len(rows))
+        products: list[tuple] = self.sampler("products").sample(len(rows))
+        return [
+            (user_id, product[0], self.rng.randint(1, 5), now)
+            for user_id, product in zip(users, products)
+        ]
+
+    def build_orders(self, rows: range) -> list[tuple]:
+        now: Any = self.now(Order)
+        users: list[int] = self.sampler("users").sample(len(rows))
+        orders: list[tuple] = []
+        for user_id in users:
+            requires_delivery: str = self.rng.choice(
+                ["required", "not_required"]
             )
-        )
-
-    def __generate_orders(self, count: int = 20) -> None:
-        """
-        Generates orders for testing purposes.
-        """
-
-        created_orders: list[Order] = []
-        before: int = Order.objects.count()
-
-        users: QuerySet[CustomUser] = CustomUser.objects.all()
-
-        for _ in range(count):
-            created_orders.append(
-                Order(
-                    user=choice(users),
-                    phone_number=f"+7701{randint(1000000,9999999)}",
-                    delivery_city=f"City {randint(1, 20)}",
-                    delivery_pickup_point=f"Pickup {randint(1, 50)}",
-                    delivery_personal_address=choice(
-                        [f"Street {randint(1, 50)}", None]
+            city: str = f"City {self.rng.randint(1, 20)}"
+            pickup_point: str = f"Pickup {self.rng.randint(1, 50)}"
+            orders.append(
+                (
+                    user_id,
+                    now,
+                    f"+7701{self.rng.randint(1000000, 9999999)}",
+                    city,
+                    pickup_point,
+                    normalize_search_text(city),
+                    normalize_search_text(pickup_point),
+                    (
+                        f"Street {self.rng.randint(1, 50)}"
+                        if requires_delivery == "required"
+                        else None
                     ),
-                    requires_couriers_delivery=choice(["required", "not_required"]),
-                    status=choice(["P", "S", "D"]),
+                    requires_delivery,
+                    self.rng.choice(["P", "S", "D"]),
                 )
             )
+        return orders
+
+    def build_order_items(self, rows: range) -> list[tuple]:
+        now: Any = self.now(OrderItem)
+        orders: list[int] = self.sampler("orders").sample(len(rows))
+        products: list[tuple] = self.sampler("products").sample(len(rows))
+        return [
+            (order_id, product_id, name, price, self.rng.randint(1, 3), now)
+            for order_id, (product_id, name, price) in zip(orders, products)
+        ]
+
+    def build_reviews(self, rows: range) -> list[tuple]:
+        now: Any = self.now(Review)
+        products: list[tuple] = self.sampler("products").sample(len(rows))
+        authors: list[int] = self.sampler("users").sample(len(rows))
+        return [
+            (product[0], author_id, self.rng.randint(1, 5), self.words(10), now)
+            for product, author_id in zip(products, authors)
+        ]
+
+    def batches(
+        self,
+        build: Callable[[range], list[tuple]],
+        rows: range,
+        batch_size: int,
+    ) -> Iterator[list[tuple]]:
+        """Yields the rows to insert, batch_size rows at a time."""
+        for start in range(rows.start, rows.stop, batch_size):
+            yield build(range(start, min(start + batch_size, rows.stop)))
+
+
+# Columns filled by the DataGenerator.build_* methods, in order
+INSERT_FIELDS: dict[type[Model], tuple[str, ...]] = {
+    CustomUser: (
+        "password",
+        "is_superuser",
+        "username",
+        "first_name",
+        "last_name",
+        "is_staff",
+        "is_active",
+        "date_joined",
+        "email",
+        "phone",
+        "is_seller",
+        "address",
+    ),
+    Category: ("name", "description"),
+    Product: (
+        "category",
+        "seller",
+        "name",
+        "description",
+        "price",
+        "image",
+        "has_thumbnails",
+        "stock_shards",
+        "created_at",
+    ),
+    CartItem: ("user", "product", "quantity", "created_at"),
+    Order: (
+        "user",
+        "created_at",
+        "phone_number",
+        "delivery_city",
+        "delivery_pickup_point",
+        "delivery_city_normalized",
+        "delivery_pickup_point_normalized",
+        "delivery_personal_address",
+        "requires_couriers_delivery",
+        "status",
+    ),
+    OrderItem: (
+        "order",
+        "product",
+        "name",
+        "price",
+        "quantity",
+        "created_at",
+    ),
+    Review: ("product", "author", "rate", "text", "created_at"),
+}
+
+# Models whose random rows may repeat a unique key: those are skipped
+SKIP_CONFLICTS: set[type[Model]] = {CartItem}
+
+
+def insert_batch(model: type[Model], rows: list[tuple]) -> int:
+    """
+    Inserts generated rows with a single executemany and returns the
+    number of rows inserted, without the skipped conflicts.
+
+    Compiling a bulk_create costs more than running it at these
+    volumes, so the INSERT statement is written once per batch and
+    the rows are passed as plain tuples.
+    """
+    using: str = router.db_for_write(model)
+    connection = connections[using]
+    quote = connection.ops.quote_name
+    columns: str = ", ".join(
+        quote(model._meta.get_field(name).column)
+        for name in INSERT_FIELDS[model]
+    )
+    placeholders: str = ", ".join(["%s"] * len(INSERT_FIELDS[model]))
+    conflicts: str = (
+        " ON CONFLICT DO NOTHING" if model in SKIP_CONFLICTS else ""
+    )
+    with transaction.atomic(using=using), connection.cursor() as cursor:
+        cursor.executemany(
+            f"INSERT INTO {quote(model._meta.db_table)} ({columns}) "
+            f"VALUES ({placeholders}){conflicts}",
+            rows,
+        )
+        return cursor.rowcount
+
+
+# (option, model, builder, foreign key samplers the builder needs),
+# in dependency order.
+STEPS = (
+    ("users", CustomUser, "build_users", ()),
+    ("categories", Category, "build_categories", ()),
+    ("products", Product, "build_products", ("categories", "sellers")),
+    ("cart_items", CartItem, "build_cart_items", ("users", "products")),
+    ("orders", Order, "build_orders", ("users",)),
+    ("order_items", OrderItem, "build_order_items", ("orders", "products")),
+    ("reviews", Review, "build_reviews", ("products", "users")),
+)
+
+
+def split_rows(rows: range, parts: int) -> list[range]:
+    """Splits the row numbers into at most parts contiguous ranges."""
+    size: int = -(-len(rows) // parts)
+    return [
+        range(start, min(start + size, rows.stop))
+        for start in range(rows.start, rows.stop, size)
+    ]
+
+
+def worker_batches(
+    option: str, rows: range, seed: str, batch_size: int
+) -> Iterator[list[tuple]]:
+    """
+    Generates one worker's share of a model's rows.
+
+    Runs in a child process: Django is set up when the process was
+    spawned, and every worker opens its own database connection.
+    """
+    if not apps.ready:
+        django.setup()
+    connections.close_all()
+    build: str = next(step[2] for step in STEPS if step[0] == option)
+    generator = DataGenerator(Random(seed))
+    return generator.batches(getattr(generator, build), rows, batch_size)
+
+
+def insert_rows(option: str, rows: range, seed: str, batch_size: int) -> int:
+    """Worker: generates and inserts its share of a model's rows."""
+    model: type[Model] = next(step[1] for step in STEPS if step[0] == option)
+    created: int = 0
+    try:
+        for batch in worker_batches(option, rows, seed, batch_size):
+            created += insert_batch(model, batch)
+    finally:
+        connections.close_all()
+    return created
+
+
+def produce_rows(
+    option: str,
+    rows: range,
+    seed: str,
+    batch_size: int,
+    queue: multiprocessing.Queue,
+) -> None:
+    """Worker: generates its share of a model's rows for a single writer."""
+    try:
+        for batch in worker_batches(option, rows, seed, batch_size):
+            queue.put(batch)
+    finally:
+        connections.close_all()
+        queue.put(None)
 
-        Order.objects.bulk_create(created_orders, ignore_conflicts=True)
-        after: int = Order.objects.count()
 
-        self.stdout.write(
-            self.style.SUCCESS(
-                f"Created {after - before} Order records."
+class Command(BaseCommand):
+    help = "Generate tasks data for testing purposes"
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        for option, model, _, _ in STEPS:
+            parser.add_argument(
+                f"--{option.replace('_', '-')}",
+                type=int,
+                default=20,
+                help=f"Number of {model.__name__} records to create.",
             )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Number of rows inserted per statement.",
+        )
+        parser.add_argument(
+            "--seed",
+            type=int,
+            default=None,
+            help="Random seed, for reproducible datasets.",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=1,
+            help=(
+                "Number of processes generating each model's rows. "
+                "SQLite keeps a single writer fed by the workers."
+            ),
         )
 
-    def __generate_order_items(self, count: int = 20) -> None:
-        """
-        Generates order items for testing purposes.
-        """
-
-        created_items: list[OrderItem] = []
-        before: int = OrderItem.objects.count()
-
-        orders: QuerySet[Order] = Order.objects.all()
-        products: QuerySet[Product] = Product.objects.all()
-
-        for _ in range(count):
-            product = choice(products)
-            created_items.append(
-                OrderItem(
-                    order=choice(orders),
-                    product=product,
-                    name=product.name,
-                    price=product.price,
-                    quantity=randint(1, 3),
-                )
+    def first_row(self, model: type[Model]) -> int:
+        """Number of the first new row, so reruns keep unique values."""
+        return (model.objects.aggregate(last=Max("pk"))["last"] or 0) + 1
+
+    def generate(
+        self,
+        generator: DataGenerator,
+        option: str,
+        model: type[Model],
+        build: str,
+        count: int,
+        batch_size: int,
+        workers: int,
+        seed: str,
+    ) -> None:
+        """Inserts count rows of the model in batches and reports speed."""
+
+        start_time: float = perf_counter()
+        first: int = self.first_row(model)
+        rows = range(first, first + count)
+
+        if workers > 1 and connections[model.objects.db].vendor == "sqlite":
+            created: int = self.generate_single_writer(
+                option, model, rows, batch_size, workers, seed
             )
-
-        OrderItem.objects.bulk_create(created_items, ignore_conflicts=True)
-        after: int = OrderItem.objects.count()
-
+        elif workers > 1:
+            created = self.generate_parallel(
+                option, rows, batch_size, workers, seed
+            )
+        else:
+            created = 0
+            for batch in generator.batches(
+                getattr(generator, build), rows, batch_size
+            ):
+                created += insert_batch(model, batch)
+
+        elapsed: float = perf_counter() - start_time
         self.stdout.write(
             self.style.SUCCESS(
-                f"Created {after - before} OrderItem records."
+                f"Created {created} {model.__name__} records in "
+                f"{elapsed:.2f} seconds ({created / elapsed:.0f} rows/s)."
             )
         )
 
-    def __generate_reviews(self, count: int = 20) -> None:
+    def generate_parallel(
+        self,
+        option: str,
+        rows: range,
+        batch_size: int,
+        workers: int,
+        seed: str,
+    ) -> int:
+        """Every worker process inserts its own part of the rows."""
+
+        # Forked workers must not share the parent's connection
+        connections.close_all()
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [
+                pool.submit(
+                    insert_rows,
+                    option,
+                    part,
+                    f"{seed}:{option}:{worker}",
+                    batch_size,
+                )
+                for worker, part in enumerate(split_rows(rows, workers))
+            ]
+            return sum(future.result() for future in futures)
+
+    def generate_single_writer(
+        self,
+        option: str,
+        model: type[Model],
+        rows: range,
+        batch_size: int,
+        workers: int,
+        seed: str,
+    ) -> int:
         """
-        Generates reviews for testing purposes.
+        Worker processes generate the rows and this process inserts
+        them, as SQLite allows only one writer at a time.
         """
 
-        created_reviews: list[Review] = []
-        before: int = Review.objects.count()
-
-        products: QuerySet[Product] = Product.objects.all()
-        authors: QuerySet[CustomUser] = CustomUser.objects.all()
-
-        for _ in range(count):
-            created_reviews.append(
-                Review(
-                    product=choice(products),
-                    author=choice(authors),
-                    rate=randint(1, 5),
-                    text=" ".join(choices(self.SOME_WORDS, k=10)).capitalize(),
-                )
+        connections.close_all()
+        queue: multiprocessing.Queue = multiprocessing.Queue(
+            maxsize=workers * 2
+        )
+        producers: list[multiprocessing.Process] = [
+            multiprocessing.Process(
+                target=produce_rows,
+                args=(
+                    option,
+                    part,
+                    f"{seed}:{option}:{worker}",
+                    batch_size,
+                    queue,
+                ),
             )
-
-        Review.objects.bulk_create(created_reviews, ignore_conflicts=True)
-        after: int = Review.objects.count()
-
-        self.stdout.write(
-            self.style.SUCCESS(
-                f"Created {after - before} Review records."
+            for worker, part in enumerate(split_rows(rows, workers))
+        ]
+        for producer in producers:
+            producer.start()
+
+        created: int = 0
+        running: int = len(producers)
+        try:
+            while running:
+                batch: Optional[list[tuple]] = queue.get()
+                if batch is None:
+                    running -= 1
+                    continue
+                created += insert_batch(model, batch)
+        except BaseException:
+            # Producers blocked on the full queue would never exit
+            for producer in producers:
+                producer.terminate()
+            raise
+        finally:
+            for producer in producers:
+                producer.join()
+        if any(producer.exitcode for producer in producers):
+            raise CommandError(
+                f"A worker failed while generating {model.__name__} records."
             )
-        )
+        return created
 
-    def handle(self, *args: tuple[Any, ...], **kwargs: dict[str, Any]) -> None:
+    def handle(self, *args: tuple[Any, ...], **kwargs: Any) -> None:
         """Command entry point."""
 
         start_time: datetime = datetime.now()
+        seed: str = str(
+            kwargs["seed"]
+            if kwargs["seed"] is not None
+            else Random().randrange(2**32)
+        )
+        generator = DataGenerator(Random(seed))
+        first_product: int = self.first_row(Product)
+
+        for option, model, build, dependencies in STEPS:
+            count: int = kwargs[option]
+            if count <= 0:
+                continue
+            missing: list[str] = [
+                name for name in dependencies if not generator.sampler(name)
+            ]
+            if missing:
+                self.stdout.write(
+                    self.style.WARNING(
+                        f"Skipped {model.__name__} records: no "
+                        f"{', '.join(missing)} to refer to."
+                    )
+                )
+                continue
+            self.generate(
+                generator,
+                option,
+                model,
+                build,
+                count,
+                kwargs["batch_size"],
+                kwargs["workers"],
+                seed,
+            )
 
-        self.__generate_users(user_count=20)
-        self.__generate_categories(category_count=20)
-        self.__generate_products(product_count=20)
-        self.__generate_cart_items(count=20)
-        self.__generate_orders(count=20)
-        self.__generate_order_items(count=20)
-        self.__generate_reviews(count=20)
+        if kwargs["reviews"] > 0:
+            ProductRatingStats.objects.rebuild()
+            self.stdout.write(self.style.SUCCESS("Rebuilt rating stats."))
+        if kwargs["products"] > 0:
+            # Raw inserts skip the signals keeping these current
+            get_search_backend().index_range(
+                first_product, self.first_row(Product) - 1
+            )
+            bump_versions([CATALOG_SCOPE])
+            self.stdout.write(self.style.SUCCESS("Indexed new products."))
 
         self.stdout.write(
             "The whole process to generate data took: {} seconds".format(
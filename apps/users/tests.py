@@ -1,3 +1,195 @@
-from django.test import TestCase
+# Python modules
+import os
+import shutil
+from io import StringIO
+from random import Random
+from tempfile import mkdtemp
+from unittest import mock, skipUnless
 
-# Create your tests here.
+# Django modules
+from django.core.management import call_command
+from django.db import DatabaseError, connection
+from django.test import SimpleTestCase, TestCase, TransactionTestCase
+
+# Project modules
+from apps.users.models import CustomUser
+from apps.users.management.commands.generatedata import PkSampler, split_rows
+from apps.products.models import Category, Product
+from apps.orders.models import CartItem, Order, OrderItem, Review
+
+
+class GenerateDataTestCase(TestCase):
+    """generatedata command tests."""
+
+    def generate(self, **options):
+        stdout = StringIO()
+        call_command("generatedata", stdout=stdout, **options)
+        return stdout.getvalue()
+
+    def test_generates_requested_rows_in_batches(self):
+        output = self.generate(
+            users=30,
+            categories=5,
+            products=40,
+            cart_items=25,
+            orders=35,
+            order_items=50,
+            reviews=45,
+            batch_size=7,
+            seed=1,
+        )
+
+        self.assertEqual(CustomUser.objects.count(), 30)
+        self.assertEqual(Category.objects.count(), 5)
+        self.assertEqual(Product.objects.count(), 40)
+        self.assertEqual(CartItem.objects.count(), 25)
+        self.assertEqual(Order.objects.count(), 35)
+        self.assertEqual(OrderItem.objects.count(), 50)
+        self.assertEqual(Review.objects.count(), 45)
+        self.assertIn("rows/s", output)
+
+    def test_reruns_add_rows(self):
+        self.generate(users=10, seed=1)
+        self.generate(users=10, seed=1)
+
+        self.assertEqual(CustomUser.objects.count(), 20)
+
+    def test_reports_inserted_rows(self):
+        # One user and one product: the cart lines all collide
+        output = self.generate(
+            users=1,
+            categories=1,
+            products=1,
+            cart_items=5,
+            orders=0,
+            order_items=0,
+            reviews=0,
+        )
+
+        self.assertEqual(CartItem.objects.count(), 1)
+        self.assertIn("Created 1 CartItem records", output)
+
+    def test_skips_models_without_dependencies(self):
+        output = self.generate(
+            users=0,
+            categories=0,
+            products=0,
+            cart_items=0,
+            orders=0,
+            order_items=5,
+            reviews=0,
+        )
+
+        self.assertIn("Skipped OrderItem records", output)
+        self.assertFalse(OrderItem.objects.exists())
+
+
+@skipUnless(connection.vendor == "sqlite", "Swaps in a SQLite file")
+class GenerateDataWorkersTestCase(TransactionTestCase):
+    """
+    generatedata --workers tests. The worker processes open their own
+    connections, which can't reach the in-memory test database, so the
+    command runs against a migrated database file.
+    """
+
+    def setUp(self):
+        self.directory = mkdtemp()
+        self.in_memory = (
+            connection.settings_dict["NAME"], connection.connection
+        )
+        connection.connection = None
+        connection.settings_dict["NAME"] = os.path.join(
+            self.directory, "workers.sqlite3"
+        )
+        call_command("migrate", verbosity=0)
+
+    def tearDown(self):
+        connection.close()
+        connection.settings_dict["NAME"], connection.connection = (
+            self.in_memory
+        )
+        shutil.rmtree(self.directory)
+
+    def test_workers(self):
+        stdout = StringIO()
+        call_command(
+            "generatedata",
+            users=30,
+            categories=5,
+            products=40,
+            cart_items=0,
+            orders=35,
+            order_items=50,
+            reviews=45,
+            batch_size=7,
+            workers=2,
+            seed=1,
+            stdout=stdout,
+        )
+
+        self.assertEqual(CustomUser.objects.count(), 30)
+        self.assertEqual(Product.objects.count(), 40)
+        self.assertEqual(Order.objects.count(), 35)
+        self.assertEqual(OrderItem.objects.count(), 50)
+        self.assertEqual(Review.objects.count(), 45)
+        self.assertIn("Created 50 OrderItem records", stdout.getvalue())
+        # Every worker's rows refer to existing rows
+        self.assertEqual(
+            len(set(CustomUser.objects.values_list("email", flat=True))), 30
+        )
+        with connection.cursor() as cursor:
+            cursor.execute("PRAGMA foreign_key_check")
+            self.assertEqual(cursor.fetchall(), [])
+
+    def test_failed_insert_stops_the_workers(self):
+        with mock.patch(
+            "apps.users.management.commands.generatedata.insert_batch",
+            side_effect=DatabaseError("disk I/O error"),
+        ):
+            with self.assertRaises(DatabaseError):
+                call_command(
+                    "generatedata",
+                    users=200,
+                    categories=0,
+                    products=0,
+                    cart_items=0,
+                    orders=0,
+                    order_items=0,
+                    reviews=0,
+                    batch_size=5,
+                    workers=2,
+                    stdout=StringIO(),
+                )
+
+
+class SplitRowsTestCase(SimpleTestCase):
+    """Worker row range split tests."""
+
+    def test_split_covers_all_rows(self):
+        parts = split_rows(range(5, 16), 4)
+
+        self.assertEqual(
+            parts, [range(5, 8), range(8, 11), range(11, 14), range(14, 16)]
+        )
+
+    def test_more_workers_than_rows(self):
+        self.assertEqual(split_rows(range(1, 3), 4), [range(1, 2), range(2, 3)])
+
+
+class PkSamplerTestCase(TestCase):
+    """Random primary key sampling tests."""
+
+    def test_samples_existing_rows_only(self):
+        categories = Category.objects.bulk_create(
+            Category(name=f"Category {i}") for i in range(100)
+        )
+        Category.objects.filter(pk__in=[c.pk for c in categories[::2]]).delete()
+        existing = set(Category.objects.values_list("pk", flat=True))
+
+        sampler = PkSampler(Category.objects.all(), Random(1))
+        sampler.rows = None  # force the pk range windows
+
+        self.assertTrue(set(sampler.sample(500)) <= existing)
+
+    def test_empty_table(self):
+        self.assertFalse(PkSampler(Category.objects.all(), Random(1)))
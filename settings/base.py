@@ -33,9 +33,11 @@ DJANGO_AND_THIRD_PARTY_APPS = [
 ]
 
 PROJECT_APPS = [
+    "apps.core.apps.CoreConfig",
     "apps.orders.apps.OrdersConfig",
     "apps.users.apps.UsersConfig",
     "apps.products.apps.ProductsConfig",
+    "apps.analytics.apps.AnalyticsConfig",
 ]
 
 INSTALLED_APPS = DJANGO_AND_THIRD_PARTY_APPS + PROJECT_APPS
@@ -44,6 +46,7 @@ INSTALLED_APPS = DJANGO_AND_THIRD_PARTY_APPS + PROJECT_APPS
 # Middleware | Templates | Validators
 #
 MIDDLEWARE = [
+    "apps.core.middleware.RequestMetricsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -92,10 +95,66 @@ STATIC_ROOT = os.path.join(BASE_DIR, "static")
 MEDIA_URL = "media/"
 MEDIA_ROOT = os.path.join(BASE_DIR, "media")
 
+# Product image renditions: name -> longest side in pixels
+PRODUCT_THUMBNAIL_SIZES = {"small": 160, "medium": 480, "large": 1024}
+PRODUCT_THUMBNAIL_FORMATS = ("webp", "jpeg")
+PRODUCT_THUMBNAIL_WORKERS = 2
+
+# Time units added to a cart stay held for it before the sweep
+# (releasereservations) gives them back to the stock
+STOCK_RESERVATION_SECONDS = 15 * 60
+
+# Days cart lines are kept before purgecarts deletes them
+CART_RETENTION_DAYS = 90
+GUEST_CART_RETENTION_DAYS = 30
+
+# Days delivered orders stay in the hot tables before archiveorders
+# moves them to the archive
+ORDER_ARCHIVE_DAYS = 365
+
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
+# ----------------------------------------------
+# Cache
+#
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "marketplace",
+    }
+}
+CATALOG_CACHE_TIMEOUT = 300
+
 AUTH_USER_MODEL = "users.CustomUser"
 
+# ----------------------------------------------
+# Request metrics | Logging
+#
+# A request running the same SQL this many times is logged as a warning
+REQUEST_METRICS_REPEATED_QUERY_LIMIT = 10
+# Bearer token accepted by /metrics, if set
+METRICS_TOKEN = ""
+# Client addresses or networks served /metrics without the token
+METRICS_ALLOWED_IPS: list[str] = []
+# Serve /metrics to anyone when neither of the above is set
+METRICS_PUBLIC = True
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {
+        "console": {"class": "logging.StreamHandler"},
+    },
+    "loggers": {
+        # One JSON line per request; INFO logs every request
+        "apps.core.requests": {
+            "handlers": ["console"],
+            "level": "WARNING",
+            "propagate": False,
+        },
+    },
+}
+
 # ----------------------------------------------
 # Unfold
 #
@@ -1,7 +1,10 @@
 # Django modules
 from django.contrib import admin
-from django.urls import path
+from django.urls import include, path
 
 urlpatterns = [
     path('admin/', admin.site.urls),
+    path('api/', include('apps.products.urls')),
+    path('api/', include('apps.orders.urls')),
+    path('', include('apps.core.urls')),
 ]